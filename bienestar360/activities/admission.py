@@ -0,0 +1,180 @@
+"""
+Cola de admisión para aperturas de inscripción con mucha demanda.
+
+En las actividades con `queued_admission` la vista de inscripción solo agrega
+una `EnrollmentRequest` (una inserción corta, sin bloquear la actividad ni
+enviar correo). `python manage.py process_enrollment_queue` admite las
+solicitudes por lotes en orden de llegada: cada lote bloquea una sola vez la
+fila de la actividad, crea las inscripciones que caben en el cupo (con su
+correo de confirmación en la tabla de salida) y deja el resto en lista de
+espera. Al cancelar una inscripción (`Enrollment.cancel`) el cupo liberado
+pasa a la solicitud en espera más antigua.
+"""
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .emails import queue_enrollment_confirmation
+from .models import Activity, Enrollment, EnrollmentRequest, EnrollmentRequestStatus
+
+
+# Solicitudes admitidas por transacción (y por bloqueo de la actividad)
+ADMISSION_BATCH_SIZE = 200
+
+OPEN_STATUSES = (EnrollmentRequestStatus.PENDING, EnrollmentRequestStatus.WAITLISTED)
+
+
+def request_enrollment(activity, user):
+    """
+    Encola la solicitud de `user` y devuelve (solicitud, creada). Si ya tenía
+    una solicitud abierta (en cola o en espera) se devuelve esa.
+    """
+    try:
+        with transaction.atomic():
+            return EnrollmentRequest.objects.create(user=user, activity=activity), True
+    except IntegrityError:
+        existing = EnrollmentRequest.objects.filter(user=user, activity=activity, status__in=OPEN_STATUSES).first()
+        if existing is None:
+            raise
+        return existing, False
+
+
+def _free_seats(activity):
+    """Cupos libres de la actividad; None si no tiene límite (misma regla que is_full_status)."""
+    if activity.requires_registration and activity.max_capacity:
+        return max(activity.max_capacity - activity.enrolled_count, 0)
+    return None
+
+
+def _admit(activity, requests, seats, overflow_status):
+    """
+    Inscribe las `requests` en orden mientras haya `seats` (None = sin
+    límite); las demás quedan en `overflow_status`. Debe llamarse con la
+    actividad bloqueada. Los correos de confirmación se encolan en la misma
+    transacción. Devuelve cuántas se admitieron.
+    """
+    now = timezone.now()
+    admitted = 0
+    for enrollment_request in requests:
+        if seats is None or seats > 0:
+            # Las señales de Enrollment actualizan activity.enrolled_count
+            enrollment = Enrollment.objects.create(user=enrollment_request.user, activity=activity)
+            enrollment_request.enrollment = enrollment
+            enrollment_request.status = EnrollmentRequestStatus.ADMITTED
+            queue_enrollment_confirmation(enrollment, settings.SITE_URL)
+            admitted += 1
+            if seats is not None:
+                seats -= 1
+        else:
+            enrollment_request.status = overflow_status
+        enrollment_request.processed_at = now
+    EnrollmentRequest.objects.bulk_update(requests, ["status", "enrollment", "processed_at"])
+    return admitted
+
+
+def _open_requests(activity, status, limit=None):
+    queryset = EnrollmentRequest.objects.filter(activity=activity, status=status).select_related("user").order_by("pk")
+    if limit is not None:
+        queryset = queryset[:limit]
+    return list(queryset)
+
+
+def _without_enrolled(activity, requests):
+    """
+    Marca como admitidas, con su inscripción existente, las solicitudes de
+    quienes ya se inscribieron por otra vía (no ocupan un segundo cupo) y
+    devuelve las demás.
+    """
+    enrolled = dict(
+        Enrollment.objects.filter(activity=activity, user_id__in=[r.user_id for r in requests])
+        .order_by("pk")
+        .values_list("user_id", "pk")
+    )
+    if not enrolled:
+        return requests
+    now = timezone.now()
+    already = [r for r in requests if r.user_id in enrolled]
+    for enrollment_request in already:
+        enrollment_request.status = EnrollmentRequestStatus.ADMITTED
+        enrollment_request.enrollment_id = enrolled[enrollment_request.user_id]
+        enrollment_request.processed_at = now
+    EnrollmentRequest.objects.bulk_update(already, ["status", "enrollment", "processed_at"])
+    return [r for r in requests if r.user_id not in enrolled]
+
+
+def _promote(activity):
+    admitted = 0
+    # Cada vuelta cierra todas las solicitudes que toma; se repite si alguna
+    # era de alguien ya inscrito y su cupo quedó libre
+    while True:
+        seats = _free_seats(activity)
+        if seats == 0:
+            return admitted
+        waiting = _open_requests(activity, EnrollmentRequestStatus.WAITLISTED, limit=seats)
+        if not waiting:
+            return admitted
+        queued = _without_enrolled(activity, waiting)
+        admitted += _admit(activity, queued, seats, EnrollmentRequestStatus.WAITLISTED)
+
+
+def promote_waitlist(activity_id):
+    """Admite las solicitudes en espera más antiguas que quepan en los cupos libres."""
+    with transaction.atomic():
+        activity = Activity.objects.select_for_update().filter(pk=activity_id).first()
+        if activity is None:
+            return 0
+        return _promote(activity)
+
+
+def admit_pending(activity_id, batch_size=ADMISSION_BATCH_SIZE):
+    """
+    Procesa hasta `batch_size` solicitudes en cola de la actividad, en orden
+    de llegada, y devuelve (procesadas, admitidas). La lista de espera se
+    atiende antes que las solicitudes nuevas.
+    """
+    with transaction.atomic():
+        activity = Activity.objects.select_for_update().filter(pk=activity_id).first()
+        if activity is None:
+            return 0, 0
+        admitted = _promote(activity)
+
+        pending = _open_requests(activity, EnrollmentRequestStatus.PENDING, limit=batch_size)
+        if not pending:
+            return 0, admitted
+
+        queued = _without_enrolled(activity, pending)
+        admitted += _admit(activity, queued, _free_seats(activity), EnrollmentRequestStatus.WAITLISTED)
+        return len(pending), admitted
+
+
+def process_queue(batch_size=ADMISSION_BATCH_SIZE):
+    """
+    Procesa todas las solicitudes en cola, lote por lote y actividad por
+    actividad, y luego ofrece los cupos liberados a las listas de espera.
+    Devuelve (procesadas, admitidas).
+    """
+    processed = admitted = 0
+    while True:
+        activity_ids = list(
+            EnrollmentRequest.objects.filter(status=EnrollmentRequestStatus.PENDING)
+            .order_by("activity_id")
+            .values_list("activity_id", flat=True)
+            .distinct()
+        )
+        if not activity_ids:
+            break
+        for activity_id in activity_ids:
+            batch_processed, batch_admitted = admit_pending(activity_id, batch_size)
+            processed += batch_processed
+            admitted += batch_admitted
+
+    # Cupos liberados sin pasar por Enrollment.cancel (admin, borrados directos)
+    waiting_ids = (
+        EnrollmentRequest.objects.filter(status=EnrollmentRequestStatus.WAITLISTED)
+        .order_by("activity_id")
+        .values_list("activity_id", flat=True)
+        .distinct()
+    )
+    for activity_id in list(waiting_ids):
+        admitted += promote_waitlist(activity_id)
+    return processed, admitted
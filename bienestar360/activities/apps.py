@@ -4,4 +4,12 @@ from django.apps import AppConfig
 class ActivitiesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'activities'
-    
\ No newline at end of file
+    
+    def ready(self):
+        from django.db.models.signals import post_save, post_delete
+        from .models import Enrollment
+        from . import signals
+
+        # Contador desnormalizado Activity.enrolled_count
+        post_save.connect(signals.enrollment_created, sender=Enrollment)
+        post_delete.connect(signals.enrollment_deleted, sender=Enrollment)
@@ -0,0 +1,35 @@
+"""
+Mantenimiento del contador desnormalizado `Activity.enrolled_count`.
+
+Las señales de `activities.signals` lo actualizan con expresiones F() al crear
+o borrar inscripciones; lo que no pasa por el ORM (bulk_create, SQL directo,
+cargas masivas) se corrige con `python manage.py reconcile_enrollment_counts`.
+"""
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Activity, Enrollment
+
+
+def reconcile_enrollment_counts(activity_ids=None):
+    """
+    Recalcula `Activity.enrolled_count` desde las inscripciones, solo en las
+    actividades cuyo valor no coincide. Devuelve cuántas corrigió.
+    """
+    actual = Coalesce(
+        Subquery(
+            Enrollment.objects.filter(activity=OuterRef("pk"))
+            .order_by()
+            .values("activity")
+            .annotate(total=Count("pk"))
+            .values("total")
+        ),
+        0,
+    )
+    activities = Activity.objects.all()
+    if activity_ids is not None:
+        activities = activities.filter(pk__in=activity_ids)
+    drifted = list(activities.annotate(actual=actual).exclude(enrolled_count=F("actual")).values_list("pk", flat=True))
+    if drifted:
+        Activity.objects.filter(pk__in=drifted).update(enrolled_count=actual)
+    return len(drifted)
@@ -0,0 +1,34 @@
+"""
+Correos de las inscripciones a actividades. No se envían aquí: se guardan en
+la tabla de salida (`activities.outbox`) y los envía `deliver_outbox`.
+"""
+from urllib.parse import urljoin
+
+from django.core.signing import dumps
+from django.template.loader import render_to_string
+from django.urls import reverse
+
+from .outbox import enqueue_email
+
+
+def queue_enrollment_confirmation(enrollment, site_url):
+    """
+    Encola el correo con el enlace para confirmar la asistencia. `site_url`
+    es la raíz absoluta del sitio (de la petición o de settings.SITE_URL en
+    los comandos). Llamarla dentro de la transacción de la inscripción: si
+    esta se revierte, el correo tampoco sale.
+    """
+    if not enrollment.user.email:
+        return None
+
+    # token with the minimum info to confirm
+    token = dumps({"enrollment_id": enrollment.id, "user_id": enrollment.user_id})
+    confirm_url = urljoin(site_url, reverse("confirm_enrollment", args=[token]))
+
+    subject = f"Confirma tu asistencia a {enrollment.activity.name}"
+    message = render_to_string("activities/confirm_enrollment_email.txt", {
+        "user": enrollment.user,
+        "activity": enrollment.activity,
+        "confirm_url": confirm_url,
+    })
+    return enqueue_email(subject, message, [enrollment.user.email])
@@ -0,0 +1,46 @@
+"""
+Exportaciones de la segmentación de participación, compartidas por las
+descargas directas y por los trabajos en segundo plano de reportsAndStats.
+"""
+from openpyxl.styles import Font, PatternFill
+
+from reportsAndStats.exports import XlsxExport, write_csv
+
+
+SEGMENTATION_HEADERS = ["Periodo", "Actividad", "Tipo", "Día", "Horario", "Total de Participantes"]
+
+
+def segmentation_rows(activity_type=None):
+    # Import diferido: views importa este módulo
+    from .views import _get_segmentation_data
+
+    for row_data in _get_segmentation_data(activity_type):
+        yield [
+            row_data["period"],
+            row_data["activity_name"],
+            row_data["activity_type"],
+            row_data["day"],
+            row_data["schedule"],
+            row_data["total_participants"],
+        ]
+
+
+def segmentation_xlsx(activity_type=None):
+    export = XlsxExport(
+        "Segmentación de Participación",
+        SEGMENTATION_HEADERS,
+        header_fill=PatternFill(start_color="366092", end_color="366092", fill_type="solid"),
+        header_font=Font(bold=True, color="FFFFFF"),
+    )
+    export.extend(segmentation_rows(activity_type))
+    return export
+
+
+def export_segmentation_csv(params, output):
+    write_csv(output, SEGMENTATION_HEADERS, segmentation_rows(params.get("activity_type")))
+    return "segmentacion_participacion.csv"
+
+
+def export_segmentation_xlsx(params, output):
+    segmentation_xlsx(params.get("activity_type")).save(output)
+    return "segmentacion_participacion.xlsx"
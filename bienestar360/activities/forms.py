@@ -24,6 +24,7 @@ class ActivityForm(forms.ModelForm):
             "is_published",
             "requires_registration",
             "max_capacity",
+            "queued_admission",
         ]
         widgets = {
             "name": forms.TextInput(attrs={"required": True}),
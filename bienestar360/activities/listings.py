@@ -0,0 +1,55 @@
+"""
+Consulta compartida de los listados de actividades publicadas (vista de
+estudiantes, lista por tipo de inscripción y listado del CADI).
+
+`listing_queryset()` aplica los filtros del formulario y deja todo lo que las
+plantillas usan por fila ya resuelto: horarios precargados, cupo lleno
+(`is_full`) e inscripción del usuario actual (`is_enrolled`). La cantidad de
+inscritos es la columna `Activity.enrolled_count`. Un listado cuesta así la
+misma cantidad de consultas con cualquier tamaño de catálogo.
+"""
+from django.db.models import BooleanField, Case, Exists, F, OuterRef, Value, When
+
+from .models import Activity, Enrollment, Schedule
+
+
+def listing_queryset(params=None, user=None):
+    """
+    Actividades publicadas filtradas por `params` (`type`, `location` y
+    `time`, como en el formulario de los listados). `is_enrolled` solo es
+    verdadero para un `user` autenticado inscrito en la actividad.
+    """
+    params = params or {}
+    queryset = Activity.objects.filter(is_published=True)
+
+    selected_type = params.get("type")
+    selected_location = params.get("location")
+    selected_time = params.get("time")
+    if selected_type:
+        queryset = queryset.filter(type=selected_type)
+    if selected_location:
+        queryset = queryset.filter(location__icontains=selected_location)
+    if selected_time:
+        # Algún horario que contenga la hora (Exists evita el JOIN + DISTINCT)
+        queryset = queryset.filter(Exists(Schedule.objects.filter(
+            activity=OuterRef("pk"), start_time__lte=selected_time, end_time__gte=selected_time,
+        )))
+
+    if user is not None and user.is_authenticated:
+        is_enrolled = Exists(Enrollment.objects.filter(activity=OuterRef("pk"), user=user))
+    else:
+        is_enrolled = Value(False)
+
+    return (
+        queryset
+        .annotate(
+            # Misma regla que Activity.is_full_status
+            is_full=Case(
+                When(requires_registration=True, max_capacity__gt=0, enrolled_count__gte=F("max_capacity"), then=True),
+                default=False,
+                output_field=BooleanField(),
+            ),
+            is_enrolled=is_enrolled,
+        )
+        .prefetch_related("schedules")
+    )
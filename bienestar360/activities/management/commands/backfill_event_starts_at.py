@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from activities.models import Activity, parse_event_start
+
+
+class Command(BaseCommand):
+    help = (
+        "Llena Activity.event_starts_at leyendo una vez el 'FECHA:YYYY-MM-DD HH:MM' de las "
+        "descripciones existentes (solo escribe las actividades cuyo valor cambia)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="Actividades por UPDATE")
+
+    def handle(self, *args, **options):
+        changed = []
+        activities = Activity.objects.only("pk", "description", "event_starts_at").order_by("pk")
+        for activity in activities.iterator(chunk_size=options["batch_size"]):
+            starts_at = parse_event_start(activity.description)
+            if starts_at != activity.event_starts_at:
+                activity.event_starts_at = starts_at
+                changed.append(activity)
+        # bulk_update no pasa por Activity.save, que volvería a calcular el campo
+        Activity.objects.bulk_update(changed, ["event_starts_at"], batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Actividades actualizadas: {len(changed)}"))
@@ -0,0 +1,67 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from activities.outbox import OUTBOX_BATCH_SIZE, deliver_batch, requeue_stale
+
+
+class Command(BaseCommand):
+    help = (
+        "Envía los correos de la tabla de salida (OutboxEmail) por lotes sobre una sola conexión "
+        "SMTP, con reintentos y descarte tras EMAIL_OUTBOX_MAX_ATTEMPTS fallos"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=OUTBOX_BATCH_SIZE,
+            help="Correos enviados por conexión",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=5.0,
+            help="Segundos de espera cuando no hay correos pendientes",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Envía los correos pendientes y termina",
+        )
+        parser.add_argument(
+            "--stale-minutes",
+            type=int,
+            default=15,
+            help="Minutos tras los cuales un lote en envío se considera abandonado y se reencola",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size debe ser mayor que 0")
+        requeued = requeue_stale(timedelta(minutes=options["stale_minutes"]))
+        if requeued:
+            self.stdout.write(f"Correos reencolados: {requeued}")
+
+        sent = retried = dead = 0
+        try:
+            while True:
+                batch_sent, batch_retried, batch_dead = deliver_batch(options["batch_size"])
+                if not (batch_sent or batch_retried or batch_dead):
+                    if options["once"]:
+                        break
+                    time.sleep(options["poll_interval"])
+                    continue
+                self.stdout.write(
+                    f"Lote: {batch_sent} enviados, {batch_retried} para reintentar, {batch_dead} descartados"
+                )
+                sent += batch_sent
+                retried += batch_retried
+                dead += batch_dead
+        except KeyboardInterrupt:
+            self.stdout.write("Worker detenido.")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Correos enviados: {sent}, para reintentar: {retried}, descartados: {dead}"
+        ))
@@ -0,0 +1,439 @@
+import random
+from contextlib import contextmanager
+from datetime import date, datetime, time, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, pre_delete
+from django.utils import timezone
+
+from activities.counters import reconcile_enrollment_counts
+from activities.models import (
+    Activity, ActivityReview, ActivityType, CategoryType, Enrollment, Participation, Schedule, WeekDay,
+)
+from login.models import CustomUser, Faculty
+from login.roles import invalidate_admin_users
+from reportsAndStats.delta import record_deletions
+from reportsAndStats.facts import rebuild_facts
+from reportsAndStats.report_cache import bump_data_version
+from social_projects.models import SocialEvent, SocialEventEnrollment, SocialProject
+from tournaments.models import (
+    Participant, Schedule as TournamentSchedule, Team, Tournament, TournamentGame,
+)
+
+
+# Todo lo generado lleva este prefijo, así --clear no toca datos reales
+PREFIX = "scale"
+PASSWORD = "test1234"
+
+# Cantidades por unidad de --scale (--scale 30 ≈ 30k estudiantes y ~600k asistencias)
+PER_SCALE = {
+    "students": 1000,
+    "activities": 20,
+    "tournaments": 2,
+    "social_events": 6,
+}
+
+FACULTIES = [
+    "Ingeniería", "Ciencias Económicas", "Derecho", "Medicina", "Psicología",
+    "Ciencias Sociales", "Ciencias Naturales", "Comunicación", "Diseño", "Educación",
+]
+GENDERS = (["M", "F", "O"], [48, 48, 4])
+ACTIVITY_TYPES = ([choice for choice, _ in ActivityType.choices], [55, 30, 15])
+CATEGORIES = ([choice for choice, _ in CategoryType.choices], [70, 30])
+DAYS = [choice for choice, _ in WeekDay.choices]
+# Lunes = 0, como date.weekday()
+WEEKDAY_INDEX = {day: index for index, day in enumerate(DAYS)}
+SPORTS = ["Fútbol", "Baloncesto", "Voleibol", "Ajedrez", "Tenis de mesa"]
+# Calificaciones sesgadas hacia 4 y 5, como las reseñas reales
+RATINGS = ([1, 2, 3, 4, 5], [3, 5, 15, 37, 40])
+
+
+@contextmanager
+def explicit_timestamps(*fields):
+    """Permite fijar fechas históricas en campos auto_now_add durante bulk_create."""
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+@contextmanager
+def muted_delete_signals():
+    """
+    Desconecta los receptores de pre_delete/post_delete mientras se borran los
+    datos generados. Sin receptores Django borra en cascada con DELETE por
+    lotes en vez de fila por fila y no recalcula el rollup por cada fila. Lo
+    que hacían los receptores se hace una sola vez: las lápidas de la
+    exportación incremental en bloque antes de borrar, y contadores y rollup
+    al final.
+    """
+    saved = [(signal, signal.receivers) for signal in (pre_delete, post_delete)]
+    for signal, _ in saved:
+        signal.receivers = []
+        signal.sender_receivers_cache.clear()
+    try:
+        yield
+    finally:
+        for signal, receivers in saved:
+            signal.receivers = receivers
+            signal.sender_receivers_cache.clear()
+
+
+def semester_ranges(until, count):
+    """Los `count` semestres (inicio, fin) que terminan en el semestre de `until`, del más viejo al más nuevo."""
+    year, half = until.year, 1 if until.month <= 6 else 2
+    ranges = []
+    for _ in range(count):
+        if half == 1:
+            ranges.append((date(year, 1, 20), date(year, 6, 10)))
+            year, half = year - 1, 2
+        else:
+            ranges.append((date(year, 7, 25), date(year, 11, 30)))
+            half = 1
+    return ranges[::-1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera un conjunto de datos sintético y reproducible para pruebas de carga "
+        "(usuarios, actividades, inscripciones, asistencias, reseñas, torneos y eventos sociales)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scale",
+            type=float,
+            default=1,
+            help=f"Multiplicador de volumen: cada unidad son {PER_SCALE['students']} estudiantes (acepta decimales)",
+        )
+        parser.add_argument("--seed", type=int, default=360, help="Semilla aleatoria (misma semilla, mismos datos)")
+        parser.add_argument("--batch-size", type=int, default=5000, help="Filas por bulk_create")
+        parser.add_argument("--semesters", type=int, default=6, help="Semestres de historia a generar")
+        parser.add_argument(
+            "--until",
+            type=date.fromisoformat,
+            default=date(2025, 12, 31),
+            help="Fecha (AAAA-MM-DD) del último semestre; fija para que las corridas sean comparables",
+        )
+        parser.add_argument("--clear", action="store_true", help="Elimina antes los datos generados por este comando")
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.semesters = semester_ranges(options["until"], options["semesters"])
+        counts = {key: max(1, round(value * options["scale"])) for key, value in PER_SCALE.items()}
+
+        if options["clear"]:
+            self.clear()
+        elif CustomUser.objects.filter(username__startswith=f"{PREFIX}_").exists():
+            raise CommandError("Ya existen datos generados; use --clear para reemplazarlos.")
+
+        with transaction.atomic():
+            faculties = self.create_faculties()
+            students = self.create_students(counts["students"], faculties)
+            activities = self.create_activities(counts["activities"])
+            schedules = self.create_schedules(activities)
+            enrollments = self.create_enrollments(students, activities, schedules)
+            # bulk_create no pasa por las señales que mantienen enrolled_count
+            reconcile_enrollment_counts([activity.pk for activity in activities])
+            self.create_participations(enrollments)
+            self.create_reviews(enrollments)
+            self.create_tournaments(counts["tournaments"])
+            self.create_social_events(counts["social_events"], students)
+
+        # bulk_create no envía señales: el rollup se reconstruye (y con él se
+        # invalidan los reportes en caché)
+        self.stdout.write(f"  ParticipationFact: {rebuild_facts()}")
+        self.stdout.write(self.style.SUCCESS("Datos generados."))
+
+    # ------------------------------------------------------------------
+    # Utilidades
+    # ------------------------------------------------------------------
+    def bulk_create(self, model, objects):
+        """Inserta en lotes de --batch-size y devuelve los objetos con su pk."""
+        created = []
+        for start in range(0, len(objects), self.batch_size):
+            created.extend(model.objects.bulk_create(objects[start:start + self.batch_size]))
+        self.stdout.write(f"  {model.__name__}: {len(created)}")
+        return created
+
+    def random_datetime(self, start, end):
+        day = start + timedelta(days=self.rng.randrange((end - start).days + 1))
+        moment = datetime.combine(day, time(self.rng.randrange(7, 20), self.rng.randrange(60)))
+        return timezone.make_aware(moment)
+
+    def clear(self):
+        generated = Q(user__username__startswith=f"{PREFIX}_") | Q(activity__name__startswith=f"[{PREFIX}]")
+        with transaction.atomic(), muted_delete_signals():
+            record_deletions(Enrollment.objects.filter(generated))
+            record_deletions(Participation.objects.filter(generated))
+            CustomUser.objects.filter(username__startswith=f"{PREFIX}_").delete()
+            Activity.objects.filter(name__startswith=f"[{PREFIX}]").delete()
+            Tournament.objects.filter(name__startswith=f"[{PREFIX}]").delete()
+            TournamentSchedule.objects.filter(space__startswith=f"[{PREFIX}]").delete()
+            SocialProject.objects.filter(name__startswith=f"[{PREFIX}]").delete()
+            # Lo que hacían las señales silenciadas, una sola vez
+            reconcile_enrollment_counts()
+        invalidate_admin_users()
+        bump_data_version()
+        self.stdout.write("Datos generados anteriormente eliminados.")
+
+    # ------------------------------------------------------------------
+    # Generadores
+    # ------------------------------------------------------------------
+    def create_faculties(self):
+        Faculty.objects.bulk_create([Faculty(name=name) for name in FACULTIES], ignore_conflicts=True)
+        faculties = list(Faculty.objects.filter(name__in=FACULTIES).order_by("name"))
+        # Pocas facultades concentran la mayoría de los estudiantes
+        weights = [1 / (rank + 1) for rank in range(len(faculties))]
+        return faculties, weights
+
+    def create_students(self, count, faculties):
+        faculties, weights = faculties
+        # Un solo hash: calcularlo por usuario dominaría el tiempo total
+        password = make_password(PASSWORD)
+        genders = self.rng.choices(*GENDERS, k=count)
+        students = [
+            CustomUser(
+                username=f"{PREFIX}_{index:06d}",
+                first_name=f"Estudiante {index}",
+                last_name="Escala",
+                email=f"{PREFIX}_{index:06d}@example.com",
+                identification=str(1_000_000_000 + index),
+                gender=genders[index],
+                # Algunos usuarios no tienen facultad asignada
+                faculty=self.rng.choices(faculties, weights)[0] if self.rng.random() < 0.95 else None,
+                password=password,
+            )
+            for index in range(count)
+        ]
+        return self.bulk_create(CustomUser, students)
+
+    def create_activities(self, count):
+        activities = []
+        for index in range(count):
+            requires_registration = self.rng.random() < 0.6
+            activities.append(Activity(
+                name=f"[{PREFIX}] Actividad {index}",
+                type=self.rng.choices(*ACTIVITY_TYPES)[0],
+                category=self.rng.choices(*CATEGORIES)[0],
+                location=f"Bloque {self.rng.randrange(1, 10)}",
+                is_published=self.rng.random() < 0.9,
+                requires_registration=requires_registration,
+                max_capacity=self.rng.choice([20, 30, 40, 60]) if requires_registration else None,
+            ))
+        return self.bulk_create(Activity, activities)
+
+    def create_schedules(self, activities):
+        schedules = []
+        for activity in activities:
+            for day in self.rng.sample(DAYS, self.rng.randint(1, 3)):
+                start = self.rng.randrange(7, 18)
+                schedules.append(Schedule(
+                    activity=activity, day=day, start_time=time(start), end_time=time(start + 2),
+                ))
+        schedules = self.bulk_create(Schedule, schedules)
+        by_activity = {}
+        for schedule in schedules:
+            by_activity.setdefault(schedule.activity_id, []).append(schedule)
+        return by_activity
+
+    def create_enrollments(self, students, activities, schedules):
+        # Popularidad tipo Zipf: unas pocas actividades reúnen la mayoría de inscritos
+        popularity = [1 / (rank + 1) ** 0.8 for rank in range(len(activities))]
+        enrollments = []
+        for student in students:
+            # ~30% de los estudiantes nunca se inscribe
+            if self.rng.random() < 0.3:
+                continue
+            wanted = min(len(activities), 1 + int(self.rng.expovariate(1 / 2)))
+            chosen = set()
+            while len(chosen) < wanted:
+                chosen.add(self.rng.choices(range(len(activities)), popularity)[0])
+            for index in chosen:
+                activity = activities[index]
+                start, end = self.rng.choice(self.semesters)
+                registered_at = self.random_datetime(start, start + timedelta(days=20))
+                confirmed = self.rng.random() < 0.8
+                enrollments.append(Enrollment(
+                    user=student,
+                    activity=activity,
+                    schedule=self.rng.choice(schedules[activity.pk]),
+                    registered_at=registered_at,
+                    confirmed=confirmed,
+                    confirmed_at=registered_at + timedelta(days=1) if confirmed else None,
+                ))
+        with explicit_timestamps(Enrollment._meta.get_field("registered_at")):
+            return self.bulk_create(Enrollment, enrollments)
+
+    def create_participations(self, enrollments):
+        semester_end = {start: end for start, end in self.semesters}
+        participations = []
+        for enrollment in enrollments:
+            first_day = timezone.localdate(enrollment.registered_at)
+            end = semester_end[max(start for start in semester_end if start <= first_day)]
+            # Sesiones: el día del horario, desde la inscripción hasta el fin del semestre
+            offset = (WEEKDAY_INDEX[enrollment.schedule.day] - first_day.weekday()) % 7
+            sessions = []
+            day = first_day + timedelta(days=offset)
+            while day <= end:
+                sessions.append(day)
+                day += timedelta(days=7)
+            # Los confirmados asisten a buena parte de las sesiones; el resto, a pocas
+            share = self.rng.betavariate(4, 2) if enrollment.confirmed else self.rng.betavariate(1, 4)
+            for attendance_date in self.rng.sample(sessions, round(share * len(sessions))):
+                participations.append(Participation(
+                    user=enrollment.user,
+                    activity=enrollment.activity,
+                    schedule=enrollment.schedule,
+                    attendance_date=attendance_date,
+                    attendance_time=enrollment.schedule.start_time,
+                    date_registered=timezone.make_aware(datetime.combine(attendance_date, enrollment.schedule.start_time)),
+                ))
+            if len(participations) >= self.batch_size:
+                self._flush_participations(participations)
+                participations = []
+        self._flush_participations(participations, last=True)
+
+    def _flush_participations(self, participations, last=False):
+        # Las asistencias se insertan a medida que se generan para no tener millones en memoria
+        with explicit_timestamps(Participation._meta.get_field("date_registered")):
+            Participation.objects.bulk_create(participations, batch_size=self.batch_size)
+        self._participations = getattr(self, "_participations", 0) + len(participations)
+        if last:
+            self.stdout.write(f"  Participation: {self._participations}")
+
+    def create_reviews(self, enrollments):
+        reviewed = set()
+        reviews = []
+        for enrollment in enrollments:
+            key = (enrollment.user_id, enrollment.activity_id)
+            if key in reviewed or self.rng.random() >= 0.1:
+                continue
+            reviewed.add(key)
+            reviews.append(ActivityReview(
+                user=enrollment.user,
+                activity=enrollment.activity,
+                rating=self.rng.choices(*RATINGS)[0],
+                comment=self.rng.choice([None, "Muy buena actividad", "Podría mejorar el horario"]),
+                created_at=enrollment.registered_at + timedelta(days=self.rng.randint(7, 90)),
+                is_read=self.rng.random() < 0.5,
+            ))
+        with explicit_timestamps(ActivityReview._meta.get_field("created_at")):
+            return self.bulk_create(ActivityReview, reviews)
+
+    def create_tournaments(self, count):
+        tournaments = []
+        for index in range(count):
+            start, _ = self.rng.choice(self.semesters)
+            max_participants = self.rng.choice([8, 16, 32])
+            tournaments.append(Tournament(
+                name=f"[{PREFIX}] Torneo {index}",
+                sport=self.rng.choice(SPORTS),
+                gender=self.rng.choice(["M", "F", "X"]),
+                modality=self.rng.choice(["E", "E", "I"]),
+                start_date=start + timedelta(days=30),
+                max_participants=max_participants,
+                current_participants=max_participants,
+                status="F",
+            ))
+        tournaments = self.bulk_create(Tournament, tournaments)
+
+        teams = [
+            Team(name=f"Equipo {index}", members="", tournament=tournament)
+            for tournament in tournaments if tournament.modality != "I"
+            for index in range(tournament.max_participants)
+        ]
+        teams = self.bulk_create(Team, teams)
+        teams_by_tournament = {}
+        for team in teams:
+            teams_by_tournament.setdefault(team.tournament_id, []).append(team)
+
+        participants = [
+            Participant(
+                name=f"Jugador {index}",
+                tournament=tournament,
+                points=self.rng.randrange(30),
+                goals_scored=self.rng.randrange(40),
+                goals_conceded=self.rng.randrange(40),
+            )
+            for tournament in tournaments if tournament.modality == "I"
+            for index in range(tournament.max_participants)
+        ]
+        participants = self.bulk_create(Participant, participants)
+        players_by_tournament = {}
+        for participant in participants:
+            players_by_tournament.setdefault(participant.tournament_id, []).append(participant)
+
+        schedules, games = [], []
+        for tournament in tournaments:
+            sides = teams_by_tournament.get(tournament.pk) or players_by_tournament.get(tournament.pk, [])
+            # Eliminación directa: una ronda por semana hasta la final
+            for round_number, pairs in enumerate(self._bracket(sides)):
+                for home, guest in pairs:
+                    schedule = TournamentSchedule(
+                        date=tournament.start_date + timedelta(days=7 * round_number),
+                        start_time=time(self.rng.randrange(8, 18)),
+                        end_time=time(19),
+                        capacity=1,
+                        space=f"[{PREFIX}] Cancha {self.rng.randrange(1, 5)}",
+                    )
+                    schedules.append(schedule)
+                    side = "team" if tournament.modality != "I" else "player"
+                    games.append(TournamentGame(
+                        tournament=tournament,
+                        schedule=schedule,
+                        homeScore=self.rng.randrange(6),
+                        guestScore=self.rng.randrange(6),
+                        played=True,
+                        **{f"home_{side}": home, f"guest_{side}": guest},
+                    ))
+        # bulk_create toma el pk que reciben los horarios al insertarse
+        self.bulk_create(TournamentSchedule, schedules)
+        self.bulk_create(TournamentGame, games)
+
+    def _bracket(self, sides):
+        sides = list(sides)
+        self.rng.shuffle(sides)
+        while len(sides) > 1:
+            pairs = list(zip(sides[::2], sides[1::2]))
+            yield pairs
+            sides = [self.rng.choice(pair) for pair in pairs]
+
+    def create_social_events(self, count, students):
+        projects = self.bulk_create(SocialProject, [
+            SocialProject(name=f"[{PREFIX}] Proyecto social {index}", description="Proyecto generado")
+            for index in range(max(1, count // 3))
+        ])
+        events = []
+        for index in range(count):
+            start, end = self.rng.choice(self.semesters)
+            events.append(SocialEvent(
+                project=self.rng.choice(projects),
+                name=f"Evento {index}",
+                description="Evento generado",
+                location=f"Bloque {self.rng.randrange(1, 10)}",
+                event_date=start + timedelta(days=self.rng.randrange((end - start).days + 1)),
+            ))
+        events = self.bulk_create(SocialEvent, events)
+
+        enrollments = []
+        for event in events:
+            attendees = self.rng.sample(students, min(len(students), self.rng.randint(10, 80)))
+            enrolled_at = timezone.make_aware(datetime.combine(event.event_date - timedelta(days=3), time(10)))
+            enrollments.extend(
+                SocialEventEnrollment(
+                    user=user, event=event, enrolled_at=enrolled_at,
+                    confirmed=True, confirmed_at=enrolled_at,
+                )
+                for user in attendees
+            )
+        fields = [SocialEventEnrollment._meta.get_field(name) for name in ("enrolled_at", "confirmed_at")]
+        with explicit_timestamps(*fields):
+            self.bulk_create(SocialEventEnrollment, enrollments)
@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from activities.admission import ADMISSION_BATCH_SIZE, process_queue
+
+
+class Command(BaseCommand):
+    help = (
+        "Admite en orden de llegada las solicitudes de inscripción en cola (actividades con "
+        "inscripción por cola) y pasa el exceso a lista de espera"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=ADMISSION_BATCH_SIZE,
+            help="Solicitudes admitidas por transacción y actividad",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Segundos de espera cuando la cola está vacía",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Procesa las solicitudes pendientes y termina",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size debe ser mayor que 0")
+
+        processed = admitted = 0
+        try:
+            while True:
+                batch_processed, batch_admitted = process_queue(options["batch_size"])
+                if batch_processed or batch_admitted:
+                    self.stdout.write(f"Solicitudes procesadas: {batch_processed} (admitidas: {batch_admitted})")
+                processed += batch_processed
+                admitted += batch_admitted
+                if options["once"]:
+                    break
+                if not batch_processed:
+                    time.sleep(options["poll_interval"])
+        except KeyboardInterrupt:
+            self.stdout.write("Worker detenido.")
+
+        self.stdout.write(self.style.SUCCESS(f"Solicitudes procesadas: {processed}, inscripciones admitidas: {admitted}"))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from activities.counters import reconcile_enrollment_counts
+
+
+class Command(BaseCommand):
+    help = "Recalcula el contador de inscripciones de cada actividad desde la tabla de inscripciones"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--activity", type=int, action="append", help="Solo estas actividades (repetible)")
+
+    def handle(self, *args, **options):
+        corrected = reconcile_enrollment_counts(options["activity"])
+        self.stdout.write(self.style.SUCCESS(f"Actividades corregidas: {corrected}"))
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:32
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_updated_at(apps, schema_editor):
+    """Las filas existentes toman su fecha de creación, no la de la migración."""
+    Enrollment = apps.get_model("activities", "Enrollment")
+    Participation = apps.get_model("activities", "Participation")
+    Enrollment.objects.update(updated_at=F("registered_at"))
+    Participation.objects.update(updated_at=F("date_registered"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='enrollment',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='participation',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['updated_at', 'id'], name='activities__updated_5dd8cc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='participation',
+            index=models.Index(fields=['updated_at', 'id'], name='activities__updated_5a95e6_idx'),
+        ),
+    ]
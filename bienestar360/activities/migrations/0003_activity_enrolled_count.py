@@ -0,0 +1,37 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:45
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_enrolled_count(apps, schema_editor):
+    """Carga inicial del contador con las inscripciones existentes."""
+    Activity = apps.get_model("activities", "Activity")
+    Enrollment = apps.get_model("activities", "Enrollment")
+    Activity.objects.update(enrolled_count=Coalesce(
+        Subquery(
+            Enrollment.objects.filter(activity=OuterRef("pk"))
+            .order_by()
+            .values("activity")
+            .annotate(total=Count("pk"))
+            .values("total")
+        ),
+        0,
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0002_enrollment_participation_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='activity',
+            name='enrolled_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_enrolled_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0003_activity_enrolled_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='activity',
+            name='queued_admission',
+            field=models.BooleanField(default=False, help_text='Las solicitudes se admiten en orden de llegada y el exceso pasa a lista de espera.', verbose_name='Inscripción por cola'),
+        ),
+        migrations.CreateModel(
+            name='EnrollmentRequest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'En cola'), ('admitted', 'Admitida'), ('waitlisted', 'En lista de espera'), ('cancelled', 'Cancelada')], default='pending', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('activity', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='enrollment_requests', to='activities.activity')),
+                ('enrollment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='activities.enrollment')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='enrollment_requests', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Solicitud de inscripción',
+                'verbose_name_plural': 'Solicitudes de inscripción',
+                'ordering': ['pk'],
+                'indexes': [models.Index(fields=['activity', 'status', 'id'], name='activities__activit_0250a9_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status__in', ['pending', 'waitlisted'])), fields=('user', 'activity'), name='unique_open_enrollment_request')],
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:10
+
+import re
+from datetime import datetime
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+# Copia de activities.models.EVENT_DATE_RE: la migración no depende del código actual
+EVENT_DATE_RE = re.compile(r'FECHA:(\d{4}-\d{2}-\d{2})(?:\s+(\d{2}:\d{2}))?')
+
+
+def populate_event_starts_at(apps, schema_editor):
+    """Carga inicial del inicio de los eventos desde las descripciones existentes."""
+    Activity = apps.get_model("activities", "Activity")
+    changed = []
+    for activity in Activity.objects.only("pk", "description").order_by("pk").iterator(chunk_size=500):
+        match = EVENT_DATE_RE.search(activity.description or "")
+        if not match:
+            continue
+        try:
+            start = datetime.strptime(f"{match.group(1)} {match.group(2) or '00:00'}", "%Y-%m-%d %H:%M")
+        except ValueError:
+            continue
+        activity.event_starts_at = timezone.make_aware(start) if settings.USE_TZ else start
+        changed.append(activity)
+    Activity.objects.bulk_update(changed, ["event_starts_at"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0005_outboxemail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='activity',
+            name='event_starts_at',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.RunPython(populate_event_starts_at, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,8 @@
-from django.db import models
+import re
+from datetime import datetime
+
+from django.db import models, transaction
+from django.utils import timezone
 from django.utils.timezone import now
 from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
@@ -33,6 +37,30 @@ class WeekDay(models.TextChoices):
 # MODELO PRINCIPAL: ACTIVIDAD
 # ==============================================================
 
+class ActivityFull(Exception):
+    """La actividad no tiene cupos disponibles."""
+
+
+# Fecha de los eventos dentro de la descripción: "FECHA:YYYY-MM-DD HH:MM" (la hora es opcional)
+EVENT_DATE_RE = re.compile(r'FECHA:(\d{4}-\d{2}-\d{2})(?:\s+(\d{2}:\d{2}))?')
+
+
+def parse_event_start(description):
+    """
+    Inicio del evento escrito como FECHA:YYYY-MM-DD HH:MM en la descripción,
+    en la zona horaria del sitio; None si no hay fecha válida. Sin hora se
+    toma la medianoche.
+    """
+    match = EVENT_DATE_RE.search(description or "")
+    if not match:
+        return None
+    try:
+        start = datetime.strptime(f"{match.group(1)} {match.group(2) or '00:00'}", "%Y-%m-%d %H:%M")
+    except ValueError:
+        return None
+    return timezone.make_aware(start) if settings.USE_TZ else start
+
+
 class Activity(models.Model):
     """
     Representa una actividad publicada o administrada dentro del sistema.
@@ -46,6 +74,18 @@ class Activity(models.Model):
     is_published = models.BooleanField(default=False)
     requires_registration = models.BooleanField(default=False)
     max_capacity = models.PositiveIntegerField(null=True, blank=True)
+    # Cantidad de inscripciones, mantenida por activities.signals (ver reconcile_enrollment_counts)
+    enrolled_count = models.PositiveIntegerField(default=0, editable=False)
+    # Aperturas con mucha demanda: las inscripciones pasan por la cola de activities.admission
+    queued_admission = models.BooleanField(
+        "Inscripción por cola",
+        default=False,
+        help_text="Las solicitudes se admiten en orden de llegada y el exceso pasa a lista de espera.",
+    )
+    # Inicio del evento tomado de "FECHA:..." en la descripción al guardar
+    # (la migración 0006 carga los datos anteriores; backfill_event_starts_at, los
+    # cambiados con update() o escrituras masivas)
+    event_starts_at = models.DateTimeField(null=True, blank=True, editable=False, db_index=True)
 
     participants = models.ManyToManyField(
         CustomUser,
@@ -56,6 +96,30 @@ class Activity(models.Model):
     def __str__(self):
         return f"{self.name} ({self.type}, {self.category})"
 
+    def save(self, *args, **kwargs):
+        self.event_starts_at = parse_event_start(self.description)
+        update_fields = kwargs.get("update_fields")
+        if (
+            update_fields is None
+            and not self._state.adding
+            and not kwargs.get("force_insert")
+            and self._row_exists(kwargs.get("using"))
+        ):
+            # enrolled_count lo mantienen las señales con UPDATE ... F(): el valor
+            # de esta instancia puede estar desactualizado y no se escribe. Si la
+            # fila ya no existe se guarda completa y Django la vuelve a insertar
+            deferred = self.get_deferred_fields()
+            update_fields = kwargs["update_fields"] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in deferred and field.name != "enrolled_count"
+            ]
+        if update_fields is not None and "description" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "event_starts_at"}
+        super().save(*args, **kwargs)
+
+    def _row_exists(self, using=None):
+        return Activity._base_manager.using(using or self._state.db).filter(pk=self.pk).exists()
+
     # ----------------------------------------------------------
     # Propiedades útiles
     # ----------------------------------------------------------
@@ -71,8 +135,8 @@ class Activity(models.Model):
 
     @property
     def current_registrations_count(self):
-        """Devuelve el número actual de inscripciones."""
-        return self.enrollments.count()
+        """Devuelve el número actual de inscripciones (sin consultar la base)."""
+        return self.enrolled_count
 
     @property
     def is_full_status(self):
@@ -81,6 +145,26 @@ class Activity(models.Model):
             return self.current_registrations_count >= self.max_capacity
         return False
 
+    def enroll(self, user, schedule=None):
+        """
+        Inscribe a `user` respetando el cupo y devuelve (inscripción, creada).
+        Lanza `ActivityFull` si no quedan cupos.
+
+        La fila de la actividad se bloquea (select_for_update) mientras se
+        revisa el cupo y se crea la inscripción, así dos inscripciones
+        simultáneas no pueden tomar el mismo último cupo.
+        """
+        with transaction.atomic():
+            activity = Activity.objects.select_for_update().get(pk=self.pk)
+            enrollment = Enrollment.objects.filter(user=user, activity=activity, schedule=schedule).first()
+            if enrollment is not None:
+                return enrollment, False
+            if activity.is_full_status:
+                raise ActivityFull(f"El cupo de {activity.name} está lleno")
+            enrollment = Enrollment.objects.create(user=user, activity=activity, schedule=schedule)
+        self.enrolled_count = activity.enrolled_count
+        return enrollment, True
+
 
 # ==============================================================
 # HORARIOS DE ACTIVIDADES
@@ -113,9 +197,12 @@ class Enrollment(models.Model):
     # To mark the confirmation status from the email
     confirmed = models.BooleanField(default=False)
     confirmed_at = models.DateTimeField(null=True, blank=True)
+    # Marca de agua de las exportaciones incrementales (reportsAndStats.delta)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ("user", "activity", "schedule")  # Allow multiple enrollments with different schedules
+        indexes = [models.Index(fields=["updated_at", "id"])]
 
     def __str__(self):
         return f"{self.user.username} en {self.activity.name}"
@@ -126,6 +213,111 @@ class Enrollment(models.Model):
         self.confirmed_at = now()
         self.save()
 
+    def cancel(self):
+        """
+        Elimina la inscripción con la fila de la actividad bloqueada, liberando
+        el cupo. En actividades con cola, el cupo pasa al primero en espera.
+        """
+        from .admission import promote_waitlist
+
+        with transaction.atomic():
+            activity = Activity.objects.select_for_update().filter(pk=self.activity_id).first()
+            self.delete()
+            if activity is not None and activity.queued_admission:
+                promote_waitlist(activity.pk)
+
+
+
+# ==============================================================
+# COLA DE INSCRIPCIONES
+# ==============================================================
+
+class EnrollmentRequestStatus(models.TextChoices):
+    PENDING = "pending", "En cola"
+    ADMITTED = "admitted", "Admitida"
+    WAITLISTED = "waitlisted", "En lista de espera"
+    CANCELLED = "cancelled", "Cancelada"
+
+
+class EnrollmentRequest(models.Model):
+    """
+    Solicitud de inscripción a una actividad con `queued_admission`. La vista
+    solo agrega la fila; `python manage.py process_enrollment_queue` la admite
+    en orden de llegada (pk) o la pasa a lista de espera.
+    """
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="enrollment_requests")
+    activity = models.ForeignKey(Activity, on_delete=models.CASCADE, related_name="enrollment_requests")
+    status = models.CharField(
+        max_length=10, choices=EnrollmentRequestStatus.choices, default=EnrollmentRequestStatus.PENDING
+    )
+    enrollment = models.ForeignKey(
+        Enrollment, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["pk"]
+        indexes = [models.Index(fields=["activity", "status", "id"])]
+        constraints = [
+            # Una sola solicitud abierta por usuario y actividad
+            models.UniqueConstraint(
+                fields=["user", "activity"],
+                condition=models.Q(status__in=["pending", "waitlisted"]),
+                name="unique_open_enrollment_request",
+            ),
+        ]
+        verbose_name = "Solicitud de inscripción"
+        verbose_name_plural = "Solicitudes de inscripción"
+
+    def __str__(self):
+        return f"{self.user.username} → {self.activity.name} ({self.get_status_display()})"
+
+
+# ==============================================================
+# CORREOS SALIENTES (OUTBOX)
+# ==============================================================
+
+class OutboxStatus(models.TextChoices):
+    PENDING = "pending", "Pendiente"
+    SENDING = "sending", "Enviando"
+    SENT = "sent", "Enviado"
+    DEAD = "dead", "Descartado"
+
+
+class OutboxEmail(models.Model):
+    """
+    Correo pendiente de envío. Se guarda en la misma transacción que el
+    cambio que lo origina (p. ej. la inscripción) y lo envía
+    `python manage.py deliver_outbox` por lotes sobre una sola conexión SMTP.
+    Tras `EMAIL_OUTBOX_MAX_ATTEMPTS` fallos queda descartado (DEAD).
+    """
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    to = models.JSONField(default=list)
+    status = models.CharField(max_length=10, choices=OutboxStatus.choices, default=OutboxStatus.PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # No se intenta enviar antes de esta fecha (espera entre reintentos)
+    next_attempt_at = models.DateTimeField(default=now)
+    # Worker que reclamó el lote y cuándo (para reencolar lotes abandonados)
+    claim_token = models.UUIDField(null=True, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["pk"]
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"]),
+            models.Index(fields=["claim_token"]),
+        ]
+        verbose_name = "Correo saliente"
+        verbose_name_plural = "Correos salientes"
+
+    def __str__(self):
+        return f"{self.subject} → {', '.join(self.to)} ({self.get_status_display()})"
 
 
 # ==============================================================
@@ -155,9 +347,12 @@ class Participation(models.Model):
     date_registered = models.DateTimeField(auto_now_add=True)
     attendance_date = models.DateField(null=True, blank=True)  # <-- nuevo
     attendance_time = models.TimeField(null=True, blank=True)  # <-- opcional
+    # Marca de agua de las exportaciones incrementales (reportsAndStats.delta)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ("user", "activity", "attendance_date")  # evita duplicados
+        indexes = [models.Index(fields=["updated_at", "id"])]
         verbose_name = "Participación"
         verbose_name_plural = "Participaciones"
 
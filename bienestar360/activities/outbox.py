@@ -0,0 +1,150 @@
+"""
+Envío diferido de correos a través de la tabla `OutboxEmail`.
+
+`enqueue_email()` solo inserta la fila, así el correo queda guardado (o se
+descarta) junto con la transacción de quien lo pide y la petición no espera
+al servidor SMTP. `deliver_outbox()` (comando `deliver_outbox`) reclama lotes
+de correos pendientes, los envía sobre una misma conexión del EMAIL_BACKEND y
+reprograma los fallidos con espera exponencial hasta descartarlos.
+
+La entrega es "al menos una vez": si el worker muere después de enviar y
+antes de marcar el lote, esos correos se reenvían al reencolarlo.
+"""
+import logging
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import F
+from django.utils import timezone
+
+from .models import OutboxEmail, OutboxStatus
+
+logger = logging.getLogger(__name__)
+
+
+# Correos reclamados y enviados por conexión
+OUTBOX_BATCH_SIZE = 50
+
+# Tope de la espera entre reintentos
+MAX_RETRY_DELAY = timedelta(hours=6)
+
+
+def default_from_email():
+    #There is a Default but it may not be set
+    return getattr(settings, "DEFAULT_FROM_EMAIL", None) or "no-reply@localhost"
+
+
+def enqueue_email(subject, body, to, from_email=None):
+    """Guarda un correo para enviarlo después; `to` es una lista de direcciones."""
+    return OutboxEmail.objects.create(
+        subject=subject,
+        body=body,
+        from_email=from_email or default_from_email(),
+        to=list(to),
+    )
+
+
+def retry_delay(attempts):
+    """Espera antes del siguiente intento: EMAIL_OUTBOX_RETRY_SECONDS duplicado en cada fallo."""
+    base = getattr(settings, "EMAIL_OUTBOX_RETRY_SECONDS", 60)
+    return min(timedelta(seconds=base * 2 ** (attempts - 1)), MAX_RETRY_DELAY)
+
+
+def claim_batch(limit=OUTBOX_BATCH_SIZE):
+    """
+    Marca como SENDING hasta `limit` correos pendientes y vencidos y los
+    devuelve. El UPDATE va condicionado al estado anterior y deja un token
+    propio, así dos workers nunca reclaman el mismo correo.
+    """
+    now = timezone.now()
+    candidates = list(
+        OutboxEmail.objects.filter(status=OutboxStatus.PENDING, next_attempt_at__lte=now)
+        .order_by("next_attempt_at", "pk")
+        .values_list("pk", flat=True)[:limit]
+    )
+    if not candidates:
+        return []
+    token = uuid.uuid4()
+    OutboxEmail.objects.filter(pk__in=candidates, status=OutboxStatus.PENDING).update(
+        status=OutboxStatus.SENDING, claim_token=token, claimed_at=now
+    )
+    return list(OutboxEmail.objects.filter(claim_token=token, status=OutboxStatus.SENDING))
+
+
+def requeue_stale(older_than):
+    """Devuelve a la cola los correos de lotes reclamados hace más de `older_than`."""
+    cutoff = timezone.now() - older_than
+    return OutboxEmail.objects.filter(status=OutboxStatus.SENDING, claimed_at__lt=cutoff).update(
+        status=OutboxStatus.PENDING, claim_token=None
+    )
+
+
+def _send_batch(emails):
+    """
+    Envía los correos por una sola conexión. Devuelve {pk: error} de los que
+    fallaron; un fallo no detiene el resto del lote.
+    """
+    failures = {}
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as exc:
+        return {email.pk: str(exc) or exc.__class__.__name__ for email in emails}
+    try:
+        for email in emails:
+            message = EmailMessage(email.subject, email.body, email.from_email, email.to, connection=connection)
+            try:
+                connection.send_messages([message])
+            except Exception as exc:
+                failures[email.pk] = str(exc) or exc.__class__.__name__
+                # La conexión puede haber quedado inutilizable: se abre otra
+                try:
+                    connection.close()
+                    connection.open()
+                except Exception:
+                    pass
+    finally:
+        try:
+            connection.close()
+        except Exception:
+            pass
+    return failures
+
+
+def deliver_batch(limit=OUTBOX_BATCH_SIZE):
+    """
+    Reclama y envía un lote. Devuelve (enviados, reintentos, descartados);
+    (0, 0, 0) si no había nada pendiente.
+    """
+    emails = claim_batch(limit)
+    if not emails:
+        return 0, 0, 0
+
+    failures = _send_batch(emails)
+    now = timezone.now()
+    sent_ids = [email.pk for email in emails if email.pk not in failures]
+    if sent_ids:
+        OutboxEmail.objects.filter(pk__in=sent_ids).update(
+            status=OutboxStatus.SENT, attempts=F("attempts") + 1, sent_at=now, claim_token=None, last_error="",
+        )
+
+    max_attempts = getattr(settings, "EMAIL_OUTBOX_MAX_ATTEMPTS", 5)
+    failed = [email for email in emails if email.pk in failures]
+    dead = 0
+    for email in failed:
+        email.attempts += 1
+        email.last_error = failures[email.pk]
+        email.claim_token = None
+        if email.attempts >= max_attempts:
+            email.status = OutboxStatus.DEAD
+            dead += 1
+            logger.error("Correo %s descartado tras %s intentos: %s", email.pk, email.attempts, email.last_error)
+        else:
+            email.status = OutboxStatus.PENDING
+            email.next_attempt_at = now + retry_delay(email.attempts)
+    OutboxEmail.objects.bulk_update(
+        failed, ["status", "attempts", "last_error", "claim_token", "next_attempt_at"]
+    )
+    return len(sent_ids), len(failed) - dead, dead
@@ -0,0 +1,27 @@
+from django.db.models import F
+
+
+def _cached_activity(enrollment):
+    # La actividad en memoria de quien creó/borró la inscripción, si ya está cargada
+    from .models import Enrollment
+    return enrollment.activity if Enrollment.activity.is_cached(enrollment) else None
+
+
+def enrollment_created(sender, instance, created, raw=False, **kwargs):
+    if not created or raw:
+        return
+    from .models import Activity
+    Activity.objects.filter(pk=instance.activity_id).update(enrolled_count=F("enrolled_count") + 1)
+    activity = _cached_activity(instance)
+    if activity is not None:
+        activity.enrolled_count += 1
+
+
+def enrollment_deleted(sender, instance, **kwargs):
+    from .models import Activity
+    Activity.objects.filter(pk=instance.activity_id, enrolled_count__gt=0).update(
+        enrolled_count=F("enrolled_count") - 1
+    )
+    activity = _cached_activity(instance)
+    if activity is not None and activity.enrolled_count:
+        activity.enrolled_count -= 1
@@ -1,11 +1,21 @@
-from django.test import TestCase, Client
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase, Client, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend as LocmemEmailBackend
 from django.utils import timezone
 from activities.models import (
     Activity,
+    ActivityFull,
     Enrollment,
+    EnrollmentRequest,
+    EnrollmentRequestStatus,
+    OutboxEmail,
+    OutboxStatus,
     Schedule,
     ActivityReview,
     ActivityType,
@@ -13,11 +23,17 @@ from activities.models import (
     WeekDay,
     Participation,
 )
+from activities.admission import process_queue, promote_waitlist, request_enrollment
+from activities.listings import listing_queryset
+from activities.outbox import deliver_batch, enqueue_email
+from activities.views import ActivityListView
 from login.models import CustomUser, Faculty
 from datetime import time, date, timedelta
 import io
 from openpyxl import load_workbook
 import csv
+import threading
+import time as time_module
 
 User = get_user_model()
 
@@ -785,7 +801,7 @@ class DownloadSegmentationTests(TestCase):
                         'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
 
         # Verificar que el archivo es un Excel válido
-        wb = load_workbook(io.BytesIO(response.content))
+        wb = load_workbook(io.BytesIO(response.getvalue()))
         ws = wb.active
         self.assertIsNotNone(ws)
 
@@ -804,7 +820,7 @@ class DownloadSegmentationTests(TestCase):
                         'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
 
         # Verificar que el archivo es un Excel válido
-        wb = load_workbook(io.BytesIO(response.content))
+        wb = load_workbook(io.BytesIO(response.getvalue()))
         ws = wb.active
         self.assertIsNotNone(ws)
 
@@ -821,7 +837,7 @@ class DownloadSegmentationTests(TestCase):
                         'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
 
         # Verificar que el archivo Excel es válido incluso con datos vacíos
-        wb = load_workbook(io.BytesIO(response.content))
+        wb = load_workbook(io.BytesIO(response.getvalue()))
         ws = wb.active
         self.assertIsNotNone(ws)
 
@@ -1304,3 +1320,545 @@ class ConfirmEnrollmentViewTests(TestCase):
         response = self.client.get(url)
 
         self.assertEqual(response.status_code, 302)  # Redirect con error
+
+
+class GenerateScaleDataCommandTests(TestCase):
+    """Pruebas del comando generate_scale_data"""
+
+    def _generate(self, *args):
+        from django.core.management import call_command
+        call_command("generate_scale_data", "--scale", "0.02", *args, stdout=io.StringIO())
+
+    def _snapshot(self):
+        return (
+            list(CustomUser.objects.filter(username__startswith="scale_").order_by("username").values_list("username", "gender", "faculty__name")),
+            list(Enrollment.objects.order_by("user__username", "activity__name").values_list("user__username", "activity__name", "registered_at")),
+            list(Participation.objects.order_by("user__username", "activity__name", "attendance_date").values_list("user__username", "activity__name", "attendance_date")),
+        )
+
+    def test_generates_all_models(self):
+        """Test que el comando llena usuarios, actividades, asistencias, torneos y eventos"""
+        from social_projects.models import SocialEventEnrollment
+        from tournaments.models import TournamentGame
+        self._generate()
+
+        self.assertEqual(CustomUser.objects.filter(username__startswith="scale_").count(), 20)
+        self.assertTrue(Schedule.objects.exists())
+        self.assertTrue(Participation.objects.exists())
+        self.assertTrue(TournamentGame.objects.exists())
+        self.assertTrue(SocialEventEnrollment.objects.exists())
+        # Las asistencias caen en el día del horario de la inscripción
+        weekdays = [day for day, _ in WeekDay.choices]
+        for participation in Participation.objects.select_related("schedule")[:50]:
+            self.assertEqual(weekdays[participation.attendance_date.weekday()], participation.schedule.day)
+
+    def test_same_seed_same_data(self):
+        """Test que con la misma semilla se generan los mismos datos"""
+        from django.core.management.base import CommandError
+        self._generate()
+        first = self._snapshot()
+        with self.assertRaises(CommandError):
+            self._generate()
+        self._generate("--clear")
+        self.assertEqual(self._snapshot(), first)
+
+    def test_facts_rebuilt_and_clear_is_silent(self):
+        """Test que el comando deja el rollup lleno y --clear deja una lápida por cada fila borrada"""
+        from reportsAndStats.models import DeletedRecord, ParticipationFact
+        from reportsAndStats.facts import fact_grand_totals
+        self._generate()
+        self.assertEqual(fact_grand_totals(), {
+            "enrollments": Enrollment.objects.count(), "participations": Participation.objects.count(),
+        })
+        enrollment_ids = set(Enrollment.objects.values_list("pk", flat=True))
+        participation_ids = set(Participation.objects.values_list("pk", flat=True))
+
+        self._generate("--clear")
+        tombstones = DeletedRecord.objects.values_list("model", "object_id")
+        self.assertEqual(
+            set(tombstones),
+            {("enrollment", pk) for pk in enrollment_ids} | {("participation", pk) for pk in participation_ids},
+        )
+        self.assertEqual(len(tombstones), len(enrollment_ids) + len(participation_ids))
+        DeletedRecord.objects.all().delete()
+        self.assertEqual(fact_grand_totals()["enrollments"], Enrollment.objects.count())
+        self.assertEqual(ParticipationFact.objects.exclude(activity__name__startswith="[scale]").count(), 0)
+        for activity in Activity.objects.all():
+            self.assertEqual(activity.enrolled_count, activity.enrollments.count())
+
+        # Las señales quedan conectadas de nuevo
+        Enrollment.objects.first().delete()
+        self.assertEqual(DeletedRecord.objects.count(), 1)
+
+
+class EnrolledCountTests(TestCase):
+    """Pruebas del contador desnormalizado de inscripciones."""
+
+    def setUp(self):
+        self.activity = Activity.objects.create(
+            name="Yoga", type=ActivityType.DEPORTIVA, is_published=True, requires_registration=True, max_capacity=2,
+        )
+        self.users = [User.objects.create_user(username=f"user{i}", password="pass") for i in range(3)]
+
+    def test_counter_follows_creates_and_deletes(self):
+        """Test que el contador sigue a las inscripciones creadas y borradas por cualquier vía"""
+        first = Enrollment.objects.create(user=self.users[0], activity=self.activity)
+        Enrollment.objects.create(user=self.users[1], activity=self.activity)
+        self.assertEqual(self.activity.enrolled_count, 2)
+        first.delete()
+        self.users[1].delete()  # borrado en cascada
+        self.activity.refresh_from_db()
+        self.assertEqual(self.activity.enrolled_count, 0)
+
+    def test_properties_do_not_query(self):
+        """Test que el cupo se muestra sin contar inscripciones en cada actividad"""
+        Enrollment.objects.create(user=self.users[0], activity=self.activity)
+        activity = Activity.objects.get(pk=self.activity.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(activity.current_registrations_count, 1)
+            self.assertFalse(activity.is_full_status)
+
+    def test_enroll_respects_capacity(self):
+        """Test que enroll no supera el cupo y no duplica inscripciones"""
+        _, created = self.activity.enroll(self.users[0])
+        self.assertTrue(created)
+        _, created = self.activity.enroll(self.users[0])
+        self.assertFalse(created)
+        self.activity.enroll(self.users[1])
+        with self.assertRaises(ActivityFull):
+            self.activity.enroll(self.users[2])
+        self.assertEqual(Enrollment.objects.filter(activity=self.activity).count(), 2)
+
+    def test_enroll_and_unenroll_views_update_counter(self):
+        """Test que las vistas de inscripción y cancelación mantienen el contador"""
+        client = Client()
+        client.login(username="user0", password="pass")
+        client.post(reverse("enroll_in_activity", args=[self.activity.pk]))
+        self.activity.refresh_from_db()
+        self.assertEqual(self.activity.enrolled_count, 1)
+
+        enrollment = Enrollment.objects.get(user=self.users[0])
+        client.post(reverse("unenroll_from_activity", args=[enrollment.pk]))
+        self.activity.refresh_from_db()
+        self.assertEqual(self.activity.enrolled_count, 0)
+
+    def test_full_save_keeps_counter(self):
+        """Test que guardar una instancia desactualizada (p. ej. el formulario de edición) no pisa el contador"""
+        stale = Activity.objects.get(pk=self.activity.pk)
+        Enrollment.objects.create(user=self.users[0], activity=self.activity)
+        stale.name = "Yoga avanzado"
+        stale.save()
+        self.activity.refresh_from_db()
+        self.assertEqual((self.activity.name, self.activity.enrolled_count), ("Yoga avanzado", 1))
+
+        Activity.objects.only("name").get(pk=self.activity.pk).save()
+        self.activity.refresh_from_db()
+        self.assertEqual(self.activity.enrolled_count, 1)
+
+    def test_save_after_row_deleted_inserts_again(self):
+        """Test que guardar una actividad cuya fila fue borrada la vuelve a insertar"""
+        stale = Activity.objects.get(pk=self.activity.pk)
+        Activity.objects.filter(pk=stale.pk).delete()
+        stale.save()
+        self.assertTrue(Activity.objects.filter(pk=stale.pk, name="Yoga").exists())
+
+    def test_reconcile_command(self):
+        """Test que reconcile_enrollment_counts corrige contadores desfasados"""
+        Enrollment.objects.bulk_create([Enrollment(user=user, activity=self.activity) for user in self.users])
+        other = Activity.objects.create(name="Teatro")
+        out = io.StringIO()
+        call_command("reconcile_enrollment_counts", stdout=out)
+        self.assertIn("Actividades corregidas: 1", out.getvalue())
+        self.activity.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((self.activity.enrolled_count, other.enrolled_count), (3, 0))
+
+
+class EnrollmentConcurrencyTests(TransactionTestCase):
+    """Inscripciones simultáneas sobre un único cupo."""
+
+    serialized_rollback = True
+
+    def test_parallel_enrollments_take_single_seat(self):
+        """Test que varias inscripciones en paralelo no sobrepasan un cupo de 1"""
+        activity = Activity.objects.create(name="Yoga", is_published=True, requires_registration=True, max_capacity=1)
+        users = [User.objects.create_user(username=f"racer{i}", password="pass") for i in range(8)]
+        barrier = threading.Barrier(len(users))
+        results = []
+
+        def attempt(user):
+            try:
+                barrier.wait()
+                for _ in range(50):
+                    try:
+                        Activity.objects.get(pk=activity.pk).enroll(user)
+                        results.append("ok")
+                        return
+                    except ActivityFull:
+                        results.append("full")
+                        return
+                    except OperationalError:
+                        # SQLite no bloquea filas: la base está ocupada, se reintenta
+                        time_module.sleep(0.01)
+                results.append("error")
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=attempt, args=(user,)) for user in users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(results), ["full"] * 7 + ["ok"])
+        activity.refresh_from_db()
+        self.assertEqual(activity.enrolled_count, 1)
+        self.assertEqual(Enrollment.objects.filter(activity=activity).count(), 1)
+
+
+class ActivityListingQueryTests(TestCase):
+    """Pruebas de los listados de actividades con consultas fijas."""
+
+    def setUp(self):
+        self.client = Client()
+        self.student = User.objects.create_user(username="student", password="pass123")
+        self.staff = User.objects.create_user(username="staff", password="pass123")
+        self.staff.groups.add(Group.objects.get_or_create(name="admin")[0])
+        self.other = User.objects.create_user(username="other", password="pass123")
+        self.full = self._activity("Fútbol", requires_registration=True, max_capacity=1)
+        Enrollment.objects.create(user=self.other, activity=self.full)
+        self.enrolled = self._activity("Yoga", requires_registration=True, max_capacity=10)
+        Enrollment.objects.create(user=self.student, activity=self.enrolled)
+        self.open = self._activity("Teatro")
+
+    def _activity(self, name, **kwargs):
+        activity = Activity.objects.create(name=name, is_published=True, type=ActivityType.DEPORTIVA, **kwargs)
+        Schedule.objects.create(activity=activity, day=WeekDay.MONDAY, start_time=time(8), end_time=time(10))
+        Schedule.objects.create(activity=activity, day=WeekDay.FRIDAY, start_time=time(14), end_time=time(16))
+        return activity
+
+    def _grow_catalogue(self):
+        for index in range(10):
+            activity = self._activity(f"Extra {index}", requires_registration=True, max_capacity=5)
+            Enrollment.objects.create(user=self.other, activity=activity)
+
+    def _assert_constant_queries(self, url):
+        with CaptureQueriesContext(connection) as small:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        self._grow_catalogue()
+        with self.assertNumQueries(len(small)):
+            self.client.get(url)
+
+    def test_listing_annotations(self):
+        """Test que el listado trae cupo lleno e inscripción del usuario ya calculados"""
+        activities = {activity.name: activity for activity in listing_queryset(user=self.student)}
+        self.assertTrue(activities["Fútbol"].is_full)
+        self.assertFalse(activities["Fútbol"].is_enrolled)
+        self.assertTrue(activities["Yoga"].is_enrolled)
+        self.assertFalse(activities["Yoga"].is_full)
+        self.assertFalse(activities["Teatro"].is_full)
+        with self.assertNumQueries(0):
+            self.assertEqual(len(activities["Teatro"].schedules.all()), 2)
+
+    def test_listing_time_filter(self):
+        """Test que el filtro por hora devuelve cada actividad una sola vez"""
+        names = [activity.name for activity in listing_queryset({"time": "09:00"})]
+        self.assertEqual(sorted(names), ["Fútbol", "Teatro", "Yoga"])
+        self.assertEqual(list(listing_queryset({"time": "12:00"})), [])
+
+    def test_student_listing_query_count_is_constant(self):
+        """Test que la vista de estudiantes no hace consultas por actividad"""
+        self.client.login(username="student", password="pass123")
+        response = self.client.get(reverse("activityView"))
+        self.assertContains(response, "Ya inscrito")
+        self.assertContains(response, "Cupos llenos")
+        self._assert_constant_queries(reverse("activityView"))
+
+    def test_cadi_listing_query_count_is_constant(self):
+        """Test que el listado del CADI no hace consultas por actividad"""
+        self.client.login(username="staff", password="pass123")
+        self._assert_constant_queries(reverse("public_activities"))
+
+    def test_activity_list_splits_in_memory(self):
+        """Test que la lista por inscripción usa una consulta y separa los grupos en memoria"""
+        request = RequestFactory().get(reverse("activity_list"))
+        request.user = self.student
+        view = ActivityListView()
+        view.setup(request)
+        view.object_list = view.get_queryset()
+        with self.assertNumQueries(2):
+            context = view.get_context_data()
+        self.assertEqual({activity.name for activity in context["with_registration"]}, {"Fútbol", "Yoga"})
+        self.assertEqual([activity.name for activity in context["no_registration"]], ["Teatro"])
+
+
+class EnrollmentAdmissionQueueTests(TestCase):
+    """Pruebas de la cola de admisión de inscripciones."""
+
+    def setUp(self):
+        self.activity = Activity.objects.create(
+            name="Yoga", type=ActivityType.DEPORTIVA, is_published=True,
+            requires_registration=True, max_capacity=2, queued_admission=True,
+        )
+        self.users = [
+            User.objects.create_user(username=f"user{i}", password="pass", email=f"user{i}@example.com")
+            for i in range(4)
+        ]
+
+    def _statuses(self):
+        return list(
+            EnrollmentRequest.objects.filter(activity=self.activity)
+            .order_by("pk")
+            .values_list("user__username", "status")
+        )
+
+    def test_view_only_enqueues(self):
+        """Test que la inscripción a una actividad con cola solo guarda la solicitud"""
+        client = Client()
+        client.login(username="user0", password="pass")
+        client.post(reverse("enroll_in_activity", args=[self.activity.pk]))
+        client.post(reverse("enroll_in_activity", args=[self.activity.pk]))
+        self.assertEqual(self._statuses(), [("user0", EnrollmentRequestStatus.PENDING)])
+        self.assertFalse(Enrollment.objects.exists())
+        self.assertFalse(OutboxEmail.objects.exists())
+
+    def test_admits_in_arrival_order_and_waitlists_overflow(self):
+        """Test que el worker admite por orden de llegada hasta el cupo y deja el resto en espera"""
+        for user in reversed(self.users):
+            request_enrollment(self.activity, user)
+        self.assertEqual(process_queue(batch_size=1), (4, 2))
+        self.assertEqual(self._statuses(), [
+            ("user3", EnrollmentRequestStatus.ADMITTED),
+            ("user2", EnrollmentRequestStatus.ADMITTED),
+            ("user1", EnrollmentRequestStatus.WAITLISTED),
+            ("user0", EnrollmentRequestStatus.WAITLISTED),
+        ])
+        self.activity.refresh_from_db()
+        self.assertEqual(self.activity.enrolled_count, 2)
+        self.assertEqual(
+            sorted(email.to[0] for email in OutboxEmail.objects.all()), ["user2@example.com", "user3@example.com"]
+        )
+
+    def test_cancel_promotes_first_waitlisted(self):
+        """Test que al cancelar una inscripción el cupo pasa al primero en la lista de espera"""
+        for user in self.users:
+            request_enrollment(self.activity, user)
+        process_queue()
+        Enrollment.objects.get(user=self.users[0]).cancel()
+        self.assertTrue(Enrollment.objects.filter(user=self.users[2], activity=self.activity).exists())
+        self.assertFalse(Enrollment.objects.filter(user=self.users[3], activity=self.activity).exists())
+        self.assertEqual(
+            EnrollmentRequest.objects.get(user=self.users[2]).status, EnrollmentRequestStatus.ADMITTED
+        )
+        self.activity.refresh_from_db()
+        self.assertEqual(self.activity.enrolled_count, 2)
+
+    def test_one_open_request_per_user(self):
+        """Test que un usuario no puede tener dos solicitudes abiertas para la misma actividad"""
+        first, created = request_enrollment(self.activity, self.users[0])
+        self.assertTrue(created)
+        again, created = request_enrollment(self.activity, self.users[0])
+        self.assertFalse(created)
+        self.assertEqual(again.pk, first.pk)
+
+    def test_already_enrolled_user_does_not_take_second_seat(self):
+        """Test que una solicitud de alguien ya inscrito se marca admitida sin ocupar otro cupo"""
+        enrollment = Enrollment.objects.create(user=self.users[0], activity=self.activity)
+        request_enrollment(self.activity, self.users[0])
+        process_queue()
+        enrollment_request = EnrollmentRequest.objects.get(user=self.users[0])
+        self.assertEqual(enrollment_request.status, EnrollmentRequestStatus.ADMITTED)
+        self.assertEqual(enrollment_request.enrollment_id, enrollment.pk)
+        self.assertEqual(Enrollment.objects.filter(activity=self.activity).count(), 1)
+
+    def test_promotion_skips_already_enrolled(self):
+        """Test que al liberar un cupo no se inscribe dos veces a quien ya se inscribió estando en espera"""
+        for user in self.users:
+            request_enrollment(self.activity, user)
+        process_queue()
+        # user2 (en espera) queda inscrito por otra vía, p. ej. desde el admin
+        existing = Enrollment.objects.create(user=self.users[2], activity=self.activity)
+        Enrollment.objects.filter(user=self.users[0]).delete()
+        Enrollment.objects.filter(user=self.users[1]).delete()
+
+        self.assertEqual(promote_waitlist(self.activity.pk), 1)
+        self.assertEqual(Enrollment.objects.filter(user=self.users[2], activity=self.activity).count(), 1)
+        self.assertEqual(EnrollmentRequest.objects.get(user=self.users[2]).enrollment_id, existing.pk)
+        self.assertTrue(Enrollment.objects.filter(user=self.users[3], activity=self.activity).exists())
+        self.activity.refresh_from_db()
+        self.assertEqual(self.activity.enrolled_count, 2)
+
+    def test_command_once(self):
+        """Test que process_enrollment_queue --once procesa la cola y termina"""
+        request_enrollment(self.activity, self.users[0])
+        out = io.StringIO()
+        call_command("process_enrollment_queue", once=True, stdout=out)
+        self.assertIn("Solicitudes procesadas: 1, inscripciones admitidas: 1", out.getvalue())
+        self.assertTrue(Enrollment.objects.filter(user=self.users[0], activity=self.activity).exists())
+
+
+class CountingEmailBackend(LocmemEmailBackend):
+    """Backend locmem que cuenta conexiones y rechaza destinatarios con 'rebota'."""
+    connections = 0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        CountingEmailBackend.connections += 1
+
+    def send_messages(self, messages):
+        if any("rebota" in address for message in messages for address in message.to):
+            raise ConnectionError("destinatario rechazado")
+        return super().send_messages(messages)
+
+
+class EmailOutboxTests(TestCase):
+    """Pruebas de la tabla de salida de correos y su envío por lotes."""
+
+    def setUp(self):
+        CountingEmailBackend.connections = 0
+        self.user = User.objects.create_user(username="student", password="pass", email="student@example.com")
+        self.activity = Activity.objects.create(
+            name="Yoga", type=ActivityType.DEPORTIVA, is_published=True, requires_registration=True, max_capacity=1,
+        )
+
+    def test_enrollment_queues_email_instead_of_sending(self):
+        """Test que inscribirse guarda el correo en la tabla de salida y deliver_outbox lo envía"""
+        client = Client()
+        client.login(username="student", password="pass")
+        client.post(reverse("enroll_in_activity", args=[self.activity.pk]))
+        self.assertEqual(len(mail.outbox), 0)
+        email = OutboxEmail.objects.get()
+        self.assertEqual(email.to, ["student@example.com"])
+        self.assertIn("/activities/confirm/", email.body)
+
+        out = io.StringIO()
+        call_command("deliver_outbox", once=True, stdout=out)
+        self.assertIn("Correos enviados: 1", out.getvalue())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, "Confirma tu asistencia a Yoga")
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), (OutboxStatus.SENT, 1))
+
+    def test_full_activity_queues_no_email(self):
+        """Test que una inscripción rechazada por cupo no deja correo en la tabla de salida"""
+        other = User.objects.create_user(username="other", password="pass", email="other@example.com")
+        Enrollment.objects.create(user=other, activity=self.activity)
+        client = Client()
+        client.login(username="student", password="pass")
+        client.post(reverse("enroll_in_activity", args=[self.activity.pk]))
+        self.assertFalse(OutboxEmail.objects.exists())
+
+    @override_settings(EMAIL_BACKEND="activities.tests.CountingEmailBackend")
+    def test_batch_uses_one_connection(self):
+        """Test que un lote se envía por una sola conexión"""
+        for i in range(5):
+            enqueue_email("Aviso", "Texto", [f"user{i}@example.com"])
+        self.assertEqual(deliver_batch(limit=10), (5, 0, 0))
+        self.assertEqual(CountingEmailBackend.connections, 1)
+        self.assertEqual(len(mail.outbox), 5)
+
+    @override_settings(
+        EMAIL_BACKEND="activities.tests.CountingEmailBackend",
+        EMAIL_OUTBOX_MAX_ATTEMPTS=3,
+        EMAIL_OUTBOX_RETRY_SECONDS=60,
+    )
+    def test_failures_back_off_then_dead_letter(self):
+        """Test que un fallo se reintenta con espera creciente y se descarta al agotar los intentos"""
+        bad = enqueue_email("Aviso", "Texto", ["rebota@example.com"])
+        good = enqueue_email("Aviso", "Texto", ["ok@example.com"])
+        self.assertEqual(deliver_batch(), (1, 1, 0))
+        good.refresh_from_db()
+        bad.refresh_from_db()
+        self.assertEqual(good.status, OutboxStatus.SENT)
+        self.assertEqual((bad.status, bad.attempts), (OutboxStatus.PENDING, 1))
+        self.assertIn("rechazado", bad.last_error)
+        first_delay = bad.next_attempt_at - timezone.now()
+        self.assertGreater(first_delay, timedelta(seconds=50))
+
+        # Todavía no vence la espera
+        self.assertEqual(deliver_batch(), (0, 0, 0))
+
+        OutboxEmail.objects.filter(pk=bad.pk).update(next_attempt_at=timezone.now())
+        self.assertEqual(deliver_batch(), (0, 1, 0))
+        bad.refresh_from_db()
+        self.assertGreater(bad.next_attempt_at - timezone.now(), timedelta(seconds=110))
+
+        OutboxEmail.objects.filter(pk=bad.pk).update(next_attempt_at=timezone.now())
+        self.assertEqual(deliver_batch(), (0, 0, 1))
+        bad.refresh_from_db()
+        self.assertEqual((bad.status, bad.attempts), (OutboxStatus.DEAD, 3))
+
+    def test_stale_batches_are_requeued(self):
+        """Test que deliver_outbox reencola los lotes reclamados por un worker que no terminó"""
+        email = enqueue_email("Aviso", "Texto", ["student@example.com"])
+        OutboxEmail.objects.filter(pk=email.pk).update(
+            status=OutboxStatus.SENDING, claimed_at=timezone.now() - timedelta(hours=1)
+        )
+        out = io.StringIO()
+        call_command("deliver_outbox", once=True, stdout=out)
+        self.assertIn("Correos reencolados: 1", out.getvalue())
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutboxStatus.SENT)
+
+
+class EventStartsAtTests(TestCase):
+    """Pruebas de la fecha estructurada de los eventos (event_starts_at)."""
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username="student", password="pass123")
+        self.client.login(username="student", password="pass123")
+        self.event = Activity.objects.create(
+            name="Feria de bienestar",
+            description="Evento abierto. FECHA:2025-03-12 15:30",
+            type=ActivityType.EVENTOS,
+            is_published=True,
+        )
+
+    def test_save_parses_description(self):
+        """Test que al guardar se toma la fecha y hora de FECHA: en la zona horaria del sitio"""
+        starts_at = timezone.localtime(self.event.event_starts_at)
+        self.assertEqual((starts_at.date(), starts_at.time()), (date(2025, 3, 12), time(15, 30)))
+
+        self.event.description = "Sin fecha"
+        self.event.save(update_fields=["description"])
+        self.event.refresh_from_db()
+        self.assertIsNone(self.event.event_starts_at)
+
+        self.event.description = "FECHA:2025-03-14"
+        self.event.save()
+        self.assertEqual(timezone.localtime(self.event.event_starts_at).time(), time(0, 0))
+
+    def test_calendar_places_events_by_date_range(self):
+        """Test que el calendario ubica los eventos en su día sin leer los que caen fuera de la grilla"""
+        Activity.objects.create(
+            name="Evento de otro año", description="FECHA:2024-03-12 10:00", type=ActivityType.EVENTOS, is_published=True,
+        )
+        response = self.client.get(reverse("unified_calendar"), {"month": 3, "year": 2025})
+        self.assertEqual(response.status_code, 200)
+        items = {
+            day_data["date"]: [item["title"] for item in day_data["items"]]
+            for day_data in response.context["calendar_days"]
+        }
+        self.assertIn("Feria de bienestar", items[date(2025, 3, 12)])
+        self.assertEqual(
+            [d for d, titles in items.items() if "Feria de bienestar" in titles], [date(2025, 3, 12)]
+        )
+        self.assertNotIn("Evento de otro año", [title for titles in items.values() for title in titles])
+        event_item = next(item for item in response.context["calendar_days"] if item["date"] == date(2025, 3, 12))
+        self.assertEqual(
+            [item["time"] for item in event_item["items"] if item["title"] == "Feria de bienestar"], ["3:30 p.m."]
+        )
+
+    def test_backfill_command(self):
+        """Test que backfill_event_starts_at llena la fecha de descripciones escritas sin pasar por save"""
+        Activity.objects.update(event_starts_at=None)
+        out = io.StringIO()
+        call_command("backfill_event_starts_at", stdout=out)
+        self.assertIn("Actividades actualizadas: 1", out.getvalue())
+        self.event.refresh_from_db()
+        self.assertEqual(timezone.localtime(self.event.event_starts_at).date(), date(2025, 3, 12))
+
+        out = io.StringIO()
+        call_command("backfill_event_starts_at", stdout=out)
+        self.assertIn("Actividades actualizadas: 0", out.getvalue())
@@ -12,41 +12,43 @@ from collections import defaultdict
 from django.db.models import Avg
 from django.urls import reverse, reverse_lazy
 from django.db.models.functions import TruncDate, TruncMonth
-from django.db.models import Count
+from django.db.models import Count, F
 from django.utils import timezone
 from datetime import timedelta, datetime
 import csv
 import re
 import calendar
 import time
-from openpyxl import Workbook
 from openpyxl.styles import Font, PatternFill, Alignment
 from django.contrib.auth.models import Group
 from django.db.models import Q
 from login.models import CustomUser
+from login.roles import is_admin_user
 from .models import Activity, Enrollment, ActivityReview, Schedule
 from django.db import IntegrityError
 from social_projects.models import SocialProject, SocialEvent, SocialEventEnrollment
 from datetime import datetime
 from .models import Activity, Enrollment, ActivityReview, Schedule, Participation
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
 import calendar
 from social_projects.models import SocialProject
 from django.core.exceptions import PermissionDenied
 from django.http import HttpResponse
 import csv
 import io
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill
-from openpyxl.utils import get_column_letter
+from reportsAndStats.jobs import enqueue_export
+from reportsAndStats.models import ExportKind
+from .exports import SEGMENTATION_HEADERS, segmentation_rows, segmentation_xlsx
 
 # Email stuff
-from django.core.signing import dumps, loads, BadSignature, SignatureExpired
-from django.core.mail import send_mail
-from django.template.loader import render_to_string
-from django.conf import settings
+from django.core.signing import loads, BadSignature, SignatureExpired
 
-from .models import Activity, Enrollment, ActivityReview, Schedule, Participation, Evento
+from .models import (
+    Activity, ActivityFull, Enrollment, EnrollmentRequestStatus, ActivityReview, Schedule, Participation, Evento,
+)
+from .admission import request_enrollment
+from .emails import queue_enrollment_confirmation
+from .listings import listing_queryset
 from .forms import ActivityForm, ScheduleForm
 from tournaments.models import Tournament, TournamentGame
 
@@ -119,16 +121,11 @@ class CreateActivityView(StaffRequiredMixin, CreateView):
                 start_time = schedule_form.cleaned_data.get("start_time")
                 end_time = schedule_form.cleaned_data.get("end_time")
                 
-                if is_evento and not day and activity.description:
-                    import re
-                    match = re.search(r'FECHA:(\d{4}-\d{2}-\d{2})', activity.description)
-                    if match:
-                        try:
-                            fecha_str = match.group(1)
-                            evento_fecha = datetime.strptime(fecha_str, "%Y-%m-%d")
-                            day = weekday_map.get(evento_fecha.weekday(), "Lunes")
-                        except ValueError:
-                            day = "Lunes"
+                if is_evento and not day:
+                    # Activity.save ya leyó la fecha "FECHA:..." de la descripción
+                    if activity.event_starts_at:
+                        evento_fecha = timezone.localtime(activity.event_starts_at)
+                        day = weekday_map.get(evento_fecha.weekday(), "Lunes")
                     else:
                         day = "Lunes"
                 
@@ -204,23 +201,7 @@ class PublicActivitiesListView(StaffRequiredMixin, ListView):
     context_object_name = "activities"
 
     def get_queryset(self):
-        queryset = Activity.objects.filter(is_published=True)
-        
-        activity_type = self.request.GET.get("type")
-        location = self.request.GET.get("location")
-        time = self.request.GET.get("time")
-
-        if activity_type:
-            queryset = queryset.filter(type=activity_type)
-        if location:
-            queryset = queryset.filter(location__icontains=location)
-        if time:
-            queryset = queryset.filter(
-                schedules__start_time__lte=time,
-                schedules__end_time__gte=time
-            ).distinct()
-        
-        return queryset
+        return listing_queryset(self.request.GET)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -240,22 +221,7 @@ class ActivityView(ListView):
     context_object_name = "activities"
 
     def get_queryset(self):
-        queryset = Activity.objects.filter(is_published=True)
-        selected_type = self.request.GET.get("type")
-        selected_location = self.request.GET.get("location")
-        selected_time = self.request.GET.get("time")
-
-        if selected_type:
-            queryset = queryset.filter(type=selected_type)
-        if selected_location:
-            queryset = queryset.filter(location__icontains=selected_location)
-        if selected_time:
-            queryset = queryset.filter(
-                schedules__start_time__lte=selected_time,
-                schedules__end_time__gte=selected_time
-            ).distinct()
-
-        return queryset
+        return listing_queryset(self.request.GET, user=self.request.user)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -274,13 +240,14 @@ class ActivityListView(ListView):
     template_name = "activities/activity_list.html"
 
     def get_queryset(self):
-        return Activity.objects.filter(is_published=True)
+        return listing_queryset(user=self.request.user)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        activities = self.get_queryset()
-        context["no_registration"] = activities.filter(requires_registration=False)
-        context["with_registration"] = activities.filter(requires_registration=True)
+        # Una sola consulta: los grupos se separan en memoria (y object_list queda evaluado)
+        activities = list(self.object_list)
+        context["no_registration"] = [activity for activity in activities if not activity.requires_registration]
+        context["with_registration"] = [activity for activity in activities if activity.requires_registration]
         return context
 
 
@@ -311,43 +278,34 @@ class EnrollInActivityView(LoginRequiredMixin, View):
             messages.warning(request, "Esta actividad no requiere inscripción.")
             return redirect("activityView")
 
-        if activity.is_full_status:
-            messages.error(request, "El cupo de esta actividad está lleno.")
+        # Aperturas con mucha demanda: solo se encola la solicitud (ver activities.admission)
+        if activity.queued_admission:
+            if Enrollment.objects.filter(user=request.user, activity=activity).exists():
+                messages.info(request, "Ya estabas inscrito en esta actividad.")
+            else:
+                enrollment_request, _ = request_enrollment(activity, request.user)
+                if enrollment_request.status == EnrollmentRequestStatus.WAITLISTED:
+                    messages.info(request, "Estás en la lista de espera de esta actividad.")
+                else:
+                    messages.success(request, "Recibimos tu solicitud: te avisaremos por correo cuando se confirme tu cupo.")
             return redirect("activityView")
 
-        enrollment, created = Enrollment.objects.get_or_create(
-            user=request.user,
-            activity=activity
-        )
+        # Revisión de cupo e inscripción atómicas (Activity.enroll bloquea la actividad);
+        # el correo de confirmación se encola en la misma transacción
+        try:
+            with transaction.atomic():
+                enrollment, created = activity.enroll(request.user)
+                if created:
+                    queue_enrollment_confirmation(enrollment, request.build_absolute_uri("/"))
+        except ActivityFull:
+            messages.error(request, "El cupo de esta actividad está lleno.")
+            return redirect("activityView")
 
         if not created:
             messages.info(request, "Ya estabas inscrito en esta actividad.")
         else:
             messages.success(request, "¡Te inscribiste con éxito!")
 
-            # Send an email if the activity requires registration
-            try:
-                # token with the minimum info to confirm
-                token = dumps({"enrollment_id": enrollment.id, "user_id": request.user.id})
-                confirm_path = reverse("confirm_enrollment", args=[token])
-                confirm_url = request.build_absolute_uri(confirm_path)
-
-                subject = f"Confirma tu asistencia a {activity.name}"
-                message = render_to_string("activities/confirm_enrollment_email.txt", {
-                    "user": request.user,
-                    "activity": activity,
-                    "confirm_url": confirm_url,
-                })
-
-                #There is a Default but it may not be set
-                from_email = getattr(settings, "DEFAULT_FROM_EMAIL", None) or "no-reply@localhost"
-
-                # send_mail will use the project's EMAIL_BACKEND
-                send_mail(subject, message, from_email, [request.user.email], fail_silently=False)
-            except Exception:
-                # If the email fails, make a log of the error but don't block the enrollment
-                pass
-
         return redirect("activityView")
 
 
@@ -555,7 +513,7 @@ class UnenrollFromActivityView(LoginRequiredMixin, View):
     def post(self, request, enrollment_id):
         enrollment = get_object_or_404(Enrollment, pk=enrollment_id, user=request.user)
         activity_name = enrollment.activity.name
-        enrollment.delete()
+        enrollment.cancel()
         messages.success(request, f"La actividad '{activity_name}' ha sido eliminada de tu calendario.")
         return redirect("my_calendar")
 
@@ -583,10 +541,19 @@ class UnifiedCalendarView(LoginRequiredMixin, TemplateView):
             is_published=True
         ).exclude(type="Eventos").prefetch_related("schedules", "enrollments")
         
-        actividades_eventos = Activity.objects.filter(
+        # Eventos institucionales de los días visibles en la grilla (incluye los
+        # días del mes anterior/siguiente), por rango sobre event_starts_at
+        grid_start = timezone.make_aware(datetime.combine(month_days[0][0], datetime.min.time()))
+        grid_end = timezone.make_aware(datetime.combine(month_days[-1][-1] + timedelta(days=1), datetime.min.time()))
+        eventos_por_dia = defaultdict(list)
+        for evento_act in Activity.objects.filter(
             is_published=True,
-            type="Eventos"
-        ).prefetch_related("schedules")
+            type="Eventos",
+            event_starts_at__gte=grid_start,
+            event_starts_at__lt=grid_end,
+        ).order_by("event_starts_at", "pk"):
+            evento_fecha = timezone.localtime(evento_act.event_starts_at)
+            eventos_por_dia[evento_fecha.date()].append((evento_act, evento_fecha))
         
         torneos = Tournament.objects.filter(
             start_date__year=year,
@@ -629,21 +596,6 @@ class UnifiedCalendarView(LoginRequiredMixin, TemplateView):
             ).values_list('event_id', 'event__event_date')
         )
 
-        def extract_event_date(description):
-            """Extrae la fecha del formato FECHA:YYYY-MM-DD HH:MM"""
-            import re
-            if not description:
-                return None
-            match = re.search(r'FECHA:(\d{4}-\d{2}-\d{2})\s+(\d{2}:\d{2})', description)
-            if match:
-                try:
-                    fecha_str = match.group(1)
-                    hora_str = match.group(2)
-                    return datetime.strptime(f"{fecha_str} {hora_str}", "%Y-%m-%d %H:%M")
-                except ValueError:
-                    return None
-            return None
-
         # === Función helper para extraer hora de description de eventos sociales ===
         def extract_social_event_time(description):
             """Extrae la hora del formato 'Horario: 10:00 AM' o 'Horario: 2:00 PM'"""
@@ -692,43 +644,41 @@ class UnifiedCalendarView(LoginRequiredMixin, TemplateView):
                     "items": []
                 }
 
-                for evento_act in actividades_eventos:
-                    evento_fecha = extract_event_date(evento_act.description)
-                    if evento_fecha and evento_fecha.date() == day:
-                        hora_24 = evento_fecha.time()
-                        if hora_24.hour == 0:
-                            hora_str = f"12:{hora_24.minute:02d} a.m."
-                        elif hora_24.hour < 12:
-                            hora_str = f"{hora_24.hour}:{hora_24.minute:02d} a.m."
-                        elif hora_24.hour == 12:
-                            hora_str = f"12:{hora_24.minute:02d} p.m."
-                        else:
-                            hora_str = f"{hora_24.hour - 12}:{hora_24.minute:02d} p.m."
-                        
-                        dia_semana = weekday_map.get(evento_fecha.weekday(), "")
-                        event_date = evento_fecha.date()
-                        
-                        # Los eventos institucionales son abiertos - todos pueden registrar participación
-                        # Verificar si ya registró participación en este día
-                        has_participated = (evento_act.activityId, event_date) in user_participations_activities
-                        
-                        # Solo permitir registro el día actual
-                        can_register = not has_participated and event_date == today
-                        
-                        day_data["items"].append({
-                            "id": evento_act.activityId,
-                            "item_type": "event",
-                            "type": "Evento Institucional",
-                            "title": evento_act.name,
-                            "fecha": evento_fecha.strftime("%Y-%m-%d"),
-                            "dia_semana": dia_semana,
-                            "time": hora_str,
-                            "location": evento_act.location,
-                            "color": "#6d28d9",
-                            "can_register": can_register,
-                            "has_participated": has_participated,
-                            "requires_enrollment": False  # Eventos son abiertos
-                        })
+                for evento_act, evento_fecha in eventos_por_dia.get(day, ()):
+                    hora_24 = evento_fecha.time()
+                    if hora_24.hour == 0:
+                        hora_str = f"12:{hora_24.minute:02d} a.m."
+                    elif hora_24.hour < 12:
+                        hora_str = f"{hora_24.hour}:{hora_24.minute:02d} a.m."
+                    elif hora_24.hour == 12:
+                        hora_str = f"12:{hora_24.minute:02d} p.m."
+                    else:
+                        hora_str = f"{hora_24.hour - 12}:{hora_24.minute:02d} p.m."
+                    
+                    dia_semana = weekday_map.get(evento_fecha.weekday(), "")
+                    event_date = evento_fecha.date()
+                    
+                    # Los eventos institucionales son abiertos - todos pueden registrar participación
+                    # Verificar si ya registró participación en este día
+                    has_participated = (evento_act.activityId, event_date) in user_participations_activities
+                    
+                    # Solo permitir registro el día actual
+                    can_register = not has_participated and event_date == today
+                    
+                    day_data["items"].append({
+                        "id": evento_act.activityId,
+                        "item_type": "event",
+                        "type": "Evento Institucional",
+                        "title": evento_act.name,
+                        "fecha": evento_fecha.strftime("%Y-%m-%d"),
+                        "dia_semana": dia_semana,
+                        "time": hora_str,
+                        "location": evento_act.location,
+                        "color": "#6d28d9",
+                        "can_register": can_register,
+                        "has_participated": has_participated,
+                        "requires_enrollment": False  # Eventos son abiertos
+                    })
                 
                 for torneo in torneos:
                     if torneo.start_date == day:
@@ -915,24 +865,17 @@ class ParticipationSegmentationView(LoginRequiredMixin, TemplateView):
         context = super().get_context_data(**kwargs)
         activity_type = self.request.GET.get("activity_type")
         
-        admin_group = Group.objects.filter(name='admin').first()
-        admin_user_ids = set()
-        if admin_group:
-            admin_user_ids.update(admin_group.user_set.values_list('id', flat=True))
-        admin_user_ids.update(
-            CustomUser.objects.filter(
-                Q(is_staff=True) | Q(is_superuser=True) | Q(faculty__name='CADI')
-            ).values_list('id', flat=True)
-        )
+        # Excluir usuarios admin/CADI con un NOT EXISTS (sin listas de ids)
+        is_admin = is_admin_user()
         
         # === ACTIVIDADES NORMALES Y EVENTOS INSTITUCIONALES ===
-        enrollments = Enrollment.objects.exclude(user__id__in=admin_user_ids).select_related(
+        enrollments = Enrollment.objects.exclude(is_admin).select_related(
             "activity", "schedule", "user"
         )
         
         participations = Participation.objects.filter(
             attendance_date__isnull=False
-        ).exclude(user__id__in=admin_user_ids).select_related(
+        ).exclude(is_admin).select_related(
             "activity", "schedule", "user"
         )
 
@@ -1129,7 +1072,7 @@ class ParticipationSegmentationView(LoginRequiredMixin, TemplateView):
         if show_social_events:
             # Obtener todas las inscripciones (todos los que se inscribieron)
             social_event_enrollments_all = SocialEventEnrollment.objects.exclude(
-                user__id__in=admin_user_ids
+                is_admin
             ).select_related("event", "user", "event__project")
             
             # Aplicar filtro por tipo de usuario a eventos sociales
@@ -1363,7 +1306,8 @@ def _get_segmentation_data(activity_type=None):
 
     participations_grouped = (
         participations
-        .annotate(period=TruncDate("attendance_date"))
+        # attendance_date ya es una fecha (TruncDate sobre un DateField falla en SQLite)
+        .annotate(period=F("attendance_date"))
         .values(
             "period",
             "activity__name",
@@ -1408,72 +1352,28 @@ def _get_segmentation_data(activity_type=None):
 
 class DownloadSegmentationExcelView(LoginRequiredMixin, View):
     def get(self, request):
+        # ?background=1 encola la exportación y responde con la URL de estado
+        if request.GET.get("background") == "1":
+            return enqueue_export(request, ExportKind.SEGMENTATION_XLSX)
+
         activity_type = request.GET.get("activity_type")
-        data = _get_segmentation_data(activity_type)
-
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Segmentación de Participación"
-
-        header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-        header_font = Font(bold=True, color="FFFFFF")
-
-        headers = ["Periodo", "Actividad", "Tipo", "Día", "Horario", "Total de Participantes"]
-        for col_num, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col_num)
-            cell.value = header
-            cell.fill = header_fill
-            cell.font = header_font
-
-        for row_num, row_data in enumerate(data, 2):
-            ws.cell(row=row_num, column=1, value=row_data["period"])
-            ws.cell(row=row_num, column=2, value=row_data["activity_name"])
-            ws.cell(row=row_num, column=3, value=row_data["activity_type"])
-            ws.cell(row=row_num, column=4, value=row_data["day"])
-            ws.cell(row=row_num, column=5, value=row_data["schedule"])
-            ws.cell(row=row_num, column=6, value=row_data["total_participants"])
-
-        for col in ws.columns:
-            max_length = 0
-            column = col[0].column_letter
-            for cell in col:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 50)
-            ws.column_dimensions[column].width = adjusted_width
-
-        response = HttpResponse(
-            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
-        response["Content-Disposition"] = 'attachment; filename="segmentacion_participacion.xlsx"'
-        wb.save(response)
-        return response
+        return segmentation_xlsx(activity_type).response("segmentacion_participacion.xlsx")
 
 
 class DownloadSegmentationCSVView(LoginRequiredMixin, View):
     def get(self, request):
+        if request.GET.get("background") == "1":
+            return enqueue_export(request, ExportKind.SEGMENTATION_CSV)
+
         activity_type = request.GET.get("activity_type")
-        data = _get_segmentation_data(activity_type)
 
         response = HttpResponse(content_type="text/csv; charset=utf-8")
         response["Content-Disposition"] = 'attachment; filename="segmentacion_participacion.csv"'
         response.write('\ufeff')
 
         writer = csv.writer(response)
-        writer.writerow(["Periodo", "Actividad", "Tipo", "Día", "Horario", "Total de Participantes"])
-
-        for row_data in data:
-            writer.writerow([
-                row_data["period"],
-                row_data["activity_name"],
-                row_data["activity_type"],
-                row_data["day"],
-                row_data["schedule"],
-                row_data["total_participants"],
-            ])
+        writer.writerow(SEGMENTATION_HEADERS)
+        writer.writerows(segmentation_rows(activity_type))
 
         return response
 
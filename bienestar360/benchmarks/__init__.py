@@ -0,0 +1,8 @@
+"""
+Benchmarks de las vistas y exportaciones más pesadas.
+
+`python manage.py run_benchmarks` recorre los casos de `cases.CASES` con el
+cliente de pruebas de Django sobre los datos de `generate_scale_data` y guarda
+p50/p95 de latencia, consultas y memoria pico en un JSON. Con `--compare`
+falla si algún caso empeoró más que el umbral respecto de una corrida anterior.
+"""
@@ -0,0 +1,42 @@
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from tournaments.models import Tournament
+
+
+@dataclass(frozen=True)
+class BenchmarkCase:
+    name: str
+    url_name: str
+    params: dict = field(default_factory=dict)
+    # Argumentos de la URL que dependen de los datos (p. ej. el id de un torneo)
+    url_kwargs: Optional[Callable[[], dict]] = None
+    # "admin" (personal de CADI) o "student"
+    user: str = "admin"
+
+
+def _tournament_kwargs():
+    tournament = Tournament.objects.filter(name__startswith="[scale]").order_by("pk").first()
+    if tournament is None:
+        tournament = Tournament.objects.order_by("pk").first()
+    return {"tournament_id": tournament.pk}
+
+
+CASES = [
+    *(
+        BenchmarkCase(f"filtered_reports:{mode}", "reportsAndStats:filtered_reports", {"filter": mode})
+        for mode in ("actividad", "facultad", "genero", "semestre", "año")
+    ),
+    BenchmarkCase("participation_formal_report", "reportsAndStats:participation_formal_report"),
+    BenchmarkCase(
+        "participation_formal_report:frequency",
+        "reportsAndStats:participation_formal_report",
+        {"frequency_min": "2", "frequency_max": "5"},
+    ),
+    BenchmarkCase("participation_report_export", "reportsAndStats:participation_report_export"),
+    BenchmarkCase("participation_segmentation", "participation_segmentation"),
+    BenchmarkCase("unified_calendar", "unified_calendar", user="student"),
+    BenchmarkCase("ranking", "tournaments:ranking_view", url_kwargs=_tournament_kwargs),
+    BenchmarkCase("calendar_general", "tournaments:calendar_general", user="student"),
+    BenchmarkCase("homepage_user", "homepageUser:homepageUser", user="student"),
+]
@@ -0,0 +1,133 @@
+import json
+import logging
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from benchmarks.cases import CASES
+from benchmarks.runner import compare, make_clients, run_case
+from login.models import CustomUser
+from reportsAndStats.facts import rebuild_facts
+from reportsAndStats.models import ParticipationFact
+
+
+# Fuera del prefijo "scale_": generate_scale_data lo toma como dato generado
+BENCHMARK_ADMIN = "benchmark_admin"
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide latencia (p50/p95), consultas y memoria pico de las vistas y exportaciones pesadas "
+        "sobre los datos de generate_scale_data"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=20, help="Peticiones medidas por caso")
+        parser.add_argument("--warmup", type=int, default=2, help="Peticiones sin medir antes de cada caso")
+        parser.add_argument(
+            "--warm",
+            action="store_true",
+            help=(
+                "Conserva la caché de reportes entre peticiones (mide aciertos de caché); "
+                "por defecto se invalida antes de cada petición"
+            ),
+        )
+        parser.add_argument("--case", action="append", help="Solo estos casos (repetible); por defecto todos")
+        parser.add_argument("--output", default="benchmark_results.json", help="Archivo JSON de resultados")
+        parser.add_argument("--compare", help="JSON de una corrida anterior contra el cual comparar")
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.2,
+            help="Empeoramiento tolerado en --compare (0.2 = 20%%)",
+        )
+        parser.add_argument(
+            "--generate",
+            type=float,
+            metavar="SCALE",
+            help="Genera antes los datos con generate_scale_data --scale SCALE --clear",
+        )
+        parser.add_argument("--list", action="store_true", help="Lista los casos disponibles")
+
+    def handle(self, *args, **options):
+        if options["list"]:
+            for case in CASES:
+                self.stdout.write(case.name)
+            return
+
+        cases = CASES
+        if options["case"]:
+            unknown = set(options["case"]) - {case.name for case in CASES}
+            if unknown:
+                raise CommandError(f"Casos desconocidos: {', '.join(sorted(unknown))}")
+            cases = [case for case in CASES if case.name in options["case"]]
+
+        if options["generate"] is not None:
+            call_command("generate_scale_data", scale=options["generate"], clear=True, stdout=self.stdout)
+
+        student = CustomUser.objects.filter(username__startswith="scale_0", enrollments__isnull=False).order_by("username").first()
+        if student is None:
+            raise CommandError("No hay datos de generate_scale_data; ejecute con --generate SCALE.")
+        if not ParticipationFact.objects.exists():
+            # Datos generados sin el resumen: los reportes saldrían vacíos
+            self.stdout.write(f"ParticipationFact vacía; reconstruyendo: {rebuild_facts()}")
+        admin, _ = CustomUser.objects.get_or_create(
+            username=BENCHMARK_ADMIN, defaults={"is_staff": True, "is_superuser": True},
+        )
+
+        # Una línea de log por petición ensuciaría la salida y sumaría al tiempo medido
+        query_logger = logging.getLogger("bienestar360.queries")
+        query_logger.disabled = True
+        try:
+            results = self.run_cases(cases, admin, student, options)
+        finally:
+            query_logger.disabled = False
+
+        output = {
+            "meta": {
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "database": connection.vendor,
+                "users": CustomUser.objects.count(),
+                "iterations": options["iterations"],
+                "cold": not options["warm"],
+            },
+            "results": results,
+        }
+        Path(options["output"]).write_text(json.dumps(output, indent=2, ensure_ascii=False))
+        self.stdout.write(f"Resultados guardados en {options['output']}")
+
+        failed = [name for name, result in results.items() if result.get("error")]
+        if options["compare"]:
+            baseline = json.loads(Path(options["compare"]).read_text())["results"]
+            regressions = compare(baseline, results, options["threshold"])
+            if regressions:
+                for line in regressions:
+                    self.stderr.write(line)
+                raise CommandError(f"{len(regressions)} regresiones respecto de {options['compare']}")
+            self.stdout.write(f"Sin regresiones respecto de {options['compare']}.")
+        elif failed:
+            raise CommandError(f"Casos con error: {', '.join(failed)}")
+
+        self.stdout.write(self.style.SUCCESS("Benchmark terminado."))
+
+    def run_cases(self, cases, admin, student, options):
+        results = {}
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+            clients = make_clients({"admin": admin, "student": student})
+            self.stdout.write(f"{'caso':<40} {'p50 (ms)':>9} {'p95 (ms)':>9} {'consultas':>9} {'mem (KB)':>9}")
+            for case in cases:
+                result = run_case(case, clients, options["iterations"], options["warmup"], cold=not options["warm"])
+                results[case.name] = result
+                if result.get("error"):
+                    self.stdout.write(self.style.ERROR(f"{case.name:<40} respondió {result['status']}"))
+                    continue
+                self.stdout.write(
+                    f"{case.name:<40} {result['p50_ms']:>9.1f} {result['p95_ms']:>9.1f} "
+                    f"{result['queries']:>9} {result['peak_memory_kb']:>9.0f}"
+                )
+        return results
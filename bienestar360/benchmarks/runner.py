@@ -0,0 +1,128 @@
+import math
+import statistics
+import time
+import tracemalloc
+
+from django.db import connections
+from django.test import Client
+from django.urls import reverse
+
+from bienestar360.middleware import QueryStats
+from reportsAndStats.report_cache import bump_data_version
+
+
+def _percentile(values, percent):
+    """Percentil por rango más cercano (sin interpolar), suficiente para pocas iteraciones."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
+
+
+def _request(client, url, params):
+    response = client.get(url, params)
+    # Las respuestas en streaming (exportaciones) se generan al consumirlas
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+    else:
+        response.content
+    return response
+
+
+def run_case(case, clients, iterations, warmup=1, cold=True):
+    """
+    Mide un caso: latencia de `iterations` peticiones (tras `warmup` sin medir),
+    consultas SQL de una petición y memoria Python pico (tracemalloc) en otra.
+    Con `cold` (por defecto) se sube la versión de datos antes de cada petición,
+    fuera del tiempo medido, para que los reportes se calculen y no salgan de
+    la caché. Si la primera petición no responde 200 el caso se devuelve con
+    `error` y sin métricas.
+    """
+    client = clients[case.user]
+    url = reverse(case.url_name, kwargs=case.url_kwargs() if case.url_kwargs else None)
+
+    def request():
+        return _request(client, url, case.params)
+
+    def invalidate():
+        if cold:
+            bump_data_version()
+
+    # Un caso que falla no se mide (ni llena la salida con un traceback por iteración)
+    invalidate()
+    response = request()
+    if response.status_code != 200:
+        return {"url": url, "status": response.status_code, "error": True}
+    for _ in range(warmup - 1):
+        invalidate()
+        request()
+
+    durations = []
+    for _ in range(iterations):
+        invalidate()
+        started = time.perf_counter()
+        response = request()
+        durations.append((time.perf_counter() - started) * 1000)
+
+    invalidate()
+    stats = QueryStats()
+    with connections["default"].execute_wrapper(stats):
+        request()
+
+    # tracemalloc hace más lentas las peticiones: va en una petición aparte
+    invalidate()
+    tracemalloc.start()
+    try:
+        request()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "url": url,
+        "status": response.status_code,
+        "iterations": iterations,
+        "p50_ms": round(_percentile(durations, 50), 2),
+        "p95_ms": round(_percentile(durations, 95), 2),
+        "mean_ms": round(statistics.mean(durations), 2),
+        "queries": stats.count,
+        "duplicate_queries": stats.duplicates,
+        "peak_memory_kb": round(peak / 1024, 1),
+    }
+
+
+def make_clients(users):
+    """Un cliente con sesión iniciada por cada rol: {"admin": user, "student": user}."""
+    clients = {}
+    for role, user in users.items():
+        # Los errores de las vistas llegan como respuestas 500, no como excepciones
+        client = Client(raise_request_exception=False)
+        client.force_login(user)
+        clients[role] = client
+    return clients
+
+
+# Métricas comparadas contra la corrida anterior. Las consultas no dependen del
+# ruido de la máquina: cualquier aumento es una regresión.
+TIMED_METRICS = ("p50_ms", "p95_ms", "peak_memory_kb")
+
+
+def compare(baseline, current, threshold):
+    """
+    Regresiones de `current` respecto de `baseline` (ambos {caso: métricas}).
+    `threshold` es la fracción tolerada, p. ej. 0.2 = hasta 20% peor.
+    """
+    regressions = []
+    for name, metrics in current.items():
+        previous = baseline.get(name)
+        if metrics.get("error"):
+            regressions.append(f"{name}: respondió {metrics['status']}")
+            continue
+        if previous is None or previous.get("error"):
+            continue
+        for metric in TIMED_METRICS:
+            before, after = previous.get(metric), metrics.get(metric)
+            if before and after is not None and after > before * (1 + threshold):
+                regressions.append(f"{name}: {metric} {before} -> {after} (+{(after / before - 1) * 100:.0f}%)")
+        if metrics["queries"] > previous.get("queries", metrics["queries"]):
+            regressions.append(f"{name}: queries {previous['queries']} -> {metrics['queries']}")
+    return regressions
@@ -0,0 +1,122 @@
+import io
+import json
+import logging
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from benchmarks.cases import CASES
+from benchmarks.management.commands.run_benchmarks import BENCHMARK_ADMIN
+from benchmarks.runner import compare
+from login.models import CustomUser
+from reportsAndStats.models import ParticipationFact
+from reportsAndStats.report_cache import get_data_version
+
+
+class CompareTests(TestCase):
+    """Pruebas de la detección de regresiones entre corridas"""
+
+    baseline = {
+        "ranking": {"p50_ms": 10.0, "p95_ms": 20.0, "peak_memory_kb": 100.0, "queries": 5},
+    }
+
+    def _current(self, **changes):
+        return {"ranking": {**self.baseline["ranking"], **changes}}
+
+    def test_within_threshold(self):
+        """Test que un empeoramiento menor al umbral no es una regresión"""
+        self.assertEqual(compare(self.baseline, self._current(p95_ms=23.9), 0.2), [])
+
+    def test_slower_than_threshold(self):
+        """Test que superar el umbral de latencia o memoria es una regresión"""
+        regressions = compare(self.baseline, self._current(p95_ms=24.1, peak_memory_kb=200.0), 0.2)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(regressions[0].startswith("ranking: p95_ms 20.0 -> 24.1"))
+
+    def test_any_extra_query_is_a_regression(self):
+        """Test que cualquier consulta adicional es una regresión, sin importar el umbral"""
+        self.assertEqual(compare(self.baseline, self._current(queries=6), 10), ["ranking: queries 5 -> 6"])
+
+    def test_new_cases_are_ignored(self):
+        """Test que los casos sin línea base no se comparan"""
+        self.assertEqual(compare({}, self._current(p95_ms=999), 0.2), [])
+
+
+class RunBenchmarksCommandTests(TestCase):
+    """Pruebas del comando run_benchmarks sobre un conjunto de datos mínimo"""
+
+    def setUp(self):
+        call_command("generate_scale_data", "--scale", "0.02", stdout=io.StringIO())
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.output = Path(directory) / "results.json"
+
+    def _run(self, *args):
+        call_command(
+            "run_benchmarks", "--iterations", "2", "--warmup", "1",
+            "--case", "homepage_user", "--case", "ranking",
+            "--output", str(self.output), *args, stdout=io.StringIO(), stderr=io.StringIO(),
+        )
+        return json.loads(self.output.read_text())
+
+    def test_writes_results(self):
+        """Test que el comando guarda latencia, consultas y memoria de cada caso"""
+        results = self._run()["results"]
+        self.assertEqual(sorted(results), ["homepage_user", "ranking"])
+        for metrics in results.values():
+            self.assertEqual(metrics["status"], 200)
+            self.assertLessEqual(metrics["p50_ms"], metrics["p95_ms"])
+            self.assertGreater(metrics["queries"], 0)
+            self.assertGreater(metrics["peak_memory_kb"], 0)
+
+    def test_compare_fails_on_regression(self):
+        """Test que --compare falla si una corrida anterior tenía menos consultas"""
+        baseline = self._run()
+        baseline["results"]["ranking"]["queries"] = 0
+        baseline_path = self.output.with_name("baseline.json")
+        baseline_path.write_text(json.dumps(baseline))
+        with self.assertRaisesMessage(CommandError, "regresiones"):
+            self._run("--compare", str(baseline_path))
+
+    def test_cold_by_default(self):
+        """Test que por defecto cada petición invalida la caché de reportes y --warm la conserva"""
+        before = get_data_version()
+        self.assertTrue(self._run()["meta"]["cold"])
+        after = get_data_version()
+        self.assertNotEqual(before, after)
+
+        self.assertFalse(self._run("--warm")["meta"]["cold"])
+        self.assertEqual(get_data_version(), after)
+
+    def test_admin_is_not_generated_data(self):
+        """Test que el admin del benchmark no cuenta como dato de generate_scale_data"""
+        self._run()
+        call_command("generate_scale_data", "--clear", "--scale", "0.02", stdout=io.StringIO())
+        self.assertTrue(CustomUser.objects.filter(username=BENCHMARK_ADMIN).exists())
+
+    def test_rebuilds_missing_facts(self):
+        """Test que el comando reconstruye el resumen de participación si está vacío"""
+        ParticipationFact.objects.all().delete()
+        self._run()
+        self.assertTrue(ParticipationFact.objects.exists())
+
+    def test_query_log_is_restored(self):
+        """Test que el logger de consultas vuelve a quedar activo al terminar"""
+        self._run()
+        self.assertFalse(logging.getLogger("bienestar360.queries").disabled)
+
+    def test_unknown_case(self):
+        """Test que un caso inexistente se rechaza"""
+        with self.assertRaises(CommandError):
+            call_command("run_benchmarks", "--case", "no_existe", stdout=io.StringIO())
+
+    def test_cases_cover_hot_views(self):
+        """Test que los casos cubren cada modo de los reportes filtrados"""
+        names = {case.name for case in CASES}
+        self.assertIn("participation_segmentation", names)
+        for mode in ("actividad", "facultad", "genero", "semestre", "año"):
+            self.assertIn(f"filtered_reports:{mode}", names)
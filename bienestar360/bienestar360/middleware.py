@@ -0,0 +1,157 @@
+"""
+Instrumentación de consultas SQL por petición.
+
+`QueryBudgetMiddleware` envuelve la ejecución de SQL de todas las conexiones
+(`connection.execute_wrapper`) y por cada petición:
+
+- cuenta las consultas y suma el tiempo en la base de datos;
+- detecta SQL repetido con distintos parámetros (la firma de un N+1);
+- agrega el header `Server-Timing` (visible en las herramientas del navegador);
+- escribe una línea de log JSON en el logger `bienestar360.queries`;
+- registra un warning si la vista supera su presupuesto de `QUERY_BUDGETS`
+  (por nombre de URL, p. ej. `"reportsAndStats:filtered_reports"`).
+
+En las respuestas en streaming (exportaciones) la mayoría de las consultas
+ocurren mientras el servidor consume el contenido, después de que la vista
+retornó. Por eso el contenido se envuelve: cada bloque se genera con el
+contador activo y la línea de log se escribe al terminar el envío. El header
+`Server-Timing` sale antes que el cuerpo, así que en esas respuestas solo
+refleja lo ejecutado por la vista.
+"""
+import json
+import logging
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger("bienestar360.queries")
+
+# Repeticiones del mismo SQL a partir de las cuales se marca como N+1
+DEFAULT_N_PLUS_ONE_THRESHOLD = 5
+
+
+class QueryStats:
+    """Wrapper de ejecución que acumula las métricas de una petición."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.statements[sql] += 1
+
+    @property
+    def duplicates(self):
+        """Ejecuciones de SQL que ya se había ejecutado en la misma petición."""
+        return sum(times - 1 for times in self.statements.values() if times > 1)
+
+    def most_repeated(self):
+        if not self.statements:
+            return None, 0
+        return self.statements.most_common(1)[0]
+
+
+def query_budget(view_name):
+    """Presupuesto configurado para la vista: {'queries': n, 'db_ms': n} (claves opcionales)."""
+    if not view_name:
+        return None
+    return getattr(settings, "QUERY_BUDGETS", {}).get(view_name)
+
+
+def _counting(stats):
+    stack = ExitStack()
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(stats))
+    return stack
+
+
+class QueryBudgetMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = QueryStats()
+        start = time.perf_counter()
+        with _counting(stats):
+            response = self.get_response(request)
+        total = time.perf_counter() - start
+
+        match = getattr(request, "resolver_match", None)
+        view_name = match.view_name if match else None
+        if view_name is None and stats.count == 0:
+            # Archivos estáticos y similares: nada que medir
+            return response
+
+        db_ms = round(stats.duration * 1000, 2)
+        response["Server-Timing"] = (
+            f'db;dur={db_ms};desc="{stats.count} queries, {stats.duplicates} duplicated", '
+            f'total;dur={round(total * 1000, 2)}'
+        )
+        if response.streaming and not response.is_async:
+            response.streaming_content = self._counted_stream(
+                response.streaming_content, request, response, view_name, stats, start
+            )
+        else:
+            self._log(request, response, view_name, stats, total)
+        return response
+
+    def _counted_stream(self, content, request, response, view_name, stats, start):
+        # El contador se activa solo mientras se genera cada bloque: entre
+        # bloques el hilo puede atender otras cosas
+        iterator = iter(content)
+        try:
+            while True:
+                with _counting(stats):
+                    try:
+                        chunk = next(iterator)
+                    except StopIteration:
+                        break
+                yield chunk
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+            self._log(request, response, view_name, stats, time.perf_counter() - start)
+
+    def _log(self, request, response, view_name, stats, total):
+        db_ms = round(stats.duration * 1000, 2)
+        threshold = getattr(settings, "QUERY_N_PLUS_ONE_THRESHOLD", DEFAULT_N_PLUS_ONE_THRESHOLD)
+        repeated_sql, repeated_times = stats.most_repeated()
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "view": view_name,
+            "status": response.status_code,
+            "queries": stats.count,
+            "db_ms": db_ms,
+            "total_ms": round(total * 1000, 2),
+            "duplicates": stats.duplicates,
+            "n_plus_one": repeated_times >= threshold,
+        }
+        if record["n_plus_one"]:
+            record["repeated_sql"] = repeated_sql[:300]
+            record["repeated_times"] = repeated_times
+
+        exceeded = []
+        budget = query_budget(view_name)
+        if budget:
+            if "queries" in budget and stats.count > budget["queries"]:
+                exceeded.append(f"queries {stats.count} > {budget['queries']}")
+            if "db_ms" in budget and db_ms > budget["db_ms"]:
+                exceeded.append(f"db_ms {db_ms} > {budget['db_ms']}")
+
+        if exceeded:
+            record["budget_exceeded"] = exceeded
+            logger.warning(json.dumps(record))
+        else:
+            logger.info(json.dumps(record))
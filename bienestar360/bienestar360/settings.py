@@ -37,9 +37,12 @@ INSTALLED_APPS = [
     'UserPreference',
     'reportsAndStats',
     'templatetags',
+    'benchmarks',
 ]
 
 MIDDLEWARE = [
+    # Primero, para medir las consultas de todos los demás middlewares y la vista
+    'bienestar360.middleware.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -107,3 +110,63 @@ EMAIL_USE_TLS = True
 EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER")
 EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
 DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL", EMAIL_HOST_USER)
+# Segundos máximos por operación SMTP (para que deliver_outbox no quede colgado)
+EMAIL_TIMEOUT = int(os.getenv("EMAIL_TIMEOUT", "30"))
+# Tabla de salida de correos (activities.outbox): intentos antes de descartar
+# un correo y espera del primer reintento (se duplica en cada fallo)
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv("EMAIL_OUTBOX_MAX_ATTEMPTS", "5"))
+EMAIL_OUTBOX_RETRY_SECONDS = int(os.getenv("EMAIL_OUTBOX_RETRY_SECONDS", "60"))
+# Raíz absoluta para los enlaces de correos enviados fuera de una petición
+# (p. ej. process_enrollment_queue)
+SITE_URL = os.getenv("SITE_URL", "http://localhost:8000")
+
+# Exportaciones en segundo plano (reportsAndStats.ExportJob)
+EXPORT_ARTIFACT_DIR = Path(os.getenv("EXPORT_ARTIFACT_DIR", BASE_DIR / "export_artifacts"))
+EXPORT_ARTIFACT_TTL_HOURS = int(os.getenv("EXPORT_ARTIFACT_TTL_HOURS", "24"))
+# Exportación incremental (reportsAndStats.delta): espera antes de entregar una
+# fila (mayor que la transacción más larga) y días que se guardan los borrados
+DELTA_EXPORT_SETTLE_SECONDS = int(os.getenv("DELTA_EXPORT_SETTLE_SECONDS", "60"))
+DELTA_EXPORT_TOMBSTONE_DAYS = int(os.getenv("DELTA_EXPORT_TOMBSTONE_DAYS", "90"))
+
+# Caché (resultados de reportes, roles). LocMemCache solo sirve con un único
+# proceso; con varios workers usar un backend compartido, p. ej.
+# CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache y
+# CACHE_LOCATION=/var/tmp/bienestar360_cache
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
+    }
+}
+REPORT_CACHE_TIMEOUT = int(os.getenv("REPORT_CACHE_TIMEOUT", "3600"))
+# Fracción de consultas de reportes que se cuentan en report_cache_stats; por
+# debajo de 1 los aciertos y fallos son estimaciones (1 = conteo exacto)
+REPORT_CACHE_STATS_SAMPLE = float(os.getenv("REPORT_CACHE_STATS_SAMPLE", "0.02"))
+# Snapshot analítico en memoria para el reporte formal (reportsAndStats.analytics).
+# Requiere NumPy (no está en requirements.txt: instalarlo aparte para activarlo)
+# y un CACHE_BACKEND compartido; con LocMemCache queda desactivado
+REPORT_ANALYTICS_SNAPSHOT = os.getenv("REPORT_ANALYTICS_SNAPSHOT", "0") == "1"
+
+# Instrumentación de consultas por petición (bienestar360.middleware).
+# Presupuestos por nombre de URL: al superarlos se registra un warning en el
+# logger "bienestar360.queries". db_ms es opcional.
+QUERY_BUDGETS = {
+    "unified_calendar": {"queries": 15, "db_ms": 500},
+    "reportsAndStats:filtered_reports": {"queries": 10, "db_ms": 1000},
+}
+# Repeticiones del mismo SQL en una petición a partir de las cuales se marca N+1
+QUERY_N_PLUS_ONE_THRESHOLD = int(os.getenv("QUERY_N_PLUS_ONE_THRESHOLD", "5"))
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "bienestar360.queries": {
+            "handlers": ["console"],
+            "level": os.getenv("QUERY_LOG_LEVEL", "INFO"),
+        },
+    },
+}
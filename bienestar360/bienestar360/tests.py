@@ -0,0 +1,89 @@
+import json
+import re
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from django.contrib.auth import get_user_model
+
+from activities.models import Activity, Enrollment, ActivityType, CategoryType
+from bienestar360.middleware import QueryStats
+
+
+class QueryBudgetMiddlewareTests(TestCase):
+    """Pruebas de la instrumentación de consultas por petición."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client = Client()
+        self.url = reverse("reportsAndStats:filtered_reports")
+
+    def _records(self, logs):
+        return [json.loads(record.getMessage()) for record in logs.records]
+
+    def test_server_timing_and_log_line(self):
+        """Test: La respuesta trae Server-Timing y se registra una línea JSON con las métricas."""
+        with self.assertLogs("bienestar360.queries", level="INFO") as logs:
+            response = self.client.get(self.url, {"filter": "semestre"})
+
+        self.assertRegex(response["Server-Timing"], r'^db;dur=[\d.]+;desc="\d+ queries, \d+ duplicated", total;dur=[\d.]+$')
+        record = self._records(logs)[-1]
+        self.assertEqual(record["view"], "reportsAndStats:filtered_reports")
+        self.assertEqual(record["status"], 200)
+        self.assertGreater(record["queries"], 0)
+        self.assertNotIn("budget_exceeded", record)
+
+    @override_settings(QUERY_BUDGETS={"reportsAndStats:filtered_reports": {"queries": 0}})
+    def test_budget_exceeded_logs_warning(self):
+        """Test: Superar el presupuesto de consultas de la vista registra un warning."""
+        with self.assertLogs("bienestar360.queries", level="WARNING") as logs:
+            self.client.get(self.url, {"filter": "semestre"})
+
+        self.assertEqual(logs.records[-1].levelname, "WARNING")
+        self.assertTrue(self._records(logs)[-1]["budget_exceeded"][0].startswith("queries "))
+
+    @override_settings(QUERY_N_PLUS_ONE_THRESHOLD=1)
+    def test_n_plus_one_in_log(self):
+        """Test: La línea de log incluye el SQL repetido cuando alcanza el umbral."""
+        with self.assertLogs("bienestar360.queries", level="INFO") as logs:
+            self.client.get(self.url, {"filter": "semestre"})
+
+        record = self._records(logs)[-1]
+        self.assertTrue(record["n_plus_one"])
+        self.assertIn("SELECT", record["repeated_sql"])
+
+    def test_repeated_sql_is_flagged(self):
+        """Test: El mismo SQL repetido con distintos parámetros se marca como N+1."""
+        stats = QueryStats()
+        with connection.execute_wrapper(stats):
+            for pk in range(4):
+                list(Activity.objects.filter(pk=pk))
+            Activity.objects.create(name="Yoga", type=ActivityType.DEPORTIVA, category=CategoryType.GRUPAL)
+
+        self.assertEqual(stats.count, 5)
+        self.assertEqual(stats.duplicates, 3)
+        sql, times = stats.most_repeated()
+        self.assertIn("activities_activity", sql)
+        self.assertEqual(times, 4)
+
+    def test_streaming_queries_are_counted(self):
+        """Test: En una descarga en streaming se cuentan también las consultas hechas al enviar el contenido."""
+        student = get_user_model().objects.create_user(username="student", password="pass1234")
+        activity = Activity.objects.create(name="Yoga", type=ActivityType.DEPORTIVA, category=CategoryType.GRUPAL)
+        Enrollment.objects.create(user=student, activity=activity)
+
+        with self.assertLogs("bienestar360.queries", level="INFO") as logs:
+            response = self.client.get(reverse("reportsAndStats:participation_report_export"))
+            self.assertTrue(response.streaming)
+            self.assertEqual(logs.records, [])
+            b"".join(response.streaming_content)
+            response.close()
+
+        header_queries = int(re.search(r'"(\d+) queries', response["Server-Timing"]).group(1))
+        records = self._records(logs)
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]["view"], "reportsAndStats:participation_report_export")
+        self.assertGreater(records[0]["queries"], header_queries)
@@ -5,6 +5,14 @@ class LoginConfig(AppConfig):
     name = 'login'
 
     def ready(self):
-        from django.db.models.signals import post_migrate
-        from .signals import create_initial_data
-        post_migrate.connect(create_initial_data, sender=self)
\ No newline at end of file
+        from django.contrib.auth.models import Group
+        from django.db.models.signals import post_migrate, post_save, post_delete, m2m_changed
+        from .models import CustomUser
+        from .signals import create_initial_data, user_saved, user_groups_changed, roles_source_changed
+        post_migrate.connect(create_initial_data, sender=self)
+
+        post_save.connect(user_saved, sender=CustomUser)
+        post_delete.connect(roles_source_changed, sender=CustomUser)
+        m2m_changed.connect(user_groups_changed, sender=CustomUser.groups.through)
+        post_save.connect(roles_source_changed, sender=Group)
+        post_delete.connect(roles_source_changed, sender=Group)
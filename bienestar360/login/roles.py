@@ -0,0 +1,64 @@
+"""
+Servicio de pertenencia a roles.
+
+Un usuario "admin" (excluido de reportes y estadísticas) es quien está en el
+grupo `admin`, es staff o superusuario, o pertenece a la facultad CADI.
+
+Para filtrar consultas se usa `is_admin_user()`, un `Exists` correlacionado,
+así la base de datos resuelve la exclusión sin recibir listas de ids.
+`get_admin_user_ids()` queda para comprobaciones en Python y se guarda en
+caché; las señales de `login.signals` la invalidan.
+"""
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef, Q
+
+
+ADMIN_GROUP_NAME = "admin"
+ADMIN_FACULTY_NAME = "CADI"
+
+ADMIN_IDS_CACHE_KEY = "roles:admin_user_ids"
+# Tope de vigencia por si la caché no es compartida entre procesos
+ADMIN_IDS_CACHE_TIMEOUT = 300
+
+
+def admin_users_q():
+    """Condición sobre `CustomUser` que identifica a los usuarios admin."""
+    return (
+        Q(groups__name=ADMIN_GROUP_NAME)
+        | Q(is_staff=True)
+        | Q(is_superuser=True)
+        | Q(faculty__name=ADMIN_FACULTY_NAME)
+    )
+
+
+def admin_users():
+    """QuerySet (sin duplicados) de los usuarios admin."""
+    from .models import CustomUser
+    return CustomUser.objects.filter(admin_users_q()).distinct()
+
+
+def is_admin_user(user_ref="user"):
+    """
+    Expresión `Exists` que indica si el usuario referenciado es admin.
+
+    `user_ref` es el campo de la consulta externa que apunta al usuario:
+    `"user"` para inscripciones, asistencias, reseñas, etc. y `"pk"` para
+    consultas sobre `CustomUser`. Uso: `qs.exclude(is_admin_user())`.
+    """
+    from .models import CustomUser
+    return Exists(
+        CustomUser.objects.filter(admin_users_q(), pk=OuterRef(user_ref))
+    )
+
+
+def get_admin_user_ids():
+    """Ids de los usuarios admin (en caché)."""
+    admin_ids = cache.get(ADMIN_IDS_CACHE_KEY)
+    if admin_ids is None:
+        admin_ids = frozenset(admin_users().values_list("pk", flat=True))
+        cache.set(ADMIN_IDS_CACHE_KEY, admin_ids, ADMIN_IDS_CACHE_TIMEOUT)
+    return admin_ids
+
+
+def invalidate_admin_users():
+    cache.delete(ADMIN_IDS_CACHE_KEY)
@@ -106,3 +106,25 @@ def create_initial_data(sender, **kwargs):
                 is_superuser=True
             )
             adminuser.groups.add(admin_group)
+
+
+# Invalidación de la caché de usuarios admin (login.roles)
+
+def user_saved(sender, instance, update_fields=None, **kwargs):
+    # Guardar solo last_login (cada inicio de sesión) no cambia los roles
+    if update_fields is not None and set(update_fields) <= {"last_login"}:
+        return
+    from .roles import invalidate_admin_users
+    invalidate_admin_users()
+
+
+def user_groups_changed(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        from .roles import invalidate_admin_users
+        invalidate_admin_users()
+
+
+def roles_source_changed(sender, **kwargs):
+    # Usuarios/grupos eliminados o grupos renombrados
+    from .roles import invalidate_admin_users
+    invalidate_admin_users()
@@ -5,6 +5,8 @@ from django.contrib.auth.models import Group, Permission
 from login.models import Faculty
 from login.forms import CustomUserCreationForm, CustomAuthenticationForm
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from login.roles import get_admin_user_ids, is_admin_user
 
 User = get_user_model()
 
@@ -190,3 +192,50 @@ class AuthTests(TestCase):
         form = CustomAuthenticationForm()
         self.assertEqual(form.fields["username"].label, "Usuario")
         self.assertEqual(form.fields["password"].label, "Contraseña")
+
+
+class RoleServiceTests(TestCase):
+    """Servicio de roles: caché de usuarios admin y exclusión con Exists."""
+
+    def setUp(self):
+        cache.clear()
+        self.User = get_user_model()
+        self.user = self.User.objects.create_user(username="student", password="pass1234")
+        self.admin_group, _ = Group.objects.get_or_create(name="admin")
+
+    def test_admin_ids_are_cached(self):
+        get_admin_user_ids()
+        with self.assertNumQueries(0):
+            get_admin_user_ids()
+
+    def test_group_membership_invalidates_cache(self):
+        self.assertNotIn(self.user.pk, get_admin_user_ids())
+        self.user.groups.add(self.admin_group)
+        self.assertIn(self.user.pk, get_admin_user_ids())
+        self.admin_group.user_set.remove(self.user)
+        self.assertNotIn(self.user.pk, get_admin_user_ids())
+
+    def test_user_save_invalidates_cache(self):
+        get_admin_user_ids()
+        self.user.is_staff = True
+        self.user.save()
+        self.assertIn(self.user.pk, get_admin_user_ids())
+
+    def test_last_login_save_keeps_cache(self):
+        get_admin_user_ids()
+        self.client.login(username="student", password="pass1234")
+        with self.assertNumQueries(0):
+            get_admin_user_ids()
+
+    def test_exclusion_is_a_subquery(self):
+        self.user.groups.add(self.admin_group)
+        other = self.User.objects.create_user(username="other", password="pass1234")
+        queryset = self.User.objects.exclude(is_admin_user("pk"))
+        sql = str(queryset.query)
+        self.assertIn("EXISTS", sql)
+        self.assertNotIn(f"IN ({self.user.pk}", sql)
+        self.assertIn(other, queryset)
+        self.assertNotIn(self.user, queryset)
+        # adminuser (staff y facultad CADI) se crea con post_migrate
+        self.assertFalse(queryset.filter(username="adminuser").exists())
+
@@ -0,0 +1,273 @@
+"""
+Agregaciones compartidas por los reportes.
+
+Las de la tabla de reportes (`download_table_excel` y `download_table_csv`)
+resuelven cada agrupación con una sola consulta `GROUP BY`, sin importar
+cuántas actividades, facultades o géneros existan.
+"""
+from django.db.models import Avg, Case, CharField, Count, Exists, IntegerField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+from activities.models import Activity, ActivityReview, Enrollment, Participation, Schedule
+from login.models import CustomUser, Faculty
+from login.roles import is_admin_user
+from .facts import fact_grand_totals
+
+
+TABLE_FILTERS = ['actividad', 'facultad', 'genero']
+
+# Rangos del histograma de frecuencia: (etiqueta, máximo de inscripciones)
+FREQUENCY_RANGES = (('1-5', 5), ('6-10', 10), ('11-20', 20), ('21-50', 50))
+FREQUENCY_RANGE_OVERFLOW = '50+'
+
+
+def _by_activity():
+    # Participación y actividades son ambas el total de inscripciones de la actividad
+    rows = (
+        Activity.objects
+        .annotate(total_enrollments=Count('enrollments'))
+        .order_by('activityId')
+        .values_list('name', 'total_enrollments')
+    )
+    return [(name, total, total) for name, total in rows]
+
+
+def _by_faculty():
+    # La cadena faculty -> users -> enrollments da una fila por inscripción,
+    # por eso los usuarios se cuentan con distinct
+    rows = (
+        Faculty.objects
+        .annotate(
+            total_users=Count('users', distinct=True),
+            total_enrollments=Count('users__enrollments'),
+        )
+        .order_by('id')
+        .values_list('name', 'total_users', 'total_enrollments')
+    )
+    return list(rows)
+
+
+def _by_gender():
+    rows = (
+        CustomUser.objects
+        .exclude(gender__isnull=True)
+        .exclude(gender='')
+        .values('gender')
+        .annotate(
+            total_users=Count('id', distinct=True),
+            total_enrollments=Count('enrollments'),
+        )
+        .order_by('gender')
+        .values_list('gender', 'total_users', 'total_enrollments')
+    )
+    return list(rows)
+
+
+_TABLE_AGGREGATIONS = {
+    'actividad': _by_activity,
+    'facultad': _by_faculty,
+    'genero': _by_gender,
+}
+
+
+def participation_table(selected_filter):
+    """
+    Devuelve las filas de la tabla de participación para la agrupación dada
+    como un dict {clave: {'participacion': n, 'actividades': n}}.
+
+    Lanza `ValueError` si la agrupación no es una de `TABLE_FILTERS`.
+    """
+    if selected_filter not in _TABLE_AGGREGATIONS:
+        raise ValueError(f"Filtro no soportado: {selected_filter}")
+
+    data = {}
+    for key, participacion, actividades in _TABLE_AGGREGATIONS[selected_filter]():
+        data[key] = {
+            'participacion': participacion,
+            'actividades': actividades,
+        }
+    return data
+
+
+def participation_table_rows(selected_filter):
+    """
+    Filas listas para escribir (encabezado incluido) en CSV o Excel.
+    Si no hay datos se agrega una fila indicándolo.
+    """
+    data = participation_table(selected_filter)
+    rows = [[selected_filter.title(), 'Participación', 'Actividades']]
+    if data:
+        for key, info in data.items():
+            rows.append([str(key) if key else 'N/A', info['participacion'], info['actividades']])
+    else:
+        rows.append(['No hay datos disponibles', 0, 0])
+    return rows
+
+
+def _count_per_user(queryset):
+    # Subconsulta correlacionada: cantidad de filas del usuario de la consulta externa
+    return Coalesce(
+        Subquery(
+            queryset.filter(user=OuterRef('pk'))
+            .order_by()
+            .values('user')
+            .annotate(total=Count('pk'))
+            .values('total'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def headline_metrics(filters):
+    """
+    Métricas principales del reporte formal en una sola consulta.
+
+    Cada usuario que cumple los filtros se anota con sus inscripciones y
+    asistencias filtradas, y se agrega con conteos condicionales. Devuelve
+    `total_enrollments`, `total_participations` y `total_users` (usuarios con
+    al menos una inscripción).
+    """
+    users = CustomUser.objects.filter(filters.user_q()).annotate(
+        enrollment_total=_count_per_user(Enrollment.objects.filter(filters.enrollment_activity_q())),
+        participation_total=_count_per_user(Participation.objects.filter(filters.participation_activity_q())),
+    )
+    return users.aggregate(
+        total_enrollments=Coalesce(Sum('enrollment_total'), 0),
+        total_participations=Coalesce(Sum('participation_total'), 0),
+        total_users=Count('pk', filter=Q(enrollment_total__gt=0)),
+    )
+
+
+def frequency_histogram(filters):
+    """
+    Usuarios por rango de inscripciones (`FREQUENCY_RANGES`), calculado en la
+    base de datos con un `CASE` sobre el conteo de cada usuario. Solo cuenta
+    usuarios con al menos una inscripción; los rangos vacíos no aparecen.
+    """
+    frequency_range = Case(
+        *[When(enrollment_total__lte=upper, then=Value(label)) for label, upper in FREQUENCY_RANGES],
+        default=Value(FREQUENCY_RANGE_OVERFLOW),
+        output_field=CharField(),
+    )
+    rows = (
+        CustomUser.objects.filter(filters.user_q())
+        .annotate(enrollment_total=_count_per_user(Enrollment.objects.filter(filters.enrollment_activity_q())))
+        .filter(enrollment_total__gt=0)
+        .annotate(frequency_range=frequency_range)
+        .order_by()
+        .values('frequency_range')
+        .annotate(users=Count('pk'))
+    )
+    counts = {row['frequency_range']: row['users'] for row in rows}
+    labels = [label for label, _ in FREQUENCY_RANGES] + [FREQUENCY_RANGE_OVERFLOW]
+    return {label: counts[label] for label in labels if label in counts}
+
+
+def _per_activity(queryset, aggregate):
+    # Subconsulta correlacionada: `aggregate` sobre las filas de la actividad de la consulta externa
+    return Coalesce(
+        Subquery(
+            queryset.filter(activity=OuterRef('pk'))
+            .order_by()
+            .values('activity')
+            .annotate(total=aggregate)
+            .values('total'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def activity_ranking(filters, limit=10):
+    """
+    Actividades con más inscripciones filtradas, en una sola consulta.
+
+    Cada actividad (agrupada por `activityId`, no por nombre) se anota con sus
+    inscripciones, usuarios únicos y asistencias filtradas. `limit=None`
+    devuelve todas las actividades con al menos una inscripción; el tamaño no
+    cambia la cantidad de consultas.
+    """
+    enrollments = Enrollment.objects.filter(filters.enrollment_q())
+    rows = (
+        Activity.objects
+        .annotate(
+            enrollment_count=_per_activity(enrollments, Count('pk')),
+            unique_users=_per_activity(enrollments, Count('user', distinct=True)),
+            participation_count=_per_activity(Participation.objects.filter(filters.participation_q()), Count('pk')),
+        )
+        .filter(enrollment_count__gt=0)
+        # activityId desempata para que el orden sea estable
+        .order_by('-enrollment_count', 'activityId')
+        .values_list('activityId', 'name', 'type', 'enrollment_count', 'unique_users', 'participation_count')
+    )
+    if limit is not None:
+        rows = rows[:limit]
+    # Mismas claves que usaban las tablas del reporte cuando agrupaban por nombre
+    return [
+        {
+            'activityId': activity_id,
+            'activity__name': name,
+            'activity__type': activity_type,
+            'enrollment_count': enrollment_count,
+            'unique_users': unique_users,
+            'participation_count': participation_count,
+        }
+        for activity_id, name, activity_type, enrollment_count, unique_users, participation_count in rows
+    ]
+
+
+def general_dashboard():
+    """
+    Métricas del panel general (`GeneralReportsView`) con una cantidad fija de
+    consultas: un `aggregate` por modelo y una consulta agrupada de facultades,
+    sin importar cuántas facultades, actividades o usuarios existan.
+    """
+    users = CustomUser.objects.exclude(is_admin_user('pk'))
+    activities = Activity.objects.aggregate(
+        total=Count('pk'),
+        published=Count('pk', filter=Q(is_published=True)),
+        requires_registration=Count('pk', filter=Q(requires_registration=True)),
+        with_participants=Count('pk', filter=Q(Exists(Enrollment.objects.filter(activity=OuterRef('pk'))))),
+    )
+    reviews = ActivityReview.objects.aggregate(
+        total=Count('pk'),
+        avg_rating=Avg('rating'),
+        unread=Count('pk', filter=Q(is_read=False)),
+    )
+    # Usuarios por facultad (incluye admins, como el conteo `faculty.users`)
+    faculties = list(
+        Faculty.objects.annotate(user_count=Count('users')).order_by('pk').values('id', 'name', 'user_count')
+    )
+    total_enrollments = fact_grand_totals()['enrollments']
+
+    return {
+        'total_users': users.count(),
+        'total_faculties': len(faculties),
+        'total_activities': activities['total'],
+        'total_enrollments': total_enrollments,
+        'total_schedules': Schedule.objects.count(),
+        'total_reviews': reviews['total'],
+        'published_activities': activities['published'],
+        'requires_registration': activities['requires_registration'],
+        'activities_with_participants': activities['with_participants'],
+        'avg_enrollments_per_activity': (
+            round(total_enrollments / activities['total'], 2) if activities['total'] > 0 else 0
+        ),
+        'avg_rating': round(reviews['avg_rating'] or 0, 2),
+        'unread_reviews': reviews['unread'],
+        'users_sample': list(users.values('id', 'username', 'first_name', 'last_name')[:8]),
+        'faculties_sample': [{'id': row['id'], 'name': row['name']} for row in faculties[:8]],
+        'activities_sample': list(Activity.objects.values('activityId', 'name', 'type', 'category')[:8]),
+        'top_activities': list(
+            Activity.objects.annotate(num_participants=Count('enrollments'))
+            .order_by('-num_participants')
+            .values('activityId', 'name', 'num_participants')[:10]
+        ),
+        'faculty_distribution': {row['name']: row['user_count'] for row in faculties},
+        'top_users': list(
+            users.annotate(num_enrollments=Count('enrollments'))
+            .order_by('-num_enrollments')
+            .values('id', 'username', 'num_enrollments')[:5]
+        ),
+    }
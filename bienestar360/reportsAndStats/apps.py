@@ -4,3 +4,28 @@ from django.apps import AppConfig
 class ReportsandstatsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'reportsAndStats'
+
+    def ready(self):
+        from django.db.models.signals import pre_save, post_save, post_delete, m2m_changed
+        from activities.models import Activity, ActivityReview, Enrollment, Participation, Schedule
+        from login.models import CustomUser, Faculty
+        from . import signals
+
+        pre_save.connect(signals.enrollment_pre_save, sender=Enrollment)
+        post_save.connect(signals.enrollment_saved, sender=Enrollment)
+        post_delete.connect(signals.enrollment_deleted, sender=Enrollment)
+        pre_save.connect(signals.participation_pre_save, sender=Participation)
+        post_save.connect(signals.participation_saved, sender=Participation)
+        post_delete.connect(signals.participation_deleted, sender=Participation)
+        post_delete.connect(signals.record_deleted, sender=Enrollment)
+        post_delete.connect(signals.record_deleted, sender=Participation)
+        post_save.connect(signals.activity_saved, sender=Activity)
+        pre_save.connect(signals.user_pre_save, sender=CustomUser)
+        post_save.connect(signals.user_saved, sender=CustomUser)
+        m2m_changed.connect(signals.user_groups_changed, sender=CustomUser.groups.through)
+
+        # Invalidación de la caché de resultados de reportes (user_saved ya la cubre al guardar usuarios)
+        for model in (Enrollment, Participation, Activity, ActivityReview, Faculty, Schedule):
+            post_save.connect(signals.report_data_changed, sender=model)
+            post_delete.connect(signals.report_data_changed, sender=model)
+        post_delete.connect(signals.report_data_changed, sender=CustomUser)
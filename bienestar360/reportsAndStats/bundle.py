@@ -0,0 +1,104 @@
+"""
+Paquete ZIP con las exportaciones CSV de reportes en una sola descarga: tabla
+de reportes filtrados, segmentación de participación y reporte de
+participación.
+
+Todos los CSV se leen dentro de una misma transacción (`consistent_snapshot`),
+así reflejan el mismo estado de la base de datos. El ZIP se arma sobre un
+destino no buscable: cada miembro se comprime con zlib (ZIP_DEFLATED) a medida
+que se generan sus filas y los bytes comprimidos se envían en cuanto están
+listos, sin guardar el archivo completo en memoria ni en disco.
+"""
+import zipfile
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from activities.exports import SEGMENTATION_HEADERS, segmentation_rows
+from .aggregations import participation_table_rows
+from .exports import (
+    PARTICIPATION_EXPORT_HEADER, csv_stream, participation_export_querysets, participation_export_rows,
+    participation_table_filename,
+)
+
+
+BUNDLE_FILENAME = 'reportes_bienestar360.zip'
+
+# Texto CSV acumulado antes de pasarlo al compresor
+BUNDLE_CHUNK_SIZE = 64 * 1024
+
+
+@contextmanager
+def consistent_snapshot(using=DEFAULT_DB_ALIAS):
+    """
+    Transacción de solo lectura en la que todas las consultas ven los mismos
+    datos. En PostgreSQL se pide REPEATABLE READ (el valor por defecto en
+    MySQL); en SQLite la transacción ya lee una sola versión de la base desde
+    la primera consulta hasta el final.
+    """
+    connection = connections[using]
+    outermost = not connection.in_atomic_block
+    with transaction.atomic(using=using):
+        if outermost and connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY')
+        yield
+
+
+class _StreamBuffer:
+    """Destino de `zipfile` que guarda lo escrito hasta que se retira con `drain()`."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def bundle_members(params):
+    """
+    (nombre, encabezado, filas) de cada CSV del paquete, con los mismos
+    parámetros GET que las descargas individuales: `filter` para la tabla,
+    `activity_type` para la segmentación y los filtros del reporte formal.
+    """
+    selected_filter = params.get('filter', 'actividad')
+    table = participation_table_rows(selected_filter)
+    enrollments, participations = participation_export_querysets(params)
+    return [
+        (participation_table_filename(selected_filter, 'csv'), table[0], table[1:]),
+        ('segmentacion_participacion.csv', SEGMENTATION_HEADERS, segmentation_rows(params.get('activity_type'))),
+        ('reporte_participacion.csv', PARTICIPATION_EXPORT_HEADER, participation_export_rows(enrollments, participations)),
+    ]
+
+
+def zip_stream(params, chunk_size=BUNDLE_CHUNK_SIZE):
+    """Genera el ZIP del paquete por bloques de bytes comprimidos."""
+    buffer = _StreamBuffer()
+    with consistent_snapshot():
+        with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            for name, header, rows in bundle_members(params):
+                # force_zip64: sobre un destino no buscable el tamaño no se conoce de antemano
+                with archive.open(name, 'w', force_zip64=True) as member:
+                    pending, size = [], 0
+                    for line in csv_stream(header, rows):
+                        pending.append(line)
+                        size += len(line)
+                        if size >= chunk_size:
+                            member.write(''.join(pending).encode('utf-8'))
+                            pending, size = [], 0
+                            data = buffer.drain()
+                            if data:
+                                yield data
+                    member.write(''.join(pending).encode('utf-8'))
+                yield buffer.drain()
+    # Directorio central del ZIP
+    yield buffer.drain()
@@ -0,0 +1,235 @@
+"""
+Exportación incremental (delta) de inscripciones y asistencias.
+
+En vez de reexportar todo el historial, cada página devuelve solo las filas
+creadas o modificadas después de un cursor, más los borrados (lápidas de
+`DeletedRecord`), y el cursor para pedir la página siguiente.
+
+El cursor es opaco y va firmado con `django.core.signing`. Guarda la marca de
+agua (timestamp, pk) de cada flujo: inscripciones y asistencias por
+`updated_at`, borrados por `deleted_at`. Solo se leen filas con marca anterior
+a ahora - DELTA_EXPORT_SETTLE_SECONDS, para que una transacción que todavía no
+confirmó no quede detrás de un cursor ya entregado.
+
+A diferencia de la exportación completa, el delta no aplica filtros ni excluye
+a los administradores (un cambio de rol no modifica las filas): incluye una
+columna 'Usuario admin' para que el consumidor aplique la misma exclusión.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.db.models import Q
+from django.utils import timezone
+
+from activities.models import Enrollment, Participation
+from login.roles import is_admin_user
+from .exports import PARTICIPATION_EXPORT_HEADER, EXPORT_CHUNK_SIZE, _USER_FIELDS, _enrollment_row, _participation_row
+from .models import DeletedRecord
+
+
+CURSOR_SALT = 'reportsAndStats.delta'
+CURSOR_VERSION = 1
+
+DELTA_PAGE_SIZE = 10000
+DELTA_MAX_PAGE_SIZE = 100000
+
+UPSERT = 'Cambio'
+DELETE = 'Eliminación'
+
+DELTA_EXPORT_HEADER = ['Operación', 'ID', 'Modificado', 'Usuario admin'] + PARTICIPATION_EXPORT_HEADER
+
+
+class InvalidCursor(ValueError):
+    """El cursor fue alterado o no corresponde a esta versión del formato."""
+
+
+class ExpiredCursor(InvalidCursor):
+    """
+    El cursor es más viejo que las lápidas conservadas: pudo perderse algún
+    borrado y hace falta una exportación completa.
+    """
+
+
+@dataclass(frozen=True)
+class _Stream:
+    name: str
+    model: type
+    field: str
+    label: str = ''
+
+
+ENROLLMENTS = _Stream('enrollment', Enrollment, 'updated_at', 'Inscripción')
+PARTICIPATIONS = _Stream('participation', Participation, 'updated_at', 'Participación')
+DELETIONS = _Stream('deleted', DeletedRecord, 'deleted_at')
+STREAMS = (ENROLLMENTS, PARTICIPATIONS, DELETIONS)
+
+# Tipo de la fila borrada según `DeletedRecord.model`
+DELETED_LABELS = {stream.model._meta.model_name: stream.label for stream in (ENROLLMENTS, PARTICIPATIONS)}
+
+
+def settle_delay():
+    return timedelta(seconds=getattr(settings, 'DELTA_EXPORT_SETTLE_SECONDS', 60))
+
+
+def tombstone_retention():
+    return timedelta(days=getattr(settings, 'DELTA_EXPORT_TOMBSTONE_DAYS', 90))
+
+
+def prune_tombstones():
+    """Elimina las lápidas fuera del período de retención. Devuelve cuántas borró."""
+    deleted, _ = DeletedRecord.objects.filter(deleted_at__lt=timezone.now() - tombstone_retention()).delete()
+    return deleted
+
+
+def record_deletions(queryset, batch_size=EXPORT_CHUNK_SIZE):
+    """
+    Crea en bloque las lápidas de las filas de `queryset` (inscripciones o
+    asistencias) antes de borrarlas sin señales, p. ej. en
+    `generate_scale_data --clear`. Llamarla en la transacción del borrado.
+    Devuelve cuántas creó.
+    """
+    model = queryset.model._meta.model_name
+    ids = queryset.order_by().values_list('pk', flat=True).iterator(chunk_size=batch_size)
+    created = 0
+    batch = []
+    for pk in ids:
+        batch.append(DeletedRecord(model=model, object_id=pk))
+        if len(batch) >= batch_size:
+            created += len(DeletedRecord.objects.bulk_create(batch))
+            batch = []
+    if batch:
+        created += len(DeletedRecord.objects.bulk_create(batch))
+    return created
+
+
+# ---------------------------------------------------------------
+# Cursor
+# ---------------------------------------------------------------
+# Una marca de agua es (timestamp, pk): la última fila entregada. Con pk None
+# significa "todo hasta timestamp inclusive" (el flujo se leyó completo).
+
+def encode_cursor(watermarks):
+    payload = {'v': CURSOR_VERSION}
+    for name, (moment, pk) in watermarks.items():
+        payload[name] = [moment.isoformat(), pk]
+    return signing.dumps(payload, salt=CURSOR_SALT, compress=True)
+
+
+def decode_cursor(cursor):
+    try:
+        payload = signing.loads(cursor, salt=CURSOR_SALT)
+    except signing.BadSignature:
+        raise InvalidCursor('Cursor inválido')
+    if payload.get('v') != CURSOR_VERSION:
+        raise InvalidCursor('Cursor de otra versión')
+    try:
+        watermarks = {
+            stream.name: (datetime.fromisoformat(payload[stream.name][0]), payload[stream.name][1])
+            for stream in STREAMS
+        }
+    except (KeyError, TypeError, ValueError):
+        raise InvalidCursor('Cursor inválido')
+    if watermarks[DELETIONS.name][0] < timezone.now() - tombstone_retention():
+        raise ExpiredCursor('El cursor expiró: haga una exportación completa')
+    return watermarks
+
+
+def _after(field, watermark):
+    if watermark is None:
+        return Q()
+    moment, pk = watermark
+    if pk is None:
+        return Q(**{f'{field}__gt': moment})
+    return Q(**{f'{field}__gt': moment}) | Q(**{field: moment, 'pk__gt': pk})
+
+
+def _up_to(field, watermark):
+    moment, pk = watermark
+    if pk is None:
+        return Q(**{f'{field}__lte': moment})
+    return Q(**{f'{field}__lt': moment}) | Q(**{field: moment, 'pk__lte': pk})
+
+
+# ---------------------------------------------------------------
+# Páginas
+# ---------------------------------------------------------------
+
+@dataclass
+class DeltaPage:
+    """
+    Una página del delta: para cada flujo, las filas entre la marca de agua
+    de inicio (exclusiva) y la de fin (inclusiva). Las filas se leen recién
+    al iterar `rows()`, así la página se puede enviar en streaming.
+    """
+    start: dict
+    end: dict
+    has_more: bool
+
+    @property
+    def next_cursor(self):
+        return encode_cursor(self.end)
+
+    def _queryset(self, stream):
+        field = stream.field
+        return (
+            stream.model.objects
+            .filter(_after(field, self.start[stream.name]) & _up_to(field, self.end[stream.name]))
+            .order_by(field, 'pk')
+        )
+
+    def rows(self, chunk_size=EXPORT_CHUNK_SIZE):
+        """Filas con DELTA_EXPORT_HEADER: cambios de inscripciones, de asistencias y borrados."""
+        empty = [''] * len(PARTICIPATION_EXPORT_HEADER)
+        for stream, to_row, date_fields in (
+            (ENROLLMENTS, _enrollment_row, ('registered_at',)),
+            (PARTICIPATIONS, _participation_row, ('attendance_date', 'attendance_time')),
+        ):
+            records = (
+                self._queryset(stream)
+                .annotate(admin=is_admin_user())
+                .values_list('pk', 'updated_at', 'admin', *_USER_FIELDS, *date_fields)
+                .iterator(chunk_size=chunk_size)
+            )
+            for pk, updated_at, admin, *row in records:
+                yield [UPSERT, pk, updated_at.isoformat(), 'Sí' if admin else 'No'] + to_row(row)
+
+        tombstones = self._queryset(DELETIONS).values_list('model', 'object_id', 'deleted_at').iterator(chunk_size=chunk_size)
+        for model, object_id, deleted_at in tombstones:
+            yield [DELETE, object_id, deleted_at.isoformat(), ''] + empty[:-1] + [DELETED_LABELS.get(model, model)]
+
+
+def delta_page(cursor=None, limit=DELTA_PAGE_SIZE):
+    """
+    Página del delta a partir de `cursor` (None = exportación inicial con
+    todas las filas existentes y sin borrados previos). Hace una consulta de
+    claves por flujo para fijar dónde termina la página; lanza
+    `InvalidCursor`/`ExpiredCursor` si el cursor no sirve.
+    """
+    until = timezone.now() - settle_delay()
+    if cursor:
+        start = decode_cursor(cursor)
+    else:
+        start = {ENROLLMENTS.name: None, PARTICIPATIONS.name: None, DELETIONS.name: (until, None)}
+
+    end = {}
+    has_more = False
+    for stream in STREAMS:
+        field = stream.field
+        watermark = start[stream.name]
+        keys = list(
+            stream.model.objects
+            .filter(_after(field, watermark), **{f'{field}__lte': until})
+            .order_by(field, 'pk')
+            .values_list(field, 'pk')[:limit + 1]
+        )
+        if len(keys) > limit:
+            has_more = True
+            end[stream.name] = keys[limit - 1]
+        elif watermark is not None and watermark[0] >= until:
+            # El reloj retrocedió o cambió la espera: no volver a entregar filas
+            end[stream.name] = watermark
+        else:
+            end[stream.name] = (until, None)
+    return DeltaPage(start=start, end=end, has_more=has_more)
@@ -0,0 +1,323 @@
+"""
+Generadores de filas y utilidades de streaming para las exportaciones de
+reportes. Las filas se leen como tuplas (`values_list`) con `.iterator()`
+para que la memoria no crezca con el tamaño del reporte.
+"""
+import csv
+import io
+import pickle
+import tempfile
+from datetime import datetime
+
+from django.http import FileResponse, StreamingHttpResponse
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Alignment
+from openpyxl.utils import get_column_letter
+
+from activities.models import Enrollment, Participation
+from .aggregations import participation_table_rows
+from .filters import ReportFilters
+
+
+EXPORT_CHUNK_SIZE = 2000
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+GENDER_NAMES = {
+    'M': 'Masculino',
+    'F': 'Femenino',
+    'O': 'Otro',
+}
+
+PARTICIPATION_EXPORT_HEADER = [
+    'ID Estudiante',
+    'Nombre',
+    'Facultad',
+    'Género',
+    'Actividad',
+    'Tipo Actividad',
+    'Horario',
+    'Fecha Registro/Asistencia',
+    'Hora',
+    'Tipo',
+]
+
+_USER_FIELDS = (
+    'user__identification',
+    'user__first_name',
+    'user__last_name',
+    'user__username',
+    'user__faculty__name',
+    'user__gender',
+    'activity__name',
+    'activity__type',
+    'schedule_id',
+    'schedule__day',
+    'schedule__start_time',
+    'schedule__end_time',
+)
+
+
+class EchoBuffer:
+    """Pseudo-buffer para `csv.writer`: devuelve lo escrito en vez de guardarlo."""
+
+    def write(self, value):
+        return value
+
+
+def _common_columns(row):
+    (identification, first_name, last_name, username, faculty_name, gender,
+     activity_name, activity_type, schedule_id, day, start_time, end_time) = row[:12]
+
+    # Mismo formato que CustomUser.get_full_name()
+    full_name = f"{first_name} {last_name}".strip()
+    schedule_str = f"{day} {start_time}-{end_time}" if schedule_id else 'N/A'
+    return [
+        identification or 'N/A',
+        full_name or username,
+        faculty_name or 'N/A',
+        GENDER_NAMES.get(gender, gender or 'N/A'),
+        activity_name,
+        activity_type or 'N/A',
+        schedule_str,
+    ]
+
+
+def _participation_row(row):
+    """Fila de exportación de una asistencia (`_USER_FIELDS` + fecha y hora)."""
+    attendance_date, attendance_time = row[12:14]
+    return _common_columns(row) + [
+        attendance_date.strftime('%Y-%m-%d') if attendance_date else 'N/A',
+        attendance_time.strftime('%H:%M:%S') if attendance_time else 'N/A',
+        'Participación',
+    ]
+
+
+def _enrollment_row(row):
+    """Fila de exportación de una inscripción (`_USER_FIELDS` + registered_at)."""
+    registered_at = row[12]
+    return _common_columns(row) + [
+        registered_at.strftime('%Y-%m-%d') if registered_at else 'N/A',
+        registered_at.strftime('%H:%M:%S') if registered_at else 'N/A',
+        'Inscripción',
+    ]
+
+
+def participation_export_querysets(params):
+    """
+    Inscripciones y asistencias a exportar según los filtros del reporte
+    formal (`params` es un QueryDict o algo con `get`/`getlist`).
+    """
+    filters = ReportFilters.from_params(params)
+    enrollments = Enrollment.objects.filter(filters.enrollment_q())
+    participations = Participation.objects.filter(filters.participation_q())
+    return enrollments, participations
+
+
+def participation_export_rows(enrollments, participations, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Filas (sin encabezado) de la exportación de participación.
+
+    Exporta las asistencias; si no hay ninguna, exporta las inscripciones.
+    """
+    rows_written = 0
+
+    participation_rows = (
+        participations
+        .order_by('user__identification', 'attendance_date')
+        .values_list(*_USER_FIELDS, 'attendance_date', 'attendance_time')
+        .iterator(chunk_size=chunk_size)
+    )
+    for row in participation_rows:
+        yield _participation_row(row)
+        rows_written += 1
+
+    # Si no hay asistencias se exportan las inscripciones
+    if rows_written == 0:
+        enrollment_rows = (
+            enrollments
+            .order_by('user__identification', 'registered_at')
+            .values_list(*_USER_FIELDS, 'registered_at')
+            .iterator(chunk_size=chunk_size)
+        )
+        for row in enrollment_rows:
+            yield _enrollment_row(row)
+
+
+def csv_stream(header, rows, bom=True):
+    """Genera el CSV línea por línea (BOM opcional para compatibilidad con Excel)."""
+    writer = csv.writer(EchoBuffer())
+    if bom:
+        yield '\ufeff'
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def write_csv(output, header, rows, bom=True):
+    """Escribe el CSV en un archivo binario ya abierto."""
+    text = io.TextIOWrapper(output, encoding='utf-8', newline='')
+    text.writelines(csv_stream(header, rows, bom=bom))
+    text.flush()
+    text.detach()
+
+
+def streaming_csv_response(filename, header, rows, bom=True):
+    """`StreamingHttpResponse` que envía el CSV a medida que se generan las filas."""
+    response = StreamingHttpResponse(
+        csv_stream(header, rows, bom=bom),
+        content_type='text/csv; charset=utf-8',
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+class XlsxExport:
+    """
+    Hoja de Excel escrita con el modo write-only de openpyxl.
+
+    En modo write-only los anchos de columna deben definirse antes de la
+    primera fila, así que las filas se guardan por bloques en un archivo
+    temporal mientras se calcula el ancho de cada columna, y se vuelcan a la
+    hoja al guardar. La memoria usada no depende del número de filas.
+
+    Si se pasan `widths` se usan esos anchos fijos en vez de calcularlos.
+    """
+
+    def __init__(self, title, header, header_fill=None, header_font=None,
+                 header_alignment=None, widths=None, max_width=50,
+                 chunk_size=EXPORT_CHUNK_SIZE):
+        self.title = title
+        self.header = list(header)
+        self.header_fill = header_fill
+        self.header_font = header_font
+        self.header_alignment = header_alignment
+        self.widths = widths
+        self.max_width = max_width
+        self.chunk_size = chunk_size
+        self.row_count = 0
+        self._lengths = [len(str(value)) for value in self.header]
+        self._pending = []
+        self._spool = tempfile.TemporaryFile()
+
+    def append(self, row):
+        row = list(row)
+        lengths = self._lengths
+        for idx, value in enumerate(row):
+            if value is None:
+                continue
+            length = len(str(value))
+            if idx >= len(lengths):
+                lengths.append(length)
+            elif length > lengths[idx]:
+                lengths[idx] = length
+        self._pending.append(row)
+        self.row_count += 1
+        if len(self._pending) >= self.chunk_size:
+            self._flush()
+
+    def extend(self, rows):
+        for row in rows:
+            self.append(row)
+
+    def column_widths(self):
+        if self.widths:
+            return list(self.widths)
+        return [min(length + 2, self.max_width) for length in self._lengths]
+
+    def _flush(self):
+        if self._pending:
+            pickle.dump(self._pending, self._spool, protocol=pickle.HIGHEST_PROTOCOL)
+            self._pending = []
+
+    def _spooled_rows(self):
+        self._flush()
+        self._spool.seek(0)
+        while True:
+            try:
+                chunk = pickle.load(self._spool)
+            except EOFError:
+                return
+            yield from chunk
+
+    def _header_cells(self, ws):
+        cells = []
+        for value in self.header:
+            cell = WriteOnlyCell(ws, value=value)
+            if self.header_fill:
+                cell.fill = self.header_fill
+            if self.header_font:
+                cell.font = self.header_font
+            if self.header_alignment:
+                cell.alignment = self.header_alignment
+            cells.append(cell)
+        return cells
+
+    def save(self, fileobj):
+        """Escribe el libro en `fileobj` (ruta o archivo binario) y libera el temporal."""
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet(title=self.title)
+        for idx, width in enumerate(self.column_widths(), 1):
+            ws.column_dimensions[get_column_letter(idx)].width = width
+
+        ws.append(self._header_cells(ws))
+        for row in self._spooled_rows():
+            ws.append(row)
+
+        wb.save(fileobj)
+        self._spool.close()
+
+    def response(self, filename):
+        """Respuesta de descarga que envía el libro desde un archivo temporal."""
+        output = tempfile.TemporaryFile()
+        self.save(output)
+        output.seek(0)
+        return FileResponse(
+            output,
+            as_attachment=True,
+            filename=filename,
+            content_type=XLSX_CONTENT_TYPE,
+        )
+
+
+def participation_table_xlsx(selected_filter):
+    """Tabla de reportes filtrados como `XlsxExport`, con el estilo de la descarga."""
+    rows = participation_table_rows(selected_filter)
+    export = XlsxExport(
+        "Reporte de Participación",
+        rows[0],
+        header_fill=PatternFill(start_color="2563eb", end_color="2563eb", fill_type="solid"),
+        header_font=Font(bold=True, color="FFFFFF", size=12),
+        header_alignment=Alignment(horizontal="center", vertical="center"),
+        widths=[30, 15, 15],
+    )
+    export.extend(rows[1:])
+    return export
+
+
+def participation_table_filename(selected_filter, extension):
+    return f"reporte_participacion_{selected_filter}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+
+
+# Exportadores para los trabajos en segundo plano (ver jobs.py): reciben los
+# parámetros GET de la descarga y un archivo binario, y devuelven el nombre
+# con el que se descarga el resultado.
+
+def export_participation_csv(params, output):
+    enrollments, participations = participation_export_querysets(params)
+    write_csv(output, PARTICIPATION_EXPORT_HEADER, participation_export_rows(enrollments, participations))
+    return 'reporte_participacion.csv'
+
+
+def export_table_csv(params, output):
+    selected_filter = params.get('filter', 'actividad')
+    rows = participation_table_rows(selected_filter)
+    write_csv(output, rows[0], rows[1:])
+    return participation_table_filename(selected_filter, 'csv')
+
+
+def export_table_xlsx(params, output):
+    selected_filter = params.get('filter', 'actividad')
+    participation_table_xlsx(selected_filter).save(output)
+    return participation_table_filename(selected_filter, 'xlsx')
@@ -0,0 +1,201 @@
+"""
+Mantenimiento del rollup diario `ParticipationFact`.
+
+Cada fila agrupa las inscripciones (por `registered_at`) y asistencias
+(por `attendance_date`) de un día para una actividad, facultad y género.
+Los reportes leen de aquí para no re-escanear `Enrollment`/`Participation`.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from activities.models import Activity, Enrollment, Participation
+from login.roles import is_admin_user
+from .models import ParticipationFact
+from .report_cache import bump_data_version
+
+
+COUNTER_FIELDS = ("enrollment_count", "participation_count", "enrolled_users", "participant_users")
+
+
+def enrollment_fact_date(enrollment):
+    """Fecha (zona horaria local) en la que cuenta una inscripción."""
+    if not enrollment.registered_at:
+        return None
+    return timezone.localdate(enrollment.registered_at)
+
+
+def _empty_counters():
+    return {field: 0 for field in COUNTER_FIELDS}
+
+
+def _grouped_counts(activity_id=None, day=None):
+    """
+    Agrega inscripciones y asistencias por (fecha, actividad, facultad, género).
+    Si se pasan `activity_id` y `day` solo se calcula esa combinación.
+    Devuelve {(fecha, actividad, facultad, género): contadores}.
+    """
+    is_admin = is_admin_user()
+
+    enrollments = Enrollment.objects.exclude(is_admin)
+    participations = Participation.objects.filter(
+        attendance_date__isnull=False
+    ).exclude(is_admin)
+    if activity_id is not None:
+        enrollments = enrollments.filter(activity_id=activity_id, registered_at__date=day)
+        participations = participations.filter(activity_id=activity_id, attendance_date=day)
+
+    enrollment_rows = (
+        enrollments
+        .annotate(day=TruncDate("registered_at"))
+        .values("day", "activity_id", "user__faculty_id", "user__gender")
+        .annotate(total=Count("id"), users=Count("user", distinct=True))
+        .order_by()
+    )
+    participation_rows = (
+        participations
+        .values("attendance_date", "activity_id", "user__faculty_id", "user__gender")
+        .annotate(total=Count("id"), users=Count("user", distinct=True))
+        .order_by()
+    )
+
+    counts = defaultdict(_empty_counters)
+    for row in enrollment_rows:
+        key = (row["day"], row["activity_id"], row["user__faculty_id"], row["user__gender"] or "")
+        counts[key]["enrollment_count"] += row["total"]
+        counts[key]["enrolled_users"] += row["users"]
+    for row in participation_rows:
+        key = (row["attendance_date"], row["activity_id"], row["user__faculty_id"], row["user__gender"] or "")
+        counts[key]["participation_count"] += row["total"]
+        counts[key]["participant_users"] += row["users"]
+    return counts
+
+
+def refresh_facts(activity_id, day, allow_create=True):
+    """
+    Recalcula todas las filas del rollup para una actividad en un día.
+
+    El cálculo se hace con la fila de la actividad bloqueada
+    (select_for_update), así dos escrituras simultáneas de la misma actividad
+    no insertan la misma fila del rollup dos veces.
+
+    Con `allow_create=False` solo se actualizan o eliminan filas existentes;
+    se usa desde `post_delete`, donde la actividad misma puede estar siendo
+    eliminada en cascada y no se debe insertar nada que la referencie.
+    """
+    if activity_id is None or day is None:
+        return
+
+    with transaction.atomic():
+        activity_type = (
+            Activity.objects.select_for_update()
+            .filter(pk=activity_id)
+            .values_list("type", flat=True)
+            .first()
+        )
+        counts = _grouped_counts(activity_id, day)
+        existing = {
+            (fact.faculty_id, fact.gender): fact
+            for fact in ParticipationFact.objects.filter(activity_id=activity_id, date=day)
+        }
+
+        for (_, _, faculty_id, gender), values in counts.items():
+            fact = existing.pop((faculty_id, gender), None)
+            if fact is None:
+                if allow_create:
+                    ParticipationFact.objects.create(
+                        date=day,
+                        activity_id=activity_id,
+                        activity_type=activity_type,
+                        faculty_id=faculty_id,
+                        gender=gender,
+                        **values,
+                    )
+                continue
+            if any(getattr(fact, field) != value for field, value in values.items()):
+                for field, value in values.items():
+                    setattr(fact, field, value)
+                fact.save(update_fields=list(COUNTER_FIELDS))
+
+        # Lo que quedó ya no tiene inscripciones ni asistencias
+        if existing:
+            ParticipationFact.objects.filter(pk__in=[fact.pk for fact in existing.values()]).delete()
+
+
+def refresh_user_facts(user_id):
+    """
+    Recalcula las filas del rollup en las que cuenta un usuario; se usa
+    cuando cambian su facultad, su género o si es admin.
+    """
+    enrollment_days = (
+        Enrollment.objects.filter(user_id=user_id)
+        .annotate(day=TruncDate("registered_at"))
+        .values_list("activity_id", "day")
+        .distinct()
+    )
+    participation_days = (
+        Participation.objects.filter(user_id=user_id, attendance_date__isnull=False)
+        .values_list("activity_id", "attendance_date")
+        .distinct()
+    )
+    for activity_id, day in set(enrollment_days) | set(participation_days):
+        refresh_facts(activity_id, day)
+
+
+def rebuild_facts(batch_size=1000):
+    """Reconstruye el rollup completo desde las tablas de inscripciones y asistencias."""
+    counts = _grouped_counts()
+    activity_types = dict(Activity.objects.values_list("activityId", "type"))
+
+    facts = [
+        ParticipationFact(
+            date=day,
+            activity_id=activity_id,
+            activity_type=activity_types.get(activity_id),
+            faculty_id=faculty_id,
+            gender=gender,
+            **values,
+        )
+        for (day, activity_id, faculty_id, gender), values in counts.items()
+    ]
+
+    with transaction.atomic():
+        ParticipationFact.objects.all().delete()
+        ParticipationFact.objects.bulk_create(facts, batch_size=batch_size)
+        bump_data_version()
+    return len(facts)
+
+
+def fact_totals(*group_by, **filters):
+    """
+    Suma los contadores del rollup agrupando por los campos indicados.
+
+    Devuelve un dict {valor_del_grupo: {'enrollments': n, 'participations': n}};
+    si se agrupa por varios campos la llave es una tupla.
+    """
+    rows = (
+        ParticipationFact.objects.filter(**filters)
+        .values(*group_by)
+        .annotate(enrollments=Sum("enrollment_count"), participations=Sum("participation_count"))
+        .order_by()
+    )
+    totals = {}
+    for row in rows:
+        key = tuple(row[field] for field in group_by)
+        totals[key if len(key) > 1 else key[0]] = {
+            "enrollments": row["enrollments"] or 0,
+            "participations": row["participations"] or 0,
+        }
+    return totals
+
+
+def fact_grand_totals(**filters):
+    """Totales de inscripciones y asistencias del rollup con filtros opcionales."""
+    totals = ParticipationFact.objects.filter(**filters).aggregate(
+        enrollments=Sum("enrollment_count"),
+        participations=Sum("participation_count"),
+    )
+    return {key: value or 0 for key, value in totals.items()}
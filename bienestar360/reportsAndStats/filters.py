@@ -0,0 +1,170 @@
+"""
+Compilador de los filtros del reporte formal de participación.
+
+`ReportFilters.from_params()` valida una sola vez los parámetros GET (tipo de
+actividad, facultad, género, rango de fechas y frecuencia) y los convierte en
+objetos `Q` para inscripciones, asistencias y usuarios. Lo usan
+`ParticipationFormalReportView` y la exportación CSV, así ambos aplican
+exactamente los mismos filtros.
+"""
+from dataclasses import dataclass
+from datetime import datetime
+
+from django.db.models import Count, Q
+
+from activities.models import Enrollment
+from login.roles import is_admin_user
+
+
+# Tope usado cuando solo se indica la frecuencia mínima
+FREQUENCY_MAX_DEFAULT = 999999
+
+
+def _clean_list(values):
+    return tuple(value for value in values if value)
+
+
+def _parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except (ValueError, TypeError):
+        # Una fecha inválida se ignora, igual que antes
+        return None
+
+
+def _parse_frequency(raw_min, raw_max):
+    """Devuelve (mínimo, máximo) o (None, None) si no hay filtro o es inválido."""
+    if not raw_min and not raw_max:
+        return None, None
+    try:
+        freq_min = int(raw_min) if raw_min else 0
+        freq_max = int(raw_max) if raw_max else FREQUENCY_MAX_DEFAULT
+    except ValueError:
+        return None, None
+    freq_min = max(freq_min, 0)
+    freq_max = max(freq_max, freq_min)
+    return freq_min, freq_max
+
+
+@dataclass(frozen=True)
+class ReportFilters:
+    activity_types: tuple = ()
+    faculties: tuple = ()
+    genders: tuple = ()
+    date_start: object = None
+    date_end: object = None
+    frequency_min: int = None
+    frequency_max: int = None
+    # Valores tal como llegaron, para volver a mostrarlos en el formulario
+    raw_frequency_min: str = ''
+    raw_frequency_max: str = ''
+    raw_date_start: str = ''
+    raw_date_end: str = ''
+
+    @classmethod
+    def from_params(cls, params):
+        """Construye los filtros desde un QueryDict (o algo con `get`/`getlist`)."""
+        raw_frequency_min = params.get('frequency_min', '').strip()
+        raw_frequency_max = params.get('frequency_max', '').strip()
+        raw_date_start = params.get('date_start', '').strip()
+        raw_date_end = params.get('date_end', '').strip()
+        frequency_min, frequency_max = _parse_frequency(raw_frequency_min, raw_frequency_max)
+        return cls(
+            activity_types=_clean_list(params.getlist('activity_type')),
+            faculties=_clean_list(params.getlist('faculty')),
+            genders=_clean_list(params.getlist('gender')),
+            date_start=_parse_date(raw_date_start) if raw_date_start else None,
+            date_end=_parse_date(raw_date_end) if raw_date_end else None,
+            frequency_min=frequency_min,
+            frequency_max=frequency_max,
+            raw_frequency_min=raw_frequency_min,
+            raw_frequency_max=raw_frequency_max,
+            raw_date_start=raw_date_start,
+            raw_date_end=raw_date_end,
+        )
+
+    @property
+    def has_frequency(self):
+        return self.frequency_min is not None
+
+    # ---------------------------------------------------------------
+    # Partes del filtro
+    # ---------------------------------------------------------------
+
+    def user_q(self, prefix=''):
+        """
+        Condiciones sobre el usuario (no admin, facultad, género, frecuencia).
+        `prefix` es la ruta hasta el usuario, p. ej. 'user__' desde inscripciones.
+        """
+        q = Q(~is_admin_user(prefix[:-2] if prefix else 'pk'))
+        if self.faculties:
+            q &= Q(**{f'{prefix}faculty__name__in': self.faculties})
+        if self.genders:
+            q &= Q(**{f'{prefix}gender__in': self.genders})
+        if self.has_frequency:
+            q &= Q(**{f'{prefix}pk__in': self.frequency_users()})
+        return q
+
+    def enrollment_activity_q(self):
+        """Condiciones de inscripciones que no dependen del usuario (tipo y fechas)."""
+        q = Q()
+        if self.activity_types:
+            q &= Q(activity__type__in=self.activity_types)
+        if self.date_start:
+            q &= Q(registered_at__date__gte=self.date_start)
+        if self.date_end:
+            q &= Q(registered_at__date__lte=self.date_end)
+        return q
+
+    def participation_activity_q(self):
+        """Condiciones de asistencias que no dependen del usuario (tipo y fechas)."""
+        q = Q(attendance_date__isnull=False)
+        if self.activity_types:
+            q &= Q(activity__type__in=self.activity_types)
+        if self.date_start:
+            q &= Q(attendance_date__gte=self.date_start)
+        if self.date_end:
+            q &= Q(attendance_date__lte=self.date_end)
+        return q
+
+    def frequency_users(self):
+        """
+        Subconsulta (`GROUP BY ... HAVING`) con los usuarios cuya cantidad de
+        inscripciones, con los demás filtros aplicados, está dentro del rango
+        de frecuencia. No se evalúa en Python: las consultas externas la usan
+        con `pk__in`.
+        """
+        base = self.enrollment_activity_q() & self._user_q_without_frequency('user__')
+        return (
+            Enrollment.objects.filter(base)
+            .order_by()
+            .values('user')
+            .annotate(enrollment_count=Count('id'))
+            .filter(enrollment_count__gte=self.frequency_min, enrollment_count__lte=self.frequency_max)
+            .values('user')
+        )
+
+    def _user_q_without_frequency(self, prefix):
+        return ReportFilters(faculties=self.faculties, genders=self.genders).user_q(prefix)
+
+    # ---------------------------------------------------------------
+    # Filtros compilados
+    # ---------------------------------------------------------------
+
+    def enrollment_q(self):
+        return self.enrollment_activity_q() & self.user_q('user__')
+
+    def participation_q(self):
+        return self.participation_activity_q() & self.user_q('user__')
+
+    def form_values(self):
+        """Valores seleccionados para volver a pintar el formulario de filtros."""
+        return {
+            'selected_activity_types': list(self.activity_types),
+            'selected_faculties': list(self.faculties),
+            'selected_genders': list(self.genders),
+            'frequency_min': self.raw_frequency_min,
+            'frequency_max': self.raw_frequency_max,
+            'date_start': self.raw_date_start,
+            'date_end': self.raw_date_end,
+        }
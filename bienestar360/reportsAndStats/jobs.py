@@ -0,0 +1,174 @@
+"""
+Cola de exportaciones en segundo plano sobre la tabla `ExportJob`.
+
+Las vistas de descarga encolan un trabajo con `?background=1`; el comando
+`run_export_worker` reclama los pendientes y ejecuta `run_export_job` en un
+pool de procesos. No requiere broker externo: funciona igual con SQLite.
+"""
+import logging
+import os
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.http import JsonResponse, QueryDict
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import ExportJob, ExportKind, ExportStatus
+
+logger = logging.getLogger(__name__)
+
+
+# Función que genera cada tipo de exportación: (params, archivo_binario) -> nombre de descarga
+EXPORTERS = {
+    ExportKind.PARTICIPATION_CSV: "reportsAndStats.exports.export_participation_csv",
+    ExportKind.TABLE_CSV: "reportsAndStats.exports.export_table_csv",
+    ExportKind.TABLE_XLSX: "reportsAndStats.exports.export_table_xlsx",
+    ExportKind.SEGMENTATION_CSV: "activities.exports.export_segmentation_csv",
+    ExportKind.SEGMENTATION_XLSX: "activities.exports.export_segmentation_xlsx",
+    ExportKind.PARTICIPATION_PDF: "reportsAndStats.pdf.export_participation_pdf",
+}
+
+# Parámetros de la petición que no se guardan con el trabajo
+CONTROL_PARAMS = ("background", "stream")
+
+
+def artifact_dir():
+    return Path(getattr(settings, "EXPORT_ARTIFACT_DIR", Path(settings.BASE_DIR) / "export_artifacts"))
+
+
+def artifact_ttl():
+    return timedelta(hours=getattr(settings, "EXPORT_ARTIFACT_TTL_HOURS", 24))
+
+
+def artifact_path(job):
+    return artifact_dir() / job.artifact if job.artifact else None
+
+
+def _as_querydict(params):
+    query = QueryDict(mutable=True)
+    for key, values in params.items():
+        query.setlist(key, values)
+    return query
+
+
+def enqueue_export(request, kind, cache_key=""):
+    """
+    Crea el trabajo con los parámetros GET de la petición y responde 202
+    con la URL para consultar su estado.
+
+    Con `cache_key`, si el mismo usuario ya tiene un trabajo igual pendiente
+    o en proceso, se responde con ese en vez de encolar otro.
+    """
+    requested_by = request.user if request.user.is_authenticated else None
+    job = None
+    if cache_key and requested_by is not None:
+        job = ExportJob.objects.filter(
+            kind=kind,
+            cache_key=cache_key,
+            requested_by=requested_by,
+            status__in=[ExportStatus.PENDING, ExportStatus.RUNNING],
+        ).first()
+    if job is None:
+        params = {
+            key: values for key, values in request.GET.lists()
+            if key not in CONTROL_PARAMS
+        }
+        job = ExportJob.objects.create(
+            kind=kind,
+            params=params,
+            requested_by=requested_by,
+            cache_key=cache_key,
+        )
+    status_url = reverse("reportsAndStats:export_job_status", args=[job.pk])
+    return JsonResponse({"job_id": str(job.pk), "status": job.status, "status_url": status_url}, status=202)
+
+
+def cached_export(kind, cache_key):
+    """Último trabajo terminado y vigente con la misma clave, si su archivo sigue en disco."""
+    jobs = ExportJob.objects.filter(
+        kind=kind,
+        cache_key=cache_key,
+        status=ExportStatus.DONE,
+        expires_at__gt=timezone.now(),
+    ).order_by("-finished_at")
+    for job in jobs[:3]:
+        path = artifact_path(job)
+        if path is not None and path.exists():
+            return job
+    return None
+
+
+def claim_pending_jobs(limit):
+    """
+    Marca como RUNNING hasta `limit` trabajos pendientes y devuelve sus ids.
+
+    El cambio de estado se hace con un UPDATE condicionado al estado
+    anterior, así dos workers nunca reclaman el mismo trabajo (también en
+    SQLite, donde no hay `select_for_update`).
+    """
+    claimed = []
+    candidates = ExportJob.objects.filter(status=ExportStatus.PENDING).values_list("pk", flat=True)[:limit]
+    for job_id in list(candidates):
+        updated = ExportJob.objects.filter(pk=job_id, status=ExportStatus.PENDING).update(
+            status=ExportStatus.RUNNING, started_at=timezone.now()
+        )
+        if updated:
+            claimed.append(job_id)
+    return claimed
+
+
+def requeue_stale_jobs(older_than):
+    """Devuelve a la cola los trabajos RUNNING abandonados (p. ej. por un worker caído)."""
+    cutoff = timezone.now() - older_than
+    return ExportJob.objects.filter(status=ExportStatus.RUNNING, started_at__lt=cutoff).update(
+        status=ExportStatus.PENDING, started_at=None
+    )
+
+
+def run_export_job(job_id):
+    """Genera el archivo de un trabajo ya reclamado. Devuelve el estado final."""
+    job = ExportJob.objects.get(pk=job_id)
+    directory = artifact_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    partial_path = directory / f"{job.pk}.part"
+
+    try:
+        exporter = import_string(EXPORTERS[job.kind])
+        with open(partial_path, "wb") as output:
+            filename = exporter(_as_querydict(job.params), output)
+        # El archivo solo aparece con su nombre final cuando está completo
+        artifact = f"{job.pk}{Path(filename).suffix}"
+        os.replace(partial_path, directory / artifact)
+    except Exception as e:
+        logger.exception("Error generando la exportación %s", job.pk)
+        partial_path.unlink(missing_ok=True)
+        job.status = ExportStatus.FAILED
+        job.error = str(e)
+        job.finished_at = timezone.now()
+        job.save(update_fields=["status", "error", "finished_at"])
+        return job.status
+
+    now = timezone.now()
+    job.status = ExportStatus.DONE
+    job.artifact = artifact
+    job.filename = filename
+    job.finished_at = now
+    job.expires_at = now + artifact_ttl()
+    job.save(update_fields=["status", "artifact", "filename", "finished_at", "expires_at"])
+    return job.status
+
+
+def cleanup_expired_exports(now=None):
+    """Borra los archivos vencidos y marca sus trabajos como expirados."""
+    now = now or timezone.now()
+    expired = 0
+    for job in ExportJob.objects.filter(status=ExportStatus.DONE, expires_at__lte=now):
+        path = artifact_path(job)
+        if path is not None:
+            path.unlink(missing_ok=True)
+        ExportJob.objects.filter(pk=job.pk).update(status=ExportStatus.EXPIRED, artifact="")
+        expired += 1
+    return expired
@@ -0,0 +1,125 @@
+import multiprocessing
+import resource
+import tempfile
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from openpyxl import Workbook
+from openpyxl.styles import Font, PatternFill
+
+from reportsAndStats import worker
+from reportsAndStats.exports import XlsxExport
+
+
+HEADERS = ["Periodo", "Actividad", "Tipo", "Día", "Horario", "Total de Participantes"]
+DAYS = ["Lunes", "Martes", "Miércoles", "Jueves", "Viernes"]
+TYPES = ["Deportiva", "Artística", "Cultural", "Académica"]
+
+
+def _sample_rows(count):
+    """Filas con la forma de la segmentación de participación."""
+    start = date(2024, 1, 1)
+    for idx in range(count):
+        yield [
+            (start + timedelta(days=idx % 730)).strftime("%Y-%m-%d"),
+            f"Actividad {idx % 500}",
+            TYPES[idx % len(TYPES)],
+            DAYS[idx % len(DAYS)],
+            f"{8 + idx % 10:02d}:00 - {9 + idx % 10:02d}:30",
+            idx % 40,
+        ]
+
+
+def _legacy_export(count, output):
+    # Implementación anterior: Workbook en memoria y segunda pasada para los anchos
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Segmentación de Participación"
+    header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+    header_font = Font(bold=True, color="FFFFFF")
+    for col_num, header in enumerate(HEADERS, 1):
+        cell = ws.cell(row=1, column=col_num, value=header)
+        cell.fill = header_fill
+        cell.font = header_font
+    for row_num, row in enumerate(_sample_rows(count), 2):
+        for col_num, value in enumerate(row, 1):
+            ws.cell(row=row_num, column=col_num, value=value)
+    for col in ws.columns:
+        max_length = max(len(str(cell.value)) for cell in col)
+        ws.column_dimensions[col[0].column_letter].width = min(max_length + 2, 50)
+    wb.save(output)
+
+
+def _streaming_export(count, output):
+    export = XlsxExport(
+        "Segmentación de Participación",
+        HEADERS,
+        header_fill=PatternFill(start_color="366092", end_color="366092", fill_type="solid"),
+        header_font=Font(bold=True, color="FFFFFF"),
+    )
+    export.extend(_sample_rows(count))
+    export.save(output)
+
+
+STRATEGIES = {
+    "legacy": _legacy_export,
+    "write_only": _streaming_export,
+}
+
+
+def _run_case(strategy, count):
+    """Se ejecuta en un proceso nuevo para que el pico de RSS sea solo de este caso."""
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    with tempfile.TemporaryFile() as output:
+        STRATEGIES[strategy](count, output)
+        size = output.tell()
+    elapsed = time.perf_counter() - started
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "seconds": elapsed,
+        "peak_mb": peak_kb / 1024,
+        "delta_mb": (peak_kb - baseline_kb) / 1024,
+        "size_mb": size / (1024 * 1024),
+    }
+
+
+class Command(BaseCommand):
+    help = "Compara RSS pico y tiempo de la exportación a Excel en memoria contra la write-only"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=int,
+            nargs="+",
+            default=[10_000, 100_000, 1_000_000],
+            help="Cantidades de filas a medir",
+        )
+        parser.add_argument(
+            "--strategy",
+            choices=sorted(STRATEGIES),
+            action="append",
+            help="Estrategia a medir (por defecto todas)",
+        )
+
+    def handle(self, *args, **options):
+        strategies = options["strategy"] or sorted(STRATEGIES)
+        # spawn: cada caso arranca con un intérprete limpio. Al recibir el caso el
+        # proceso importa este módulo (y con él los modelos), así que Django debe
+        # quedar configurado antes (init_worker)
+        context = multiprocessing.get_context("spawn")
+
+        self.stdout.write(
+            f"{'filas':>10}  {'estrategia':<11} {'tiempo (s)':>10} {'RSS pico (MB)':>14} "
+            f"{'Δ RSS (MB)':>11} {'archivo (MB)':>13}"
+        )
+        for count in options["rows"]:
+            for strategy in strategies:
+                with context.Pool(processes=1, initializer=worker.init_worker) as pool:
+                    result = pool.apply(_run_case, (strategy, count))
+                self.stdout.write(
+                    f"{count:>10}  {strategy:<11} {result['seconds']:>10.2f} {result['peak_mb']:>14.1f} "
+                    f"{result['delta_mb']:>11.1f} {result['size_mb']:>13.2f}"
+                )
+        self.stdout.write(self.style.SUCCESS("Benchmark terminado."))
@@ -0,0 +1,78 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reportsAndStats.delta import DELTA_EXPORT_HEADER, DELTA_PAGE_SIZE, InvalidCursor, delta_page, prune_tombstones
+from reportsAndStats.exports import write_csv
+
+
+class Command(BaseCommand):
+    help = (
+        "Exporta a CSV solo las inscripciones y asistencias creadas, modificadas o borradas "
+        "desde un cursor, y guarda el cursor siguiente"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", help="Archivo CSV de salida")
+        parser.add_argument("--cursor", help="Cursor de la exportación anterior (sin cursor se exporta todo)")
+        parser.add_argument(
+            "--cursor-file",
+            help="Archivo con el cursor: se lee al empezar (si existe) y se reescribe al terminar",
+        )
+        parser.add_argument("--limit", type=int, default=DELTA_PAGE_SIZE, help="Filas máximas por flujo y página")
+        parser.add_argument(
+            "--all-pages",
+            action="store_true",
+            help="Sigue pidiendo páginas hasta ponerse al día (todas al mismo CSV)",
+        )
+        parser.add_argument(
+            "--prune-tombstones",
+            action="store_true",
+            help="Elimina los borrados registrados fuera de DELTA_EXPORT_TOMBSTONE_DAYS",
+        )
+
+    def handle(self, *args, **options):
+        if options["prune_tombstones"]:
+            self.stdout.write(f"Borrados antiguos eliminados: {prune_tombstones()}")
+            if not options["output"]:
+                return
+        if not options["output"]:
+            raise CommandError("Indique --output")
+        if options["limit"] < 1:
+            raise CommandError("--limit debe ser mayor que 0")
+
+        cursor = options["cursor"]
+        cursor_file = Path(options["cursor_file"]) if options["cursor_file"] else None
+        if cursor is None and cursor_file is not None and cursor_file.exists():
+            cursor = cursor_file.read_text().strip() or None
+
+        pages = []
+        try:
+            page = delta_page(cursor, limit=options["limit"])
+            pages.append(page)
+            while page.has_more and options["all_pages"]:
+                page = delta_page(page.next_cursor, limit=options["limit"])
+                pages.append(page)
+        except InvalidCursor as exc:
+            raise CommandError(str(exc))
+
+        row_count = 0
+
+        def rows():
+            nonlocal row_count
+            for current in pages:
+                for row in current.rows():
+                    row_count += 1
+                    yield row
+
+        with open(options["output"], "wb") as output:
+            write_csv(output, DELTA_EXPORT_HEADER, rows())
+
+        # El cursor se guarda solo cuando el CSV quedó escrito completo
+        if cursor_file is not None:
+            cursor_file.write_text(page.next_cursor)
+        self.stdout.write(f"Filas exportadas: {row_count}")
+        self.stdout.write(f"Cursor siguiente: {page.next_cursor}")
+        if page.has_more:
+            self.stdout.write("Quedan cambios pendientes: vuelva a ejecutar con el cursor siguiente.")
+        self.stdout.write(self.style.SUCCESS(f"Delta exportado en {options['output']}"))
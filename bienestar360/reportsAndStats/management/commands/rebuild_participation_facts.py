@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from reportsAndStats.facts import rebuild_facts
+
+
+class Command(BaseCommand):
+    help = "Reconstruye desde cero el rollup diario de participación (ParticipationFact)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Cantidad de filas por INSERT al recrear el rollup",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write("Reconstruyendo el rollup de participación...")
+        total = rebuild_facts(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Rollup reconstruido: {total} filas."))
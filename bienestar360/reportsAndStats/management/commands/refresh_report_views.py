@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand
+
+from reportsAndStats.report_cache import bump_data_version
+from reportsAndStats.report_views import (
+    REPORT_VIEWS, create_report_view, drop_report_view, existing_report_views,
+    invalidate_report_views_available, refresh_report_view, uses_materialized_views,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Crea y refresca las vistas materializadas de reportes "
+        "(tablas comunes cuando el motor no es PostgreSQL)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrently",
+            action="store_true",
+            help="Refresca sin bloquear las lecturas (REFRESH MATERIALIZED VIEW CONCURRENTLY, solo PostgreSQL)",
+        )
+        parser.add_argument(
+            "--recreate",
+            action="store_true",
+            help="Elimina y vuelve a crear las vistas (necesario si cambió su definición)",
+        )
+        parser.add_argument(
+            "--drop",
+            action="store_true",
+            help="Elimina las vistas; los reportes vuelven a consultar las tablas originales",
+        )
+
+    def handle(self, *args, **options):
+        kind = "vista materializada" if uses_materialized_views() else "tabla"
+        existing = set(existing_report_views())
+
+        try:
+            if options["drop"] or options["recreate"]:
+                for view in REPORT_VIEWS.values():
+                    drop_report_view(view)
+                    self.stdout.write(f"Eliminada {kind}: {view.name}")
+                existing = set()
+                if options["drop"]:
+                    self.stdout.write(self.style.SUCCESS("Vistas de reportes eliminadas."))
+                    return
+
+            concurrently = options["concurrently"] and uses_materialized_views()
+            if options["concurrently"] and not concurrently:
+                self.stdout.write("El motor no es PostgreSQL: se refresca sin CONCURRENTLY.")
+
+            for view in REPORT_VIEWS.values():
+                if view.name in existing:
+                    refresh_report_view(view, concurrently=concurrently)
+                    self.stdout.write(f"Refrescada {kind}: {view.name}")
+                else:
+                    # Se crea ya con datos, no hace falta refrescarla
+                    create_report_view(view)
+                    self.stdout.write(f"Creada {kind}: {view.name}")
+        finally:
+            invalidate_report_views_available()
+
+        # Los resultados en caché se calcularon con los datos anteriores
+        bump_data_version()
+        self.stdout.write(self.style.SUCCESS("Vistas de reportes actualizadas."))
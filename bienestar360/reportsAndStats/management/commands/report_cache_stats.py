@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from reportsAndStats.report_cache import report_cache_stats, reset_report_cache_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Muestra los aciertos y fallos de la caché de resultados de reportes "
+        "(estimados a partir de la muestra REPORT_CACHE_STATS_SAMPLE)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Pone en cero los contadores después de mostrarlos",
+        )
+
+    def handle(self, *args, **options):
+        stats = report_cache_stats()
+        label = " (estimado)" if stats["estimated"] else ""
+        if stats["estimated"]:
+            self.stdout.write(
+                f"Muestreo: {stats['sample']:.0%} de las consultas; los contadores son estimaciones, no conteos exactos"
+            )
+        self.stdout.write(f"Aciertos{label}: {stats['hits']}")
+        self.stdout.write(f"Fallos{label}: {stats['misses']}")
+        self.stdout.write(f"Tasa de aciertos{label}: {stats['hit_rate']}%")
+        self.stdout.write(f"Versión de los datos: {stats['data_version']}")
+        if options["reset"]:
+            reset_report_cache_stats()
+            self.stdout.write(self.style.SUCCESS("Contadores reiniciados."))
@@ -0,0 +1,86 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from reportsAndStats import worker
+from reportsAndStats.jobs import (
+    claim_pending_jobs, cleanup_expired_exports, requeue_stale_jobs, run_export_job,
+)
+
+
+class Command(BaseCommand):
+    help = "Procesa la cola de exportaciones en segundo plano (ExportJob) con un pool de procesos"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=2,
+            help="Procesos del pool; con 0 los trabajos se ejecutan en este mismo proceso",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=5.0,
+            help="Segundos de espera cuando la cola está vacía",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Procesa los trabajos pendientes y termina",
+        )
+        parser.add_argument(
+            "--stale-minutes",
+            type=int,
+            default=30,
+            help="Minutos tras los cuales un trabajo en proceso se considera abandonado y se reencola",
+        )
+
+    def handle(self, *args, **options):
+        workers = options["workers"]
+        requeued = requeue_stale_jobs(timedelta(minutes=options["stale_minutes"]))
+        if requeued:
+            self.stdout.write(f"Trabajos reencolados: {requeued}")
+
+        pool = None
+        if workers > 0:
+            pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=worker.init_worker,
+            )
+
+        processed = 0
+        try:
+            while True:
+                expired = cleanup_expired_exports()
+                if expired:
+                    self.stdout.write(f"Archivos expirados eliminados: {expired}")
+
+                job_ids = claim_pending_jobs(limit=max(workers, 1))
+                if not job_ids:
+                    if options["once"]:
+                        break
+                    time.sleep(options["poll_interval"])
+                    continue
+
+                if pool is None:
+                    results = [(job_id, run_export_job(job_id)) for job_id in job_ids]
+                else:
+                    futures = {pool.submit(worker.run_job, job_id): job_id for job_id in job_ids}
+                    wait(futures)
+                    results = [(job_id, future.result()) for future, job_id in futures.items()]
+
+                for job_id, status in results:
+                    self.stdout.write(f"Exportación {job_id}: {status}")
+                processed += len(results)
+        except KeyboardInterrupt:
+            self.stdout.write("Worker detenido.")
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        self.stdout.write(self.style.SUCCESS(f"Exportaciones procesadas: {processed}"))
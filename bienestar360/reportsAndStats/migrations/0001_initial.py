@@ -0,0 +1,38 @@
+# Generated by Django 5.2.5 on 2026-10-18 16:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('activities', '0001_initial'),
+        ('login', '0002_customuser_gender_customuser_identification'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ParticipationFact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('activity_type', models.CharField(blank=True, max_length=20, null=True)),
+                ('gender', models.CharField(blank=True, default='', max_length=1)),
+                ('enrollment_count', models.PositiveIntegerField(default=0)),
+                ('participation_count', models.PositiveIntegerField(default=0)),
+                ('enrolled_users', models.PositiveIntegerField(default=0)),
+                ('participant_users', models.PositiveIntegerField(default=0)),
+                ('activity', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='participation_facts', to='activities.activity')),
+                ('faculty', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='participation_facts', to='login.faculty')),
+            ],
+            options={
+                'verbose_name': 'Hecho de participación',
+                'verbose_name_plural': 'Hechos de participación',
+                'indexes': [models.Index(fields=['date'], name='reportsAndS_date_c0f3d0_idx'), models.Index(fields=['activity_type', 'date'], name='reportsAndS_activit_3fe865_idx'), models.Index(fields=['gender', 'date'], name='reportsAndS_gender_606de7_idx')],
+                'unique_together': {('date', 'activity', 'faculty', 'gender')},
+            },
+        ),
+    ]
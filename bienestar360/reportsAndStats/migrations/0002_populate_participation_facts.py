@@ -0,0 +1,75 @@
+from collections import defaultdict
+
+from django.db import migrations
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+
+
+def populate_facts(apps, schema_editor):
+    """Carga inicial del rollup con los datos ya existentes."""
+    CustomUser = apps.get_model("login", "CustomUser")
+    Activity = apps.get_model("activities", "Activity")
+    Enrollment = apps.get_model("activities", "Enrollment")
+    Participation = apps.get_model("activities", "Participation")
+    ParticipationFact = apps.get_model("reportsAndStats", "ParticipationFact")
+
+    admin_user_ids = set(
+        CustomUser.objects.filter(
+            Q(groups__name="admin") | Q(is_staff=True) | Q(is_superuser=True) | Q(faculty__name="CADI")
+        ).values_list("id", flat=True)
+    )
+
+    counts = defaultdict(lambda: [0, 0, 0, 0])
+    enrollment_rows = (
+        Enrollment.objects.exclude(user__id__in=admin_user_ids)
+        .annotate(day=TruncDate("registered_at"))
+        .values("day", "activity_id", "user__faculty_id", "user__gender")
+        .annotate(total=Count("id"), users=Count("user", distinct=True))
+        .order_by()
+    )
+    for row in enrollment_rows:
+        key = (row["day"], row["activity_id"], row["user__faculty_id"], row["user__gender"] or "")
+        counts[key][0] += row["total"]
+        counts[key][2] += row["users"]
+
+    participation_rows = (
+        Participation.objects.filter(attendance_date__isnull=False)
+        .exclude(user__id__in=admin_user_ids)
+        .values("attendance_date", "activity_id", "user__faculty_id", "user__gender")
+        .annotate(total=Count("id"), users=Count("user", distinct=True))
+        .order_by()
+    )
+    for row in participation_rows:
+        key = (row["attendance_date"], row["activity_id"], row["user__faculty_id"], row["user__gender"] or "")
+        counts[key][1] += row["total"]
+        counts[key][3] += row["users"]
+
+    activity_types = dict(Activity.objects.values_list("activityId", "type"))
+    ParticipationFact.objects.bulk_create(
+        [
+            ParticipationFact(
+                date=day,
+                activity_id=activity_id,
+                activity_type=activity_types.get(activity_id),
+                faculty_id=faculty_id,
+                gender=gender,
+                enrollment_count=values[0],
+                participation_count=values[1],
+                enrolled_users=values[2],
+                participant_users=values[3],
+            )
+            for (day, activity_id, faculty_id, gender), values in counts.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reportsAndStats', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_facts, migrations.RunPython.noop),
+    ]
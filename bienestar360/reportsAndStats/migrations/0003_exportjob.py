@@ -0,0 +1,40 @@
+# Generated by Django 5.2.5 on 2026-10-18 17:06
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reportsAndStats', '0002_populate_participation_facts'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('participation_csv', 'Reporte de participación (CSV)'), ('table_csv', 'Tabla de reportes (CSV)'), ('table_xlsx', 'Tabla de reportes (Excel)'), ('segmentation_csv', 'Segmentación de participación (CSV)'), ('segmentation_xlsx', 'Segmentación de participación (Excel)')], max_length=30)),
+                ('params', models.JSONField(blank=True, default=dict)),
+                ('status', models.CharField(choices=[('pending', 'Pendiente'), ('running', 'En proceso'), ('done', 'Lista'), ('failed', 'Fallida'), ('expired', 'Expirada')], default='pending', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('expires_at', models.DateTimeField(blank=True, null=True)),
+                ('artifact', models.CharField(blank=True, default='', max_length=100)),
+                ('filename', models.CharField(blank=True, default='', max_length=150)),
+                ('error', models.TextField(blank=True, default='')),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='export_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Exportación',
+                'verbose_name_plural': 'Exportaciones',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='reportsAndS_status_f5f551_idx'), models.Index(fields=['expires_at'], name='reportsAndS_expires_9035d4_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-18 17:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reportsAndStats', '0003_exportjob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exportjob',
+            name='cache_key',
+            field=models.CharField(blank=True, default='', max_length=150),
+        ),
+        migrations.AlterField(
+            model_name='exportjob',
+            name='kind',
+            field=models.CharField(choices=[('participation_csv', 'Reporte de participación (CSV)'), ('table_csv', 'Tabla de reportes (CSV)'), ('table_xlsx', 'Tabla de reportes (Excel)'), ('segmentation_csv', 'Segmentación de participación (CSV)'), ('segmentation_xlsx', 'Segmentación de participación (Excel)'), ('participation_pdf', 'Reporte formal de participación (PDF)')], max_length=30),
+        ),
+        migrations.AddIndex(
+            model_name='exportjob',
+            index=models.Index(fields=['kind', 'cache_key'], name='reportsAndS_kind_7a9433_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reportsAndStats', '0004_exportjob_cache_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletedRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Registro borrado',
+                'verbose_name_plural': 'Registros borrados',
+                'indexes': [models.Index(fields=['deleted_at', 'id'], name='reportsAndS_deleted_dcabe0_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.5 on 2026-10-18 20:27
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def remove_duplicate_facts(apps, schema_editor):
+    """
+    Con unique_together podían repetirse las filas sin facultad. Cada copia
+    guarda los conteos completos de su combinación: se conserva la más reciente.
+    """
+    ParticipationFact = apps.get_model("reportsAndStats", "ParticipationFact")
+    duplicates = (
+        ParticipationFact.objects.values("date", "activity", "faculty", "gender")
+        .annotate(copies=Count("pk"), keep=Max("pk"))
+        .filter(copies__gt=1)
+        .order_by()
+    )
+    for row in duplicates:
+        ParticipationFact.objects.filter(
+            date=row["date"], activity=row["activity"], faculty=row["faculty"], gender=row["gender"],
+        ).exclude(pk=row["keep"]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activities', '0006_activity_event_starts_at'),
+        ('login', '0002_customuser_gender_customuser_identification'),
+        ('reportsAndStats', '0005_deletedrecord'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='participationfact',
+            unique_together=set(),
+        ),
+        migrations.RunPython(remove_duplicate_facts, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='participationfact',
+            constraint=models.UniqueConstraint(fields=('date', 'activity', 'faculty', 'gender'), name='unique_participation_fact', nulls_distinct=False),
+        ),
+    ]
@@ -1,3 +1,6 @@
+import uuid
+
+from django.conf import settings
 from django.db import models
 
 # Create your models here.
@@ -15,3 +18,142 @@ def general_reports_view(request):
         "faculty_distribution": faculty_distribution,
         "faculty_json": json.dumps(faculty_distribution)
     })
+
+
+# ==============================================================
+# ROLLUP DIARIO DE PARTICIPACIÓN
+# ==============================================================
+
+class ParticipationFact(models.Model):
+    """
+    Rollup diario de inscripciones y asistencias por actividad, tipo de
+    actividad, facultad y género. Excluye a los usuarios administradores/CADI.
+
+    Se mantiene al día con las señales de `reportsAndStats.signals` y se
+    reconstruye desde cero con `python manage.py rebuild_participation_facts`.
+    """
+    date = models.DateField()
+    activity = models.ForeignKey(
+        "activities.Activity", on_delete=models.CASCADE, related_name="participation_facts"
+    )
+    activity_type = models.CharField(max_length=20, null=True, blank=True)
+    faculty = models.ForeignKey(
+        "login.Faculty", on_delete=models.CASCADE, null=True, blank=True, related_name="participation_facts"
+    )
+    gender = models.CharField(max_length=1, blank=True, default="")
+
+    enrollment_count = models.PositiveIntegerField(default=0)
+    participation_count = models.PositiveIntegerField(default=0)
+    # Usuarios distintos dentro de la combinación (fecha, actividad, facultad, género)
+    enrolled_users = models.PositiveIntegerField(default=0)
+    participant_users = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # Las filas sin facultad también chocan (nulls_distinct: PostgreSQL 15+);
+            # rebuild_facts no toma el bloqueo de la actividad que usa refresh_facts
+            models.UniqueConstraint(
+                fields=["date", "activity", "faculty", "gender"],
+                nulls_distinct=False,
+                name="unique_participation_fact",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["date"]),
+            models.Index(fields=["activity_type", "date"]),
+            models.Index(fields=["gender", "date"]),
+        ]
+        verbose_name = "Hecho de participación"
+        verbose_name_plural = "Hechos de participación"
+
+    def __str__(self):
+        return f"{self.date} · {self.activity_id} · {self.faculty_id} · {self.gender or '-'}"
+
+
+# ==============================================================
+# EXPORTACIONES EN SEGUNDO PLANO
+# ==============================================================
+
+class ExportKind(models.TextChoices):
+    PARTICIPATION_CSV = "participation_csv", "Reporte de participación (CSV)"
+    TABLE_CSV = "table_csv", "Tabla de reportes (CSV)"
+    TABLE_XLSX = "table_xlsx", "Tabla de reportes (Excel)"
+    SEGMENTATION_CSV = "segmentation_csv", "Segmentación de participación (CSV)"
+    SEGMENTATION_XLSX = "segmentation_xlsx", "Segmentación de participación (Excel)"
+    PARTICIPATION_PDF = "participation_pdf", "Reporte formal de participación (PDF)"
+
+
+class ExportStatus(models.TextChoices):
+    PENDING = "pending", "Pendiente"
+    RUNNING = "running", "En proceso"
+    DONE = "done", "Lista"
+    FAILED = "failed", "Fallida"
+    EXPIRED = "expired", "Expirada"
+
+
+class ExportJob(models.Model):
+    """
+    Exportación CSV/Excel/PDF encolada para generarse fuera de la petición.
+
+    La cola es esta misma tabla: `python manage.py run_export_worker` toma los
+    trabajos pendientes, genera el archivo en `EXPORT_ARTIFACT_DIR` y lo deja
+    disponible hasta `expires_at`.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=30, choices=ExportKind.choices)
+    # Parámetros GET de la descarga original, como {nombre: [valores]}
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=ExportStatus.choices, default=ExportStatus.PENDING)
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="export_jobs"
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+
+    # Nombre del archivo dentro de EXPORT_ARTIFACT_DIR y nombre de descarga
+    artifact = models.CharField(max_length=100, blank=True, default="")
+    filename = models.CharField(max_length=150, blank=True, default="")
+    error = models.TextField(blank=True, default="")
+    # Clave de filtros + versión de datos (report_cache_key) para reutilizar el archivo
+    cache_key = models.CharField(max_length=150, blank=True, default="")
+
+    class Meta:
+        ordering = ["created_at"]
+        indexes = [
+            models.Index(fields=["status", "created_at"]),
+            models.Index(fields=["expires_at"]),
+            models.Index(fields=["kind", "cache_key"]),
+        ]
+        verbose_name = "Exportación"
+        verbose_name_plural = "Exportaciones"
+
+    def __str__(self):
+        return f"{self.get_kind_display()} · {self.get_status_display()}"
+
+
+# ==============================================================
+# EXPORTACIÓN INCREMENTAL
+# ==============================================================
+
+class DeletedRecord(models.Model):
+    """
+    Lápida de una inscripción o asistencia borrada, para que la exportación
+    incremental (`reportsAndStats.delta`) informe el borrado. La crean las
+    señales de `reportsAndStats.signals`; las anteriores a
+    DELTA_EXPORT_TOMBSTONE_DAYS se eliminan con
+    `python manage.py export_participation_delta --prune-tombstones`.
+    """
+    model = models.CharField(max_length=20)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["deleted_at", "id"])]
+        verbose_name = "Registro borrado"
+        verbose_name_plural = "Registros borrados"
+
+    def __str__(self):
+        return f"{self.model} {self.object_id} · {self.deleted_at}"
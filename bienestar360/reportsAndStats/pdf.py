@@ -0,0 +1,272 @@
+"""
+Reporte formal de participación en PDF (reportlab).
+
+Se genera fuera de la petición, como trabajo de la cola de exportaciones
+(`ExportKind.PARTICIPATION_PDF`), que ya reutiliza el archivo mientras la
+clave de filtros y versión del trabajo no cambie. Los gráficos se calculan en
+cada generación: el worker es otro proceso y con LocMemCache no vería los
+cambios de versión de la web, así que una caché propia podría dejarlos
+atrasados respecto del detalle. El detalle se lee
+por bloques con `.iterator()` y se dibuja página por página: en memoria solo
+queda el contenido comprimido de las páginas ya terminadas.
+"""
+from datetime import datetime
+
+from django.db.models import Count
+from reportlab.graphics import renderPDF
+from reportlab.graphics.charts.barcharts import HorizontalBarChart
+from reportlab.graphics.shapes import Drawing, String
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.units import mm
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+
+from activities.models import Enrollment
+from .aggregations import activity_ranking, frequency_histogram, headline_metrics
+from .exports import GENDER_NAMES, PARTICIPATION_EXPORT_HEADER, participation_export_querysets, participation_export_rows
+from .filters import ReportFilters
+
+
+PDF_CONTENT_TYPE = 'application/pdf'
+
+PAGE_WIDTH, PAGE_HEIGHT = landscape(A4)
+MARGIN = 15 * mm
+FONT = 'Helvetica'
+FONT_BOLD = 'Helvetica-Bold'
+PRIMARY_COLOR = colors.HexColor('#2563eb')
+ROW_HEIGHT = 5.5 * mm
+CHART_HEIGHT = 70 * mm
+
+# Ancho relativo de cada columna del detalle (mismo orden que PARTICIPATION_EXPORT_HEADER)
+DETAIL_COLUMN_WEIGHTS = (1.1, 2.0, 1.6, 1.0, 2.0, 1.2, 1.8, 1.4, 0.9, 1.1)
+
+TOP_ACTIVITIES = 10
+
+
+def report_summary(filters):
+    """Métricas y series de los gráficos del reporte para los filtros dados."""
+    enrollments = Enrollment.objects.filter(filters.enrollment_q())
+
+    def grouped(field):
+        rows = (
+            enrollments.exclude(**{f'{field}__isnull': True})
+            .values(field)
+            .annotate(total=Count('id'))
+            .order_by('-total', field)
+        )
+        return [(row[field], row['total']) for row in rows]
+
+    return {
+        'headline': headline_metrics(filters),
+        'by_type': grouped('activity__type'),
+        'by_faculty': grouped('user__faculty__name'),
+        'by_gender': [(GENDER_NAMES.get(code, code), total) for code, total in grouped('user__gender')],
+        'frequency': list(frequency_histogram(filters).items()),
+        'top_activities': [
+            (row['activity__name'], row['enrollment_count'])
+            for row in activity_ranking(filters, limit=TOP_ACTIVITIES)
+        ],
+    }
+
+
+def bar_chart(title, items, width, height=CHART_HEIGHT):
+    """Gráfico de barras horizontales como `Drawing` vectorial."""
+    drawing = Drawing(width, height)
+    drawing.add(String(0, height - 12, title, fontName=FONT_BOLD, fontSize=10))
+    if not items:
+        drawing.add(String(0, height / 2, 'Sin datos para los filtros seleccionados', fontName=FONT, fontSize=9))
+        return drawing
+
+    chart = HorizontalBarChart()
+    chart.x = 40 * mm
+    chart.y = 5
+    chart.width = width - chart.x - 10
+    chart.height = height - 25
+    # De arriba hacia abajo en el mismo orden de la serie
+    labels, values = zip(*reversed(items))
+    chart.data = [list(values)]
+    chart.categoryAxis.categoryNames = [_truncate(str(label), FONT, 7, 38 * mm) for label in labels]
+    chart.categoryAxis.labels.fontName = FONT
+    chart.categoryAxis.labels.fontSize = 7
+    chart.valueAxis.valueMin = 0
+    chart.valueAxis.labels.fontName = FONT
+    chart.valueAxis.labels.fontSize = 7
+    chart.bars[0].fillColor = PRIMARY_COLOR
+    chart.bars[0].strokeColor = None
+    drawing.add(chart)
+    return drawing
+
+
+def _truncate(text, font, size, max_width):
+    if stringWidth(text, font, size) <= max_width:
+        return text
+    while text and stringWidth(text + '…', font, size) > max_width:
+        text = text[:-1]
+    return text + '…'
+
+
+class ParticipationPdfWriter:
+    """
+    Dibuja el reporte directamente sobre un `canvas` de reportlab, sin armar
+    la lista completa de flowables de platypus.
+    """
+
+    def __init__(self, output, title, subtitle=''):
+        self.canvas = canvas.Canvas(output, pagesize=(PAGE_WIDTH, PAGE_HEIGHT), pageCompression=1)
+        self.canvas.setTitle(title)
+        self.title = title
+        self.subtitle = subtitle
+        self.page_number = 0
+        self.y = 0
+        self._start_page()
+
+    @property
+    def content_width(self):
+        return PAGE_WIDTH - 2 * MARGIN
+
+    def _start_page(self):
+        self.page_number += 1
+        c = self.canvas
+        c.setFillColor(PRIMARY_COLOR)
+        c.setFont(FONT_BOLD, 14)
+        c.drawString(MARGIN, PAGE_HEIGHT - MARGIN, self.title)
+        c.setFillColor(colors.black)
+        c.setFont(FONT, 8)
+        c.drawString(MARGIN, PAGE_HEIGHT - MARGIN - 5 * mm, self.subtitle)
+        c.drawRightString(PAGE_WIDTH - MARGIN, MARGIN / 2, f"Página {self.page_number}")
+        self.y = PAGE_HEIGHT - MARGIN - 12 * mm
+
+    def new_page(self):
+        self.canvas.showPage()
+        self._start_page()
+
+    def ensure_space(self, height):
+        if self.y - height < MARGIN:
+            self.new_page()
+
+    def heading(self, text):
+        self.ensure_space(10 * mm)
+        self.canvas.setFont(FONT_BOLD, 11)
+        self.canvas.drawString(MARGIN, self.y - 4 * mm, text)
+        self.y -= 9 * mm
+
+    def key_values(self, items):
+        """Fila de métricas destacadas: [(etiqueta, valor), ...]."""
+        self.ensure_space(14 * mm)
+        column_width = self.content_width / max(len(items), 1)
+        for index, (label, value) in enumerate(items):
+            x = MARGIN + index * column_width
+            self.canvas.setFont(FONT_BOLD, 16)
+            self.canvas.drawString(x, self.y - 6 * mm, str(value))
+            self.canvas.setFont(FONT, 8)
+            self.canvas.drawString(x, self.y - 11 * mm, label)
+        self.y -= 16 * mm
+
+    def charts(self, drawings, columns=2):
+        """Dibuja los gráficos en una grilla de `columns` columnas."""
+        for start in range(0, len(drawings), columns):
+            row = drawings[start:start + columns]
+            height = max(drawing.height for drawing in row)
+            self.ensure_space(height + 5 * mm)
+            for index, drawing in enumerate(row):
+                x = MARGIN + index * (self.content_width / columns)
+                renderPDF.draw(drawing, self.canvas, x, self.y - height)
+            self.y -= height + 5 * mm
+
+    def table(self, header, rows, weights):
+        """
+        Tabla que se parte en tantas páginas como haga falta, repitiendo el
+        encabezado. `rows` puede ser un generador: se consume fila por fila.
+        Devuelve la cantidad de filas dibujadas.
+        """
+        total_weight = sum(weights)
+        widths = [self.content_width * weight / total_weight for weight in weights]
+
+        def draw_row(values, font, fill=None):
+            c = self.canvas
+            if fill is not None:
+                c.setFillColor(fill)
+                c.rect(MARGIN, self.y - ROW_HEIGHT, self.content_width, ROW_HEIGHT, stroke=0, fill=1)
+                c.setFillColor(colors.white if font == FONT_BOLD else colors.black)
+            c.setFont(font, 7)
+            x = MARGIN
+            for value, width in zip(values, widths):
+                c.drawString(x + 1 * mm, self.y - ROW_HEIGHT + 1.7 * mm, _truncate(str(value), font, 7, width - 2 * mm))
+                x += width
+            c.setFillColor(colors.black)
+            self.y -= ROW_HEIGHT
+
+        self.ensure_space(2 * ROW_HEIGHT)
+        draw_row(header, FONT_BOLD, PRIMARY_COLOR)
+        count = 0
+        for row in rows:
+            if self.y - ROW_HEIGHT < MARGIN:
+                self.new_page()
+                draw_row(header, FONT_BOLD, PRIMARY_COLOR)
+            draw_row(row, FONT, colors.HexColor('#f3f4f6') if count % 2 else None)
+            count += 1
+        return count
+
+    def save(self):
+        self.canvas.save()
+
+
+def _filters_description(filters):
+    parts = []
+    if filters.activity_types:
+        parts.append(f"Tipo: {', '.join(filters.activity_types)}")
+    if filters.faculties:
+        parts.append(f"Facultad: {', '.join(filters.faculties)}")
+    if filters.genders:
+        parts.append(f"Género: {', '.join(GENDER_NAMES.get(code, code) for code in filters.genders)}")
+    if filters.date_start or filters.date_end:
+        parts.append(f"Fechas: {filters.date_start or '...'} a {filters.date_end or '...'}")
+    if filters.has_frequency:
+        parts.append(f"Frecuencia: {filters.frequency_min} a {filters.frequency_max}")
+    return ' · '.join(parts) or 'Sin filtros'
+
+
+def write_participation_pdf(output, filters, summary, rows):
+    """Escribe el reporte completo en `output` (archivo binario)."""
+    headline = summary['headline']
+    total_users = headline['total_users']
+    writer = ParticipationPdfWriter(
+        output,
+        'Reporte Formal de Participación',
+        f"Generado el {datetime.now().strftime('%d/%m/%Y %H:%M')} · {_filters_description(filters)}",
+    )
+
+    writer.heading('Resumen')
+    writer.key_values([
+        ('Inscripciones', headline['total_enrollments']),
+        ('Participaciones', headline['total_participations']),
+        ('Usuarios', total_users),
+        ('Frecuencia promedio', round(headline['total_enrollments'] / total_users, 2) if total_users else 0),
+    ])
+
+    chart_width = writer.content_width / 2 - 5 * mm
+    writer.heading('Visualizaciones')
+    writer.charts([
+        bar_chart('Inscripciones por tipo de actividad', summary['by_type'], chart_width),
+        bar_chart('Inscripciones por facultad', summary['by_faculty'], chart_width),
+        bar_chart('Inscripciones por género', summary['by_gender'], chart_width),
+        bar_chart('Usuarios por frecuencia de inscripción', summary['frequency'], chart_width),
+    ])
+    writer.charts([
+        bar_chart(f'Top {TOP_ACTIVITIES} actividades', summary['top_activities'], writer.content_width),
+    ], columns=1)
+
+    writer.new_page()
+    writer.heading('Detalle de participación')
+    writer.table(PARTICIPATION_EXPORT_HEADER, rows, DETAIL_COLUMN_WEIGHTS)
+    writer.save()
+
+
+def export_participation_pdf(params, output):
+    filters = ReportFilters.from_params(params)
+    # Sin caché: gráficos y detalle salen de los mismos datos que el trabajo
+    summary = report_summary(filters)
+    enrollments, participations = participation_export_querysets(params)
+    write_participation_pdf(output, filters, summary, participation_export_rows(enrollments, participations))
+    return f"reporte_participacion_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
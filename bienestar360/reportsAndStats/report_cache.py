@@ -0,0 +1,162 @@
+"""
+Caché de resultados de reportes.
+
+Cada resultado se guarda con una clave que combina el nombre del reporte, un
+hash de los parámetros normalizados y un contador de versión de los datos.
+Las señales de inscripciones, asistencias y demás datos que aparecen en los
+reportes incrementan el contador (`bump_data_version()`), así una entrada
+guardada deja de usarse en cuanto cambian los datos, sin tener que borrarla.
+
+Funciona con cualquier backend de caché de Django. Con `LocMemCache` el
+contador vive en cada proceso, por lo que solo sirve con un único proceso;
+con varios workers se debe usar un backend compartido (archivos, Redis...).
+
+El contador vive en la misma caché que los reportes y puede ser desalojado
+(LocMem y archivos descartan entradas al llegar a MAX_ENTRIES). Por eso no
+arranca en 0 sino en el instante actual en microsegundos: una versión nueva
+nunca coincide con la de entradas anteriores que sigan en la caché.
+"""
+import hashlib
+import json
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+logger = logging.getLogger(__name__)
+
+DATA_VERSION_KEY = "reports:data_version"
+HITS_KEY = "reports:cache:hits"
+MISSES_KEY = "reports:cache:misses"
+
+# Parámetros que no cambian el resultado del reporte
+IGNORED_PARAMS = ("background", "stream")
+
+
+def report_cache_timeout():
+    return getattr(settings, "REPORT_CACHE_TIMEOUT", 3600)
+
+
+def report_cache_stats_sample():
+    return getattr(settings, "REPORT_CACHE_STATS_SAMPLE", 0.02)
+
+
+def _version_seed():
+    return time.time_ns() // 1000
+
+
+def _incr(key, initial=0, delta=1):
+    # `add` no pisa el valor si ya existe; así `incr` nunca falla por clave inexistente
+    cache.add(key, initial, None)
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        # La clave expiró o fue desalojada entre `add` e `incr`
+        cache.set(key, initial + delta, None)
+        return initial + delta
+
+
+def get_data_version():
+    version = cache.get(DATA_VERSION_KEY)
+    if version is None:
+        cache.add(DATA_VERSION_KEY, _version_seed(), None)
+        version = cache.get(DATA_VERSION_KEY)
+    return version if version is not None else _version_seed()
+
+
+def bump_data_version():
+    """
+    Invalida todos los reportes en caché.
+
+    Se incrementa de inmediato (para lecturas dentro de la misma transacción)
+    y otra vez al confirmar, por si otro proceso guardó un resultado con los
+    datos anteriores mientras la transacción seguía abierta.
+    """
+    _incr(DATA_VERSION_KEY, _version_seed())
+    transaction.on_commit(lambda: _incr(DATA_VERSION_KEY, _version_seed()))
+
+
+def normalize_params(params):
+    """
+    Parámetros como lista ordenada de `(nombre, valores)`, sin valores vacíos
+    ni parámetros de control. `params` es un dict o un QueryDict.
+    """
+    if hasattr(params, "getlist"):
+        items = ((key, params.getlist(key)) for key in params)
+    else:
+        items = ((key, value if isinstance(value, (list, tuple)) else [value]) for key, value in params.items())
+    normalized = []
+    for key, values in items:
+        values = sorted(str(value) for value in values if value not in (None, ""))
+        if key not in IGNORED_PARAMS and values:
+            normalized.append((key, values))
+    return sorted(normalized)
+
+
+def report_cache_key(name, params, version=None):
+    if version is None:
+        version = get_data_version()
+    digest = hashlib.sha256(
+        json.dumps(normalize_params(params), separators=(",", ":")).encode("utf-8")
+    ).hexdigest()
+    return f"reports:{name}:v{version}:{digest}"
+
+
+def cached_report(name, params, compute, timeout=None):
+    """
+    Devuelve el resultado en caché del reporte `name` para `params`, o lo
+    calcula con `compute()` y lo guarda (`timeout` segundos, por defecto
+    REPORT_CACHE_TIMEOUT). Cuenta aciertos y fallos por muestreo.
+    """
+    key = report_cache_key(name, params)
+    result = cache.get(key)
+    if result is not None:
+        _count(HITS_KEY, name)
+        return result
+    _count(MISSES_KEY, name)
+    result = compute()
+    cache.set(key, result, timeout if timeout is not None else report_cache_timeout())
+    return result
+
+
+def _count(key, name):
+    """
+    Suma un acierto o fallo solo en una fracción REPORT_CACHE_STATS_SAMPLE de
+    las consultas (con el peso inverso), para no escribir en la caché en
+    cada reporte: los totales son una estimación. Con 1 se cuentan todas
+    (conteo exacto); con 0 no se cuenta nada.
+    """
+    logger.debug("Caché de reportes %s: %s", "acierto" if key == HITS_KEY else "fallo", name)
+    sample = report_cache_stats_sample()
+    if sample >= 1:
+        _incr(key)
+    elif sample > 0 and random.random() < sample:
+        _incr(key, delta=round(1 / sample))
+
+
+def report_cache_stats():
+    """
+    Aciertos y fallos de la caché de reportes. Con REPORT_CACHE_STATS_SAMPLE
+    menor que 1 no son conteos exactos sino estimaciones a partir de la
+    muestra (`estimated` es True y `sample` indica la fracción contada).
+    """
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    sample = report_cache_stats_sample()
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / total * 100, 1) if total else 0,
+        "sample": sample,
+        "estimated": sample < 1,
+        "data_version": get_data_version(),
+    }
+
+
+def reset_report_cache_stats():
+    cache.delete_many([HITS_KEY, MISSES_KEY])
@@ -0,0 +1,138 @@
+"""
+Vistas materializadas de reportes (opcional).
+
+`python manage.py refresh_report_views` crea y refresca las agrupaciones de
+inscripciones y asistencias por actividad, facultad, género y semestre que
+usa la línea de tiempo de `FilteredReportsView` (ver `timeline`). Cada vista
+se define con el mismo QuerySet que se usaría sin ella, así ambas rutas dan
+el mismo resultado.
+
+En PostgreSQL (Supabase) son `MATERIALIZED VIEW` con un índice único, lo que
+permite `REFRESH ... CONCURRENTLY` sin bloquear las lecturas. En otros motores
+(SQLite en `settings_test.py`) son tablas comunes que el mismo comando vacía y
+vuelve a llenar. Los reportes las usan solo si existen; `--drop` las elimina
+y los reportes vuelven a consultar las tablas originales.
+"""
+from dataclasses import dataclass
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils.module_loading import import_string
+
+
+AVAILABLE_CACHE_KEY = "reports:materialized_views"
+# Cada cuánto se vuelve a comprobar si existen (el comando invalida la marca)
+AVAILABLE_CACHE_TIMEOUT = 300
+
+
+@dataclass(frozen=True)
+class ReportView:
+    name: str
+    # Función (ruta importable) que devuelve el QuerySet `values()` de la vista
+    source: str
+    # Columnas del índice único (las de agrupación)
+    key_columns: tuple
+
+
+REPORT_VIEWS = {
+    view.name: view for view in (
+        ReportView(
+            name="report_enrollment_semester",
+            source="reportsAndStats.timeline.enrollment_rows",
+            key_columns=(
+                "bucket_year", "bucket_half", "user_id",
+                "gender", "faculty_name", "activity_name", "activity_type",
+            ),
+        ),
+        ReportView(
+            name="report_participation_semester",
+            source="reportsAndStats.timeline.participation_rows",
+            key_columns=("bucket_year", "bucket_half", "user_id"),
+        ),
+    )
+}
+
+
+def uses_materialized_views():
+    return connection.vendor == "postgresql"
+
+
+def _source_queryset(view):
+    return import_string(view.source)()
+
+
+def _columns(queryset):
+    return list(queryset.query.values_select) + list(queryset.query.annotation_select)
+
+
+def existing_report_views():
+    existing = set(connection.introspection.table_names(include_views=True))
+    return [name for name in REPORT_VIEWS if name in existing]
+
+
+def report_views_available():
+    """Indica si existen todas las vistas (resultado guardado en caché)."""
+    available = cache.get(AVAILABLE_CACHE_KEY)
+    if available is None:
+        available = len(existing_report_views()) == len(REPORT_VIEWS)
+        cache.set(AVAILABLE_CACHE_KEY, available, AVAILABLE_CACHE_TIMEOUT)
+    return available
+
+
+def report_view_rows(name):
+    """
+    Filas de la vista `name` como dicts (mismas claves que su QuerySet de
+    origen), o None si las vistas no existen.
+    """
+    if not report_views_available():
+        return None
+    return _read_rows(REPORT_VIEWS[name])
+
+
+def _read_rows(view):
+    columns = _columns(_source_queryset(view))
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT {', '.join(quote(c) for c in columns)} FROM {quote(view.name)}")
+        for row in cursor:
+            yield dict(zip(columns, row))
+
+
+def create_report_view(view):
+    quote = connection.ops.quote_name
+    sql, params = _source_queryset(view).query.sql_with_params()
+    with connection.cursor() as cursor:
+        if uses_materialized_views():
+            cursor.execute(f"CREATE MATERIALIZED VIEW {quote(view.name)} AS {sql}", params)
+            # REFRESH ... CONCURRENTLY exige un índice único sin expresiones
+            cursor.execute(
+                f"CREATE UNIQUE INDEX {quote(view.name + '_key')} ON {quote(view.name)} "
+                f"({', '.join(quote(c) for c in view.key_columns)})"
+            )
+        else:
+            cursor.execute(f"CREATE TABLE {quote(view.name)} AS {sql}", params)
+
+
+def refresh_report_view(view, concurrently=False):
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        if uses_materialized_views():
+            mode = "CONCURRENTLY " if concurrently else ""
+            cursor.execute(f"REFRESH MATERIALIZED VIEW {mode}{quote(view.name)}")
+        else:
+            # Las lecturas ven la tabla vieja o la nueva, nunca a medio llenar
+            sql, params = _source_queryset(view).query.sql_with_params()
+            with transaction.atomic():
+                cursor.execute(f"DELETE FROM {quote(view.name)}")
+                cursor.execute(f"INSERT INTO {quote(view.name)} {sql}", params)
+
+
+def drop_report_view(view):
+    quote = connection.ops.quote_name
+    kind = "MATERIALIZED VIEW" if uses_materialized_views() else "TABLE"
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP {kind} IF EXISTS {quote(view.name)}")
+
+
+def invalidate_report_views_available():
+    cache.delete(AVAILABLE_CACHE_KEY)
@@ -0,0 +1,111 @@
+from django.utils import timezone
+
+from login.roles import ADMIN_GROUP_NAME
+from .facts import enrollment_fact_date, refresh_facts, refresh_user_facts
+from .report_cache import bump_data_version
+
+# Campos del usuario que cambian cómo (o si) cuenta en el rollup
+USER_FACT_FIELDS = ("is_staff", "is_superuser", "faculty_id", "gender")
+
+
+def _previous_values(sender, instance, fields, update_fields):
+    # Valores guardados antes de una modificación que puede mover el registro a otra fila del rollup
+    if instance._state.adding:
+        return None
+    if update_fields is not None and not {"activity", "activity_id", *fields} & set(update_fields):
+        return None
+    return sender.objects.filter(pk=instance.pk).values_list("activity_id", *fields).first()
+
+
+def enrollment_pre_save(sender, instance, update_fields=None, **kwargs):
+    previous = _previous_values(sender, instance, ("registered_at",), update_fields)
+    instance._fact_bucket = None
+    if previous is not None and previous[1] is not None:
+        instance._fact_bucket = (previous[0], timezone.localdate(previous[1]))
+
+
+def enrollment_saved(sender, instance, **kwargs):
+    _refresh_buckets(instance, (instance.activity_id, enrollment_fact_date(instance)))
+
+
+def enrollment_deleted(sender, instance, **kwargs):
+    refresh_facts(instance.activity_id, enrollment_fact_date(instance), allow_create=False)
+
+
+def participation_pre_save(sender, instance, update_fields=None, **kwargs):
+    instance._fact_bucket = _previous_values(sender, instance, ("attendance_date",), update_fields)
+
+
+def participation_saved(sender, instance, **kwargs):
+    _refresh_buckets(instance, (instance.activity_id, instance.attendance_date))
+
+
+def _refresh_buckets(instance, bucket):
+    # Fila actual y, si el registro cambió de actividad o de día, la que dejó
+    refresh_facts(*bucket)
+    previous = instance.__dict__.pop("_fact_bucket", None)
+    if previous is not None and previous != bucket:
+        refresh_facts(*previous, allow_create=False)
+
+
+def participation_deleted(sender, instance, **kwargs):
+    refresh_facts(instance.activity_id, instance.attendance_date, allow_create=False)
+
+
+def record_deleted(sender, instance, **kwargs):
+    # Lápida para la exportación incremental
+    from .models import DeletedRecord
+    DeletedRecord.objects.create(model=sender._meta.model_name, object_id=instance.pk)
+
+
+def report_data_changed(sender, **kwargs):
+    # Cualquier cambio en los datos de los reportes invalida la caché de resultados
+    bump_data_version()
+
+
+def activity_saved(sender, instance, created, **kwargs):
+    # Mantener el tipo desnormalizado del rollup si cambió el de la actividad
+    if not created:
+        from .models import ParticipationFact
+        ParticipationFact.objects.filter(activity_id=instance.pk).exclude(
+            activity_type=instance.type
+        ).update(activity_type=instance.type)
+
+
+def _only_last_login(update_fields):
+    return update_fields is not None and set(update_fields) <= {"last_login"}
+
+
+def user_pre_save(sender, instance, update_fields=None, **kwargs):
+    if instance.pk is None or _only_last_login(update_fields):
+        return
+    instance._fact_fields = sender.objects.filter(pk=instance.pk).values_list(*USER_FACT_FIELDS).first()
+
+
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    if not _only_last_login(update_fields):
+        bump_data_version()
+    previous = getattr(instance, "_fact_fields", None)
+    if created or previous is None:
+        return
+    del instance._fact_fields
+    if previous != tuple(getattr(instance, field) for field in USER_FACT_FIELDS):
+        refresh_user_facts(instance.pk)
+
+
+def user_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    # Solo importa la pertenencia al grupo admin
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    from django.contrib.auth.models import Group
+
+    if not reverse:
+        if pk_set and not Group.objects.filter(pk__in=pk_set, name=ADMIN_GROUP_NAME).exists():
+            return
+        bump_data_version()
+        refresh_user_facts(instance.pk)
+    elif instance.name == ADMIN_GROUP_NAME:
+        bump_data_version()
+        # En post_clear inverso Django no informa qué usuarios se quitaron
+        for user_id in pk_set or ():
+            refresh_user_facts(user_id)
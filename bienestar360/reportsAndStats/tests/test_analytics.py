@@ -0,0 +1,175 @@
+import random
+import shutil
+import tempfile
+import unittest
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Count
+from django.http import QueryDict
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from activities.models import Activity, Enrollment, Participation, ActivityType, CategoryType
+from login.models import Faculty
+from reportsAndStats import analytics
+from reportsAndStats.aggregations import activity_ranking, frequency_histogram, headline_metrics
+from reportsAndStats.analytics import AnalyticsSnapshot, analytics_snapshot
+from reportsAndStats.filters import ReportFilters
+
+User = get_user_model()
+
+TYPES = [ActivityType.DEPORTIVA, ActivityType.ARTISTICA, ActivityType.EVENTOS, None]
+FACULTIES = ["Medicina", "Derecho", "Diseño"]
+GENDERS = ["M", "F", "O", ""]
+FIRST_DAY = date(2024, 1, 1)
+
+
+@unittest.skipUnless(analytics.np is not None, "NumPy no está instalado")
+class AnalyticsSnapshotPropertyTests(TestCase):
+    """Pruebas de propiedad: el snapshot NumPy da los mismos resultados que SQL."""
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(360)
+        faculties = [Faculty.objects.get_or_create(name=name)[0] for name in FACULTIES] + [None]
+        users = [
+            User.objects.create_user(
+                username=f"user{index}", password="pass1234",
+                gender=rng.choice(GENDERS), faculty=rng.choice(faculties),
+            )
+            for index in range(30)
+        ]
+        # Un admin con inscripciones: nunca debe aparecer en los resultados
+        users.append(User.objects.create_user(username="staff", password="pass1234", gender="F", is_staff=True))
+        activities = [
+            Activity.objects.create(name=f"Actividad {index % 6}", type=rng.choice(TYPES), category=CategoryType.GRUPAL)
+            for index in range(8)
+        ]
+        for user in users:
+            for activity in rng.sample(activities, rng.randint(0, 6)):
+                enrollment = Enrollment.objects.create(user=user, activity=activity)
+                # Horas cerca de medianoche UTC para cubrir el cambio de día local
+                registered_at = datetime(2024, 1, 1, rng.choice([2, 4, 15]), tzinfo=dt_timezone.utc)
+                Enrollment.objects.filter(pk=enrollment.pk).update(
+                    registered_at=registered_at + timedelta(days=rng.randrange(120)),
+                )
+                for day in rng.sample(range(120), rng.randint(0, 4)):
+                    Participation.objects.create(
+                        user=user, activity=activity,
+                        attendance_date=FIRST_DAY + timedelta(days=day) if day % 7 else None,
+                    )
+
+    def setUp(self):
+        self.snapshot = AnalyticsSnapshot()
+
+    def _random_filters(self, rng):
+        params = QueryDict(mutable=True)
+        if rng.random() < 0.5:
+            params.setlist("activity_type", rng.sample([t for t in TYPES if t] + ["Desconocido"], rng.randint(1, 2)))
+        if rng.random() < 0.5:
+            params.setlist("faculty", rng.sample(FACULTIES, rng.randint(1, 2)))
+        if rng.random() < 0.5:
+            params.setlist("gender", rng.sample(GENDERS[:3], rng.randint(1, 2)))
+        if rng.random() < 0.4:
+            params["date_start"] = (FIRST_DAY + timedelta(days=rng.randrange(60))).isoformat()
+        if rng.random() < 0.4:
+            params["date_end"] = (FIRST_DAY + timedelta(days=rng.randrange(60, 130))).isoformat()
+        if rng.random() < 0.4:
+            params["frequency_min"] = str(rng.randint(0, 3))
+            if rng.random() < 0.5:
+                params["frequency_max"] = str(rng.randint(1, 5))
+        return ReportFilters.from_params(params)
+
+    def _sql_groups(self, queryset, field):
+        rows = (
+            queryset.exclude(**{f"{field}__isnull": True})
+            .values(field)
+            .annotate(count=Count("id"), users=Count("user", distinct=True), activities=Count("activity", distinct=True))
+            .order_by()
+        )
+        return {row[field]: {"count": row["count"], "users": row["users"], "activities": row["activities"]} for row in rows}
+
+    def test_random_filters_match_sql(self):
+        """Test: Para filtros aleatorios, métricas, histograma, ranking y agrupaciones coinciden con SQL."""
+        rng = random.Random(2024)
+        for _ in range(40):
+            filters = self._random_filters(rng)
+            with self.subTest(filters=filters):
+                self.assertEqual(self.snapshot.headline_metrics(filters), headline_metrics(filters))
+                self.assertEqual(self.snapshot.frequency_histogram(filters), frequency_histogram(filters))
+                self.assertEqual(self.snapshot.activity_ranking(filters, limit=None), activity_ranking(filters, limit=None))
+
+                enrollments = Enrollment.objects.filter(filters.enrollment_q())
+                participations = Participation.objects.filter(filters.participation_q())
+                for column, field in (("type", "activity__type"), ("faculty", "user__faculty__name"), ("gender", "user__gender")):
+                    self.assertEqual(self.snapshot.group_by(filters, column), self._sql_groups(enrollments, field))
+                    self.assertEqual(
+                        self.snapshot.group_by(filters, column, table="participations"),
+                        self._sql_groups(participations, field),
+                    )
+
+    def test_answers_without_queries(self):
+        """Test: Una vez cargado, el snapshot responde sin consultas a la base de datos."""
+        filters = ReportFilters.from_params(QueryDict("gender=F&frequency_min=2"))
+        with self.assertNumQueries(0):
+            self.snapshot.headline_metrics(filters)
+            self.snapshot.activity_ranking(filters)
+            self.snapshot.group_by(filters, "faculty")
+
+
+@unittest.skipUnless(analytics.np is not None, "NumPy no está instalado")
+class AnalyticsSnapshotLifecycleTests(TestCase):
+    """Pruebas de la activación y recarga del snapshot por worker."""
+
+    def setUp(self):
+        # La versión de datos debe vivir en una caché que vean todos los workers
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.enterContext(override_settings(CACHES={
+            "default": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": directory},
+        }))
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.addCleanup(setattr, analytics, "_snapshot", None)
+        self.user = User.objects.create_user(username="ana", password="pass1234", gender="F")
+        self.activity = Activity.objects.create(name="Yoga", type=ActivityType.DEPORTIVA)
+        Enrollment.objects.create(user=self.user, activity=self.activity)
+
+    def test_disabled_by_default(self):
+        """Test: Sin REPORT_ANALYTICS_SNAPSHOT los reportes usan SQL."""
+        with override_settings(REPORT_ANALYTICS_SNAPSHOT=False):
+            self.assertIsNone(analytics_snapshot())
+
+    def test_requires_shared_cache(self):
+        """Test: Con LocMemCache (versión de datos por proceso) el snapshot no se usa."""
+        locmem = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+        self.addCleanup(setattr, analytics, "_warned", analytics._warned)
+        analytics._warned = False
+        with override_settings(REPORT_ANALYTICS_SNAPSHOT=True, CACHES=locmem):
+            with self.assertLogs("reportsAndStats.analytics", "WARNING"):
+                self.assertIsNone(analytics_snapshot())
+
+    @override_settings(REPORT_ANALYTICS_SNAPSHOT=True)
+    def test_reloads_when_data_version_changes(self):
+        """Test: El snapshot se reutiliza hasta que cambia la versión de datos."""
+        first = analytics_snapshot()
+        self.assertIs(analytics_snapshot(), first)
+        self.assertEqual(first.headline_metrics(ReportFilters())["total_enrollments"], 1)
+
+        Enrollment.objects.create(user=self.user, activity=Activity.objects.create(name="Teatro"))
+        second = analytics_snapshot()
+        self.assertIsNot(second, first)
+        self.assertEqual(second.headline_metrics(ReportFilters())["total_enrollments"], 2)
+
+    def test_formal_report_matches_sql(self):
+        """Test: El reporte formal muestra lo mismo con y sin snapshot."""
+        url = reverse("reportsAndStats:participation_formal_report")
+        keys = ("total_enrollments", "total_participations", "total_users", "frequency_distribution", "top_activities")
+        with override_settings(REPORT_ANALYTICS_SNAPSHOT=False):
+            expected = Client().get(url).context
+        with override_settings(REPORT_ANALYTICS_SNAPSHOT=True):
+            context = Client().get(url).context
+        for key in keys:
+            self.assertEqual(context[key], expected[key])
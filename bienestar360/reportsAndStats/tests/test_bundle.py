@@ -0,0 +1,88 @@
+import csv
+import io
+import zipfile
+from datetime import date, time
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.http import QueryDict, StreamingHttpResponse
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from activities.exports import SEGMENTATION_HEADERS, segmentation_rows
+from activities.models import Activity, Enrollment, Participation, Schedule, ActivityType, CategoryType
+from reportsAndStats.aggregations import participation_table_rows
+from reportsAndStats.bundle import zip_stream
+from reportsAndStats.exports import PARTICIPATION_EXPORT_HEADER
+
+User = get_user_model()
+
+
+class ReportBundleTests(TestCase):
+    """Pruebas del paquete ZIP con todas las exportaciones CSV."""
+
+    def setUp(self):
+        self.client = Client()
+        self.url = reverse("reportsAndStats:report_bundle")
+        student = User.objects.create_user(username="student", password="pass1234", identification="A001", gender="F")
+        yoga = Activity.objects.create(name="Yoga", type=ActivityType.DEPORTIVA, category=CategoryType.GRUPAL)
+        teatro = Activity.objects.create(name="Teatro", type=ActivityType.ARTISTICA, category=CategoryType.GRUPAL)
+        schedule = Schedule.objects.create(activity=yoga, day="Lunes", start_time=time(8), end_time=time(10))
+        Enrollment.objects.create(user=student, activity=yoga, schedule=schedule)
+        Enrollment.objects.create(user=student, activity=teatro)
+        for day in range(1, 4):
+            Participation.objects.create(
+                user=student, activity=yoga, schedule=schedule, attendance_date=date(2025, 3, day), attendance_time=time(8),
+            )
+
+    def _members(self, content):
+        with zipfile.ZipFile(io.BytesIO(content)) as archive:
+            self.assertIsNone(archive.testzip())
+            return {
+                info.filename: (info.compress_type, archive.read(info).decode("utf-8"))
+                for info in archive.infolist()
+            }
+
+    def _csv(self, text):
+        self.assertTrue(text.startswith("\ufeff"))
+        return list(csv.reader(io.StringIO(text[1:])))
+
+    def test_bundle_contains_every_export(self):
+        """Test: El ZIP trae los tres CSV comprimidos con el mismo contenido que las descargas individuales."""
+        response = self.client.get(self.url, {"filter": "genero", "activity_type": "Deportiva"})
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertEqual(response["Content-Type"], "application/zip")
+        members = self._members(b"".join(response.streaming_content))
+
+        self.assertEqual(len(members), 3)
+        self.assertEqual({compress_type for compress_type, _ in members.values()}, {zipfile.ZIP_DEFLATED})
+        table = next(text for name, (_, text) in members.items() if name.startswith("reporte_participacion_genero_"))
+        self.assertEqual(self._csv(table), [[str(value) for value in row] for row in participation_table_rows("genero")])
+        self.assertEqual(
+            self._csv(members["segmentacion_participacion.csv"][1]),
+            [SEGMENTATION_HEADERS] + [[str(value) for value in row] for row in segmentation_rows("Deportiva")],
+        )
+
+        participation = self._csv(members["reporte_participacion.csv"][1])
+        export = self.client.get(
+            reverse("reportsAndStats:participation_report_export"), {"activity_type": "Deportiva"},
+        )
+        self.assertEqual(participation, self._csv(b"".join(export.streaming_content).decode("utf-8")))
+        self.assertEqual(participation[0], PARTICIPATION_EXPORT_HEADER)
+        self.assertEqual(len(participation), 4)
+
+    def test_streams_in_chunks_inside_one_transaction(self):
+        """Test: El ZIP se envía por partes y todas las lecturas ocurren en una misma transacción."""
+        savepoints = len(connection.savepoint_ids)
+        stream = zip_stream(QueryDict(), chunk_size=16)
+        chunks = [next(stream)]
+        self.assertEqual(len(connection.savepoint_ids), savepoints + 1)
+        chunks.extend(stream)
+        self.assertEqual(len(connection.savepoint_ids), savepoints)
+
+        self.assertGreater(len([chunk for chunk in chunks if chunk]), 3)
+        self.assertEqual(len(self._members(b"".join(chunks))), 3)
+
+    def test_invalid_filter(self):
+        """Test: Una agrupación desconocida responde 400."""
+        self.assertEqual(self.client.get(self.url, {"filter": "otro"}).status_code, 400)
@@ -0,0 +1,132 @@
+import csv
+import io
+import tempfile
+from datetime import date, timedelta
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from activities.models import Activity, Enrollment, Participation, ActivityType
+from reportsAndStats.delta import DELETE, DELTA_EXPORT_HEADER, UPSERT, delta_page, encode_cursor
+from reportsAndStats.models import DeletedRecord
+
+User = get_user_model()
+
+
+@override_settings(DELTA_EXPORT_SETTLE_SECONDS=0)
+class ParticipationDeltaExportTests(TestCase):
+    """Pruebas de la exportación incremental con cursor."""
+
+    def setUp(self):
+        self.client = Client()
+        self.url = reverse("reportsAndStats:participation_delta_export")
+        self.student = User.objects.create_user(username="student", password="pass1234", gender="F")
+        self.activity = Activity.objects.create(name="Yoga", type=ActivityType.DEPORTIVA)
+        self.enrollment = Enrollment.objects.create(user=self.student, activity=self.activity)
+        self.participation = Participation.objects.create(
+            user=self.student, activity=self.activity, attendance_date=date(2025, 3, 3),
+        )
+
+    def _get(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        content = b"".join(response.streaming_content).decode("utf-8")
+        rows = list(csv.reader(io.StringIO(content[1:])))
+        self.assertEqual(rows[0], DELTA_EXPORT_HEADER)
+        return rows[1:], response["X-Next-Cursor"], response["X-Has-More"]
+
+    def _keys(self, rows):
+        return [(row[0], row[-1], int(row[1])) for row in rows]
+
+    def test_initial_export_then_only_changes(self):
+        """Test: Sin cursor se exporta todo; con el cursor siguiente solo lo que cambió."""
+        rows, cursor, has_more = self._get()
+        self.assertEqual(has_more, "0")
+        self.assertEqual(self._keys(rows), [
+            (UPSERT, "Inscripción", self.enrollment.pk),
+            (UPSERT, "Participación", self.participation.pk),
+        ])
+        self.assertEqual(rows[0][3], "No")
+
+        rows, cursor, _ = self._get(cursor=cursor)
+        self.assertEqual(rows, [])
+
+        self.enrollment.confirm()
+        other = Participation.objects.create(user=self.student, activity=self.activity, attendance_date=date(2025, 3, 4))
+        rows, cursor, _ = self._get(cursor=cursor)
+        self.assertEqual(self._keys(rows), [
+            (UPSERT, "Inscripción", self.enrollment.pk),
+            (UPSERT, "Participación", other.pk),
+        ])
+
+        participation_pk = self.participation.pk
+        self.participation.delete()
+        rows, _, _ = self._get(cursor=cursor)
+        self.assertEqual(self._keys(rows), [(DELETE, "Participación", participation_pk)])
+
+    def test_pages_cover_every_row_once(self):
+        """Test: Con páginas pequeñas cada fila sale una sola vez y X-Has-More indica si faltan."""
+        for day in range(1, 6):
+            Participation.objects.create(user=self.student, activity=self.activity, attendance_date=date(2025, 4, day))
+        seen = []
+        cursor = None
+        for _ in range(10):
+            rows, cursor, has_more = self._get(limit=2, **({"cursor": cursor} if cursor else {}))
+            seen.extend(self._keys(rows))
+            if has_more == "0":
+                break
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(len(seen), Enrollment.objects.count() + Participation.objects.count())
+
+    @override_settings(DELTA_EXPORT_SETTLE_SECONDS=3600)
+    def test_recent_rows_wait_for_settle_delay(self):
+        """Test: Las filas más nuevas que la espera configurada quedan para la próxima página."""
+        page = delta_page()
+        self.assertEqual(list(page.rows()), [])
+        self.assertFalse(page.has_more)
+
+    def test_admin_rows_are_flagged(self):
+        """Test: Las filas de administradores se incluyen marcadas en 'Usuario admin'."""
+        admin = User.objects.create_user(username="staff", password="pass1234", is_staff=True)
+        Enrollment.objects.create(user=admin, activity=self.activity)
+        rows, _, _ = self._get()
+        self.assertEqual(sorted(row[3] for row in rows), ["No", "No", "Sí"])
+
+    def test_invalid_and_expired_cursors(self):
+        """Test: Un cursor alterado responde 400 y uno anterior a las lápidas conservadas 410."""
+        self.assertEqual(self.client.get(self.url, {"cursor": "alterado"}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {"limit": "0"}).status_code, 400)
+
+        old = timezone.now() - timedelta(days=365)
+        expired = encode_cursor({"enrollment": (old, None), "participation": (old, None), "deleted": (old, None)})
+        self.assertEqual(self.client.get(self.url, {"cursor": expired}).status_code, 410)
+
+    def test_command_resumes_from_cursor_file(self):
+        """Test: El comando guarda el cursor y la siguiente corrida exporta solo los cambios."""
+        with tempfile.TemporaryDirectory() as directory:
+            cursor_file = Path(directory) / "cursor.txt"
+            output = Path(directory) / "delta.csv"
+            call_command("export_participation_delta", output=str(output), cursor_file=str(cursor_file), stdout=io.StringIO())
+            self.assertEqual(len(output.read_text(encoding="utf-8-sig").splitlines()), 3)
+
+            Enrollment.objects.create(user=self.student, activity=Activity.objects.create(name="Teatro"))
+            call_command("export_participation_delta", output=str(output), cursor_file=str(cursor_file), stdout=io.StringIO())
+            rows = list(csv.reader(io.StringIO(output.read_text(encoding="utf-8-sig"))))
+            self.assertEqual([row[-1] for row in rows[1:]], ["Inscripción"])
+
+            cursor_file.write_text("alterado")
+            with self.assertRaises(CommandError):
+                call_command("export_participation_delta", output=str(output), cursor_file=str(cursor_file), stdout=io.StringIO())
+
+    def test_prune_tombstones(self):
+        """Test: --prune-tombstones elimina solo las lápidas fuera de la retención."""
+        self.enrollment.delete()
+        self.participation.delete()
+        DeletedRecord.objects.filter(model="enrollment").update(deleted_at=timezone.now() - timedelta(days=365))
+        call_command("export_participation_delta", prune_tombstones=True, stdout=io.StringIO())
+        self.assertEqual(list(DeletedRecord.objects.values_list("model", flat=True)), ["participation"])
@@ -1,10 +1,17 @@
+import csv
+import io
+
+from django.db import connection
 from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from openpyxl import load_workbook
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
 from login.models import Faculty
 from activities.models import Activity, Enrollment, ActivityReview, Participation
 from activities.models import ActivityType, CategoryType
+from reportsAndStats.aggregations import participation_table
 
 User = get_user_model()
 
@@ -287,3 +294,64 @@ class FilteredReportsViewTests(TestCase):
         response = self.client.get(url)
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, 'reportsAndStats/generalReportsAndStatsView.html')
+
+
+class DownloadTableTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.faculty = Faculty.objects.create(name='Ingeniería')
+        self._create_rows(2)
+
+    def _create_rows(self, count):
+        start = Activity.objects.count()
+        for i in range(start, start + count):
+            user = User.objects.create_user(
+                username=f'student{i}', password='pass1234', faculty=self.faculty, gender='MF'[i % 2]
+            )
+            activity = Activity.objects.create(name=f'Actividad {i}', type=ActivityType.DEPORTIVA)
+            Enrollment.objects.create(user=user, activity=activity)
+
+    def _queries_for(self, url, selected_filter):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, {'filter': selected_filter})
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_aggregation_is_single_query(self):
+        for selected_filter in ['actividad', 'facultad', 'genero']:
+            with self.assertNumQueries(1):
+                participation_table(selected_filter)
+
+    def test_query_count_constant_with_more_rows(self):
+        urls = [reverse('reportsAndStats:download_table_excel'), reverse('reportsAndStats:download_table_csv')]
+        before = {
+            (url, f): self._queries_for(url, f)
+            for url in urls for f in ['actividad', 'facultad', 'genero']
+        }
+        self._create_rows(25)
+        after = {
+            (url, f): self._queries_for(url, f)
+            for url in urls for f in ['actividad', 'facultad', 'genero']
+        }
+        self.assertEqual(before, after)
+
+    def test_aggregated_values(self):
+        self.assertEqual(participation_table('actividad')['Actividad 0'], {'participacion': 1, 'actividades': 1})
+        self.assertEqual(participation_table('facultad')['Ingeniería'], {'participacion': 2, 'actividades': 2})
+        self.assertEqual(participation_table('genero')['F'], {'participacion': 1, 'actividades': 1})
+
+    def test_download_csv_rows(self):
+        response = self.client.get(reverse('reportsAndStats:download_table_csv'), {'filter': 'facultad'})
+        rows = list(csv.reader(io.StringIO(response.content.decode('utf-8-sig'))))
+        self.assertEqual(rows[0], ['Facultad', 'Participación', 'Actividades'])
+        self.assertIn(['Ingeniería', '2', '2'], rows)
+
+    def test_download_excel_with_data(self):
+        response = self.client.get(reverse('reportsAndStats:download_table_excel'), {'filter': 'actividad'})
+        ws = load_workbook(io.BytesIO(response.getvalue())).active
+        self.assertEqual([c.value for c in ws[1]], ['Actividad', 'Participación', 'Actividades'])
+        self.assertEqual([c.value for c in ws[2]], ['Actividad 0', 1, 1])
+
+    def test_download_invalid_filter(self):
+        response = self.client.get(reverse('reportsAndStats:download_table_csv'), {'filter': 'otro'})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,143 @@
+import csv
+import io
+from datetime import date, time
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.http import StreamingHttpResponse
+from django.test import TestCase, Client
+from django.urls import reverse
+from openpyxl import load_workbook
+from openpyxl.styles import Font
+
+from activities.models import Activity, Enrollment, Participation, Schedule, ActivityType, CategoryType
+from login.models import Faculty
+from reportsAndStats.exports import PARTICIPATION_EXPORT_HEADER, XlsxExport
+
+User = get_user_model()
+
+
+class ParticipationReportExportTests(TestCase):
+    """Pruebas de la exportación CSV del reporte de participación."""
+
+    def setUp(self):
+        self.client = Client()
+        self.url = reverse("reportsAndStats:participation_report_export")
+        self.faculty = Faculty.objects.create(name="Medicina")
+        self.student = User.objects.create_user(
+            username="student", password="pass1234", first_name="Ana", last_name="Pérez",
+            identification="A001", gender="F", faculty=self.faculty,
+        )
+        self.nameless = User.objects.create_user(
+            username="nameless", password="pass1234", identification="A002", gender="M",
+        )
+        self.activity = Activity.objects.create(
+            name="Yoga", type=ActivityType.DEPORTIVA, category=CategoryType.GRUPAL
+        )
+        self.schedule = Schedule.objects.create(
+            activity=self.activity, day="Lunes", start_time=time(8, 0), end_time=time(9, 30)
+        )
+
+    def _read(self, response):
+        if isinstance(response, StreamingHttpResponse):
+            content = b"".join(response.streaming_content).decode("utf-8")
+        else:
+            content = response.content.decode("utf-8")
+        self.assertTrue(content.startswith("\ufeff"))
+        return list(csv.reader(io.StringIO(content[1:])))
+
+    def test_streams_by_default(self):
+        """Test: La exportación se envía con StreamingHttpResponse."""
+        response = self.client.get(self.url)
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="reporte_participacion.csv"')
+        self.assertEqual(self._read(response), [PARTICIPATION_EXPORT_HEADER])
+
+    def test_exports_participations(self):
+        """Test: Se exportan las asistencias con el mismo formato de columnas."""
+        Enrollment.objects.create(user=self.student, activity=self.activity, schedule=self.schedule)
+        Participation.objects.create(
+            user=self.student, activity=self.activity, schedule=self.schedule,
+            attendance_date=date(2025, 3, 3), attendance_time=time(8, 5),
+        )
+        Participation.objects.create(user=self.nameless, activity=self.activity, attendance_date=date(2025, 3, 4))
+
+        rows = self._read(self.client.get(self.url))
+        self.assertEqual(rows[1:], [
+            ["A001", "Ana Pérez", "Medicina", "Femenino", "Yoga", ActivityType.DEPORTIVA,
+             "Lunes 08:00:00-09:30:00", "2025-03-03", "08:05:00", "Participación"],
+            ["A002", "nameless", "N/A", "Masculino", "Yoga", ActivityType.DEPORTIVA,
+             "N/A", "2025-03-04", "N/A", "Participación"],
+        ])
+
+    def test_falls_back_to_enrollments(self):
+        """Test: Sin asistencias se exportan las inscripciones."""
+        enrollment = Enrollment.objects.create(user=self.student, activity=self.activity, schedule=self.schedule)
+        rows = self._read(self.client.get(self.url))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][-1], "Inscripción")
+        self.assertEqual(rows[1][6], "Lunes 08:00:00-09:30:00")
+        self.assertEqual(rows[1][7], enrollment.registered_at.strftime("%Y-%m-%d"))
+
+    def test_filters_apply(self):
+        """Test: Los filtros del reporte se aplican a la exportación."""
+        Participation.objects.create(user=self.student, activity=self.activity, attendance_date=date(2025, 3, 3))
+        Participation.objects.create(user=self.nameless, activity=self.activity, attendance_date=date(2025, 3, 4))
+        rows = self._read(self.client.get(self.url, {"gender": "M"}))
+        self.assertEqual([row[0] for row in rows[1:]], ["A002"])
+
+    def test_buffered_mode_matches_stream(self):
+        """Test: Con stream=0 se obtiene el mismo contenido en una respuesta normal."""
+        Participation.objects.create(user=self.student, activity=self.activity, attendance_date=date(2025, 3, 3))
+        streamed = self._read(self.client.get(self.url))
+        buffered_response = self.client.get(self.url, {"stream": "0"})
+        self.assertNotIsInstance(buffered_response, StreamingHttpResponse)
+        self.assertEqual(self._read(buffered_response), streamed)
+
+
+class XlsxExportTests(TestCase):
+    """Pruebas del escritor de Excel en modo write-only."""
+
+    def _load(self, export):
+        output = io.BytesIO()
+        export.save(output)
+        output.seek(0)
+        return load_workbook(output).active
+
+    def test_rows_survive_spool_chunks(self):
+        """Test: Las filas se conservan en orden al pasar por varios bloques del temporal."""
+        export = XlsxExport("Datos", ["A", "B"], chunk_size=3)
+        export.extend([[idx, f"fila {idx}"] for idx in range(10)])
+        ws = self._load(export)
+        self.assertEqual(export.row_count, 10)
+        self.assertEqual(ws.max_row, 11)
+        self.assertEqual([cell.value for cell in ws[11]], [9, "fila 9"])
+
+    def test_widths_tracked_while_writing(self):
+        """Test: El ancho de cada columna sale del valor más largo, con tope."""
+        export = XlsxExport("Datos", ["Nombre", "N"], header_font=Font(bold=True), max_width=20)
+        export.append(["Actividad con nombre largo", 5])
+        export.append([None, 12345])
+        self.assertEqual(export.column_widths(), [20, 7])
+        ws = self._load(export)
+        self.assertEqual(ws.column_dimensions["A"].width, 20)
+        self.assertEqual(ws.column_dimensions["B"].width, 7)
+        self.assertTrue(ws["A1"].font.bold)
+
+    def test_fixed_widths_and_response(self):
+        """Test: Los anchos fijos se respetan y la respuesta se envía desde un archivo."""
+        export = XlsxExport("Datos", ["A"], widths=[30])
+        export.append(["x"])
+        response = export.response("datos.xlsx")
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="datos.xlsx"')
+        ws = load_workbook(io.BytesIO(response.getvalue())).active
+        self.assertEqual(ws.column_dimensions["A"].width, 30)
+        self.assertEqual(ws["A2"].value, "x")
+
+    def test_benchmark_command_runs_in_spawned_process(self):
+        """Test: El benchmark de Excel termina aunque el proceso hijo importe los modelos."""
+        out = io.StringIO()
+        call_command("benchmark_xlsx_export", rows=[20], strategy=["write_only"], stdout=out)
+        self.assertIn("write_only", out.getvalue())
+        self.assertIn("Benchmark terminado.", out.getvalue())
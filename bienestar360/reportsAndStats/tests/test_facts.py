@@ -0,0 +1,192 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from activities.models import Activity, Enrollment, Participation, ActivityType, CategoryType
+from login.models import Faculty
+from reportsAndStats.facts import rebuild_facts
+from reportsAndStats.models import ParticipationFact
+
+User = get_user_model()
+
+
+class ParticipationFactTests(TestCase):
+    """Pruebas del rollup diario de participación."""
+
+    def setUp(self):
+        self.faculty = Faculty.objects.create(name="Medicina")
+        self.student = User.objects.create_user(
+            username="student", password="pass1234", gender="F", faculty=self.faculty
+        )
+        self.other = User.objects.create_user(
+            username="other", password="pass1234", gender="M", faculty=self.faculty
+        )
+        self.activity = Activity.objects.create(
+            name="Yoga", type=ActivityType.DEPORTIVA, category=CategoryType.GRUPAL, is_published=True
+        )
+
+    def _snapshot(self):
+        return sorted(
+            ParticipationFact.objects.values_list(
+                "date", "activity_id", "activity_type", "faculty_id", "gender",
+                "enrollment_count", "participation_count", "enrolled_users", "participant_users",
+            )
+        )
+
+    def test_enrollment_creates_fact(self):
+        """Test: Una inscripción crea la fila del rollup."""
+        Enrollment.objects.create(user=self.student, activity=self.activity)
+        fact = ParticipationFact.objects.get(activity=self.activity, gender="F")
+        self.assertEqual(fact.enrollment_count, 1)
+        self.assertEqual(fact.enrolled_users, 1)
+        self.assertEqual(fact.faculty, self.faculty)
+        self.assertEqual(fact.activity_type, ActivityType.DEPORTIVA)
+
+    def test_participation_updates_same_bucket(self):
+        """Test: Inscripción y asistencia del mismo día comparten la fila."""
+        enrollment = Enrollment.objects.create(user=self.student, activity=self.activity)
+        Participation.objects.create(
+            user=self.student, activity=self.activity, attendance_date=enrollment.registered_at.date()
+        )
+        fact = ParticipationFact.objects.get(activity=self.activity, gender="F")
+        self.assertEqual(fact.enrollment_count, 1)
+        self.assertEqual(fact.participation_count, 1)
+        self.assertEqual(fact.participant_users, 1)
+
+    def test_delete_removes_empty_fact(self):
+        """Test: Borrar la única inscripción elimina la fila."""
+        enrollment = Enrollment.objects.create(user=self.student, activity=self.activity)
+        enrollment.delete()
+        self.assertFalse(ParticipationFact.objects.exists())
+
+    def test_admin_users_are_excluded(self):
+        """Test: Los usuarios admin no cuentan en el rollup."""
+        admin_group, _ = Group.objects.get_or_create(name="admin")
+        self.other.groups.add(admin_group)
+        Enrollment.objects.create(user=self.other, activity=self.activity)
+        self.assertFalse(ParticipationFact.objects.filter(gender="M").exists())
+
+    def test_activity_delete_cascades(self):
+        """Test: Eliminar una actividad con datos no deja filas huérfanas."""
+        Enrollment.objects.create(user=self.student, activity=self.activity)
+        Participation.objects.create(user=self.other, activity=self.activity, attendance_date=date(2025, 3, 3))
+        self.activity.delete()
+        self.assertFalse(ParticipationFact.objects.exists())
+
+    def test_activity_type_change_propagates(self):
+        """Test: Cambiar el tipo de la actividad actualiza el rollup."""
+        Enrollment.objects.create(user=self.student, activity=self.activity)
+        self.activity.type = ActivityType.ARTISTICA
+        self.activity.save()
+        self.assertEqual(
+            ParticipationFact.objects.get(activity=self.activity).activity_type, ActivityType.ARTISTICA
+        )
+
+    def test_becoming_admin_removes_facts(self):
+        """Test: Al pasar un usuario al grupo admin sus filas salen del rollup."""
+        Enrollment.objects.create(user=self.student, activity=self.activity)
+        admin_group, _ = Group.objects.get_or_create(name="admin")
+        self.student.groups.add(admin_group)
+        self.assertFalse(ParticipationFact.objects.exists())
+        self.student.groups.remove(admin_group)
+        self.assertEqual(ParticipationFact.objects.get().enrollment_count, 1)
+
+    def test_user_faculty_change_moves_facts(self):
+        """Test: Cambiar la facultad o el género del usuario mueve sus filas."""
+        Enrollment.objects.create(user=self.student, activity=self.activity)
+        other_faculty = Faculty.objects.create(name="Derecho")
+        self.student.faculty = other_faculty
+        self.student.gender = "O"
+        self.student.save()
+        fact = ParticipationFact.objects.get()
+        self.assertEqual((fact.faculty, fact.gender), (other_faculty, "O"))
+
+    def test_moving_participation_refreshes_old_bucket(self):
+        """Test: Cambiar el día o la actividad de una asistencia actualiza la fila que deja."""
+        participation = Participation.objects.create(
+            user=self.student, activity=self.activity, attendance_date=date(2025, 3, 3)
+        )
+        participation.attendance_date = date(2025, 3, 4)
+        participation.save()
+        self.assertEqual(
+            list(ParticipationFact.objects.values_list("date", "participation_count")), [(date(2025, 3, 4), 1)]
+        )
+
+        other_activity = Activity.objects.create(name="Teatro", type=ActivityType.ARTISTICA)
+        participation.activity = other_activity
+        participation.save(update_fields=["activity"])
+        self.assertEqual(
+            list(ParticipationFact.objects.values_list("activity_id", "participation_count")),
+            [(other_activity.pk, 1)],
+        )
+
+    def test_rebuild_matches_incremental(self):
+        """Test: La reconstrucción completa coincide con el mantenimiento incremental."""
+        Enrollment.objects.create(user=self.student, activity=self.activity)
+        Enrollment.objects.create(user=self.other, activity=self.activity)
+        Participation.objects.create(user=self.student, activity=self.activity, attendance_date=date(2025, 3, 3))
+        Participation.objects.create(user=self.student, activity=self.activity, attendance_date=date(2025, 3, 4))
+        incremental = self._snapshot()
+
+        ParticipationFact.objects.all().delete()
+        rebuild_facts()
+        self.assertEqual(self._snapshot(), incremental)
+
+    def test_unique_without_faculty(self):
+        """Test: Dos filas sin facultad para la misma fecha, actividad y género se consideran duplicadas."""
+        key = {"date": date(2025, 3, 3), "activity": self.activity, "faculty": None, "gender": "F"}
+        ParticipationFact.objects.create(**key)
+        with self.assertRaises(ValidationError):
+            ParticipationFact(**key).validate_constraints()
+
+    def test_rebuild_command(self):
+        """Test: El comando de reconstrucción regenera el rollup."""
+        Enrollment.objects.create(user=self.student, activity=self.activity)
+        ParticipationFact.objects.all().delete()
+        call_command("rebuild_participation_facts", verbosity=0)
+        self.assertEqual(ParticipationFact.objects.get().enrollment_count, 1)
+
+
+class ReportsReadFromFactsTests(TestCase):
+    """Los reportes leen los conteos desde el rollup."""
+
+    def setUp(self):
+        self.client = Client()
+        self.faculty = Faculty.objects.create(name="Derecho")
+        self.user = User.objects.create_user(
+            username="reader", password="pass1234", gender="M", faculty=self.faculty
+        )
+        self.client.login(username="reader", password="pass1234")
+        self.activity = Activity.objects.create(name="Teatro", type=ActivityType.ARTISTICA)
+        Enrollment.objects.create(user=self.user, activity=self.activity)
+
+    def test_general_reports_total_enrollments(self):
+        """Test: El total de inscripciones sale del rollup."""
+        response = self.client.get(reverse("reportsAndStats:general_reports"))
+        self.assertEqual(response.context["total_enrollments"], 1)
+
+    def test_filtered_reports_faculty_counts(self):
+        """Test: Los conteos por facultad salen del rollup."""
+        response = self.client.get(reverse("reportsAndStats:filtered_reports"), {"filter": "facultad"})
+        faculty_data = response.context["data"]["Derecho"]
+        self.assertEqual(faculty_data["inscripciones"], 1)
+        self.assertEqual(faculty_data["distribucion_tipo_actividad"], {ActivityType.ARTISTICA: 1})
+
+    def test_filtered_reports_reads_rollup(self):
+        """Test: El reporte por actividad usa el rollup y no las tablas crudas."""
+        ParticipationFact.objects.update(enrollment_count=7)
+        response = self.client.get(reverse("reportsAndStats:filtered_reports"), {"filter": "actividad"})
+        self.assertEqual(response.context["data"]["Teatro"]["actividades"], 7)
+
+    def test_formal_report_totals(self):
+        """Test: Los totales del reporte formal respetan los filtros sobre el rollup."""
+        url = reverse("reportsAndStats:participation_formal_report")
+        response = self.client.get(url, {"activity_type": ActivityType.ARTISTICA})
+        self.assertEqual(response.context["total_enrollments"], 1)
+        response = self.client.get(url, {"activity_type": ActivityType.DEPORTIVA})
+        self.assertEqual(response.context["total_enrollments"], 0)
@@ -0,0 +1,182 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.http import QueryDict
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from activities.models import Activity, Enrollment, Participation, ActivityType, CategoryType
+from login.models import Faculty
+from reportsAndStats.aggregations import activity_ranking, frequency_histogram, headline_metrics
+from reportsAndStats.exports import participation_export_querysets
+from reportsAndStats.filters import FREQUENCY_MAX_DEFAULT, ReportFilters
+
+User = get_user_model()
+
+
+class ReportFiltersParsingTests(TestCase):
+    """Pruebas de la validación de los parámetros del reporte formal."""
+
+    def test_empty_params(self):
+        """Test: Sin parámetros no hay ningún filtro."""
+        filters = ReportFilters.from_params(QueryDict(""))
+        self.assertEqual(filters, ReportFilters())
+        self.assertFalse(filters.has_frequency)
+
+    def test_lists_drop_empty_values(self):
+        """Test: Los valores vacíos de las listas se descartan."""
+        filters = ReportFilters.from_params(QueryDict("faculty=&faculty=Medicina&gender=F"))
+        self.assertEqual(filters.faculties, ("Medicina",))
+        self.assertEqual(filters.genders, ("F",))
+
+    def test_invalid_values_are_ignored(self):
+        """Test: Fechas y frecuencias inválidas se ignoran pero se devuelven al formulario."""
+        filters = ReportFilters.from_params(QueryDict("date_start=ayer&frequency_min=x"))
+        self.assertIsNone(filters.date_start)
+        self.assertFalse(filters.has_frequency)
+        self.assertEqual(filters.form_values()["date_start"], "ayer")
+        self.assertEqual(filters.form_values()["frequency_min"], "x")
+
+    def test_frequency_range_is_clamped(self):
+        """Test: La frecuencia mínima no baja de 0 y la máxima no queda por debajo de la mínima."""
+        filters = ReportFilters.from_params(QueryDict("frequency_min=-3"))
+        self.assertEqual((filters.frequency_min, filters.frequency_max), (0, FREQUENCY_MAX_DEFAULT))
+        filters = ReportFilters.from_params(QueryDict("frequency_min=4&frequency_max=2"))
+        self.assertEqual((filters.frequency_min, filters.frequency_max), (4, 4))
+
+
+class CompiledReportFilterTests(TestCase):
+    """Pruebas de los filtros compilados y las métricas principales."""
+
+    def setUp(self):
+        self.client = Client()
+        medicina, _ = Faculty.objects.get_or_create(name="Medicina")
+        derecho, _ = Faculty.objects.get_or_create(name="Derecho")
+        cadi, _ = Faculty.objects.get_or_create(name="CADI")
+        self.ana = User.objects.create_user(username="ana", password="pass1234", gender="F", faculty=medicina)
+        self.luis = User.objects.create_user(username="luis", password="pass1234", gender="M", faculty=derecho)
+        self.admin = User.objects.create_user(username="admin", password="pass1234", gender="F", faculty=cadi)
+        self.yoga = yoga = Activity.objects.create(name="Yoga", type=ActivityType.DEPORTIVA, category=CategoryType.GRUPAL)
+        teatro = Activity.objects.create(name="Teatro", type=ActivityType.ARTISTICA, category=CategoryType.GRUPAL)
+
+        for activity in (yoga, teatro):
+            Enrollment.objects.create(user=self.ana, activity=activity)
+            Enrollment.objects.create(user=self.admin, activity=activity)
+        Enrollment.objects.create(user=self.luis, activity=yoga)
+        Participation.objects.create(user=self.ana, activity=yoga, attendance_date=date(2025, 3, 1))
+        Participation.objects.create(user=self.ana, activity=teatro, attendance_date=date(2025, 3, 2))
+        Participation.objects.create(user=self.luis, activity=yoga, attendance_date=date(2025, 3, 1))
+        Participation.objects.create(user=self.luis, activity=yoga, attendance_date=None)
+        Participation.objects.create(user=self.admin, activity=yoga, attendance_date=date(2025, 3, 1))
+
+    def _metrics(self, query):
+        return headline_metrics(ReportFilters.from_params(QueryDict(query)))
+
+    def test_headline_metrics_exclude_admins(self):
+        """Test: Las métricas principales no cuentan a los usuarios admin."""
+        self.assertEqual(
+            self._metrics(""),
+            {"total_enrollments": 3, "total_participations": 3, "total_users": 2},
+        )
+
+    def test_headline_metrics_apply_filters(self):
+        """Test: Tipo, género y fechas se aplican a las métricas principales."""
+        self.assertEqual(
+            self._metrics(f"activity_type={ActivityType.ARTISTICA}"),
+            {"total_enrollments": 1, "total_participations": 1, "total_users": 1},
+        )
+        self.assertEqual(
+            self._metrics("gender=M&date_start=2025-03-02"),
+            {"total_enrollments": 1, "total_participations": 0, "total_users": 1},
+        )
+
+    def test_headline_metrics_frequency(self):
+        """Test: El filtro de frecuencia deja solo a los usuarios dentro del rango."""
+        self.assertEqual(
+            self._metrics("frequency_min=2"),
+            {"total_enrollments": 2, "total_participations": 2, "total_users": 1},
+        )
+        self.assertEqual(
+            self._metrics("frequency_min=5"),
+            {"total_enrollments": 0, "total_participations": 0, "total_users": 0},
+        )
+
+    def test_report_and_export_share_filters(self):
+        """Test: El reporte formal y la exportación CSV aplican los mismos filtros."""
+        query = "faculty=Medicina&faculty=Derecho&frequency_max=1"
+        enrollments, participations = participation_export_querysets(QueryDict(query))
+        response = self.client.get(reverse("reportsAndStats:participation_formal_report") + "?" + query)
+
+        self.assertEqual(set(enrollments.values_list("user__username", flat=True)), {"luis"})
+        self.assertEqual(response.context["total_enrollments"], enrollments.count())
+        self.assertEqual(response.context["total_participations"], participations.count())
+        self.assertEqual(response.context["total_users"], 1)
+        self.assertEqual(response.context["selected_faculties"], ["Medicina", "Derecho"])
+
+    def test_formal_report_query_budget(self):
+        """Test: Las métricas principales salen de una sola consulta dentro del presupuesto del reporte."""
+        url = reverse("reportsAndStats:participation_formal_report")
+        with self.assertNumQueries(14):
+            self.client.get(url)
+        # El filtro de frecuencia va como subconsulta, sin consultas adicionales
+        with self.assertNumQueries(14):
+            self.client.get(url, {"frequency_min": "1"})
+        # Las actividades del ranking no agregan consultas
+        for index in range(5):
+            activity = Activity.objects.create(name=f"Actividad {index}", type=ActivityType.DEPORTIVA)
+            Enrollment.objects.create(user=self.luis, activity=activity)
+            Participation.objects.create(user=self.luis, activity=activity, attendance_date=date(2025, 3, 1))
+        with self.assertNumQueries(14):
+            self.client.get(url)
+
+    def test_frequency_filter_is_a_having_subquery(self):
+        """Test: El filtro de frecuencia se compila como subconsulta con HAVING."""
+        filters = ReportFilters.from_params(QueryDict("frequency_min=2"))
+        with self.assertNumQueries(0):
+            sql = str(Enrollment.objects.filter(filters.enrollment_q()).query)
+        self.assertIn("HAVING", sql)
+
+    def test_frequency_histogram(self):
+        """Test: El histograma de frecuencia agrupa a los usuarios por rango en SQL."""
+        self.assertEqual(frequency_histogram(ReportFilters()), {"1-5": 2})
+        activities = [
+            Activity.objects.create(name=f"Taller {i}", type=ActivityType.ARTISTICA, category=CategoryType.GRUPAL)
+            for i in range(6)
+        ]
+        for activity in activities:
+            Enrollment.objects.create(user=self.ana, activity=activity)
+        self.assertEqual(frequency_histogram(ReportFilters()), {"1-5": 1, "6-10": 1})
+        filters = ReportFilters.from_params(QueryDict(f"activity_type={ActivityType.ARTISTICA}"))
+        self.assertEqual(frequency_histogram(filters), {"6-10": 1})
+
+        response = self.client.get(reverse("reportsAndStats:participation_formal_report"))
+        self.assertEqual(response.context["frequency_distribution"], {"1-5": 1, "6-10": 1})
+
+    def test_activity_ranking(self):
+        """Test: El ranking trae inscripciones, usuarios y asistencias filtradas de cada actividad."""
+        ranking = activity_ranking(ReportFilters())
+        self.assertEqual(
+            [(row["activity__name"], row["enrollment_count"], row["unique_users"], row["participation_count"]) for row in ranking],
+            [("Yoga", 2, 2, 2), ("Teatro", 1, 1, 1)],
+        )
+        self.assertEqual(ranking[0]["activityId"], self.yoga.pk)
+
+        ranking = activity_ranking(ReportFilters.from_params(QueryDict("gender=M")))
+        self.assertEqual([(row["activity__name"], row["participation_count"]) for row in ranking], [("Yoga", 1)])
+
+    def test_activity_ranking_groups_by_id(self):
+        """Test: Dos actividades con el mismo nombre se cuentan por separado."""
+        other_yoga = Activity.objects.create(name="Yoga", type=ActivityType.DEPORTIVA, category=CategoryType.INDIVIDUAL)
+        Enrollment.objects.create(user=self.luis, activity=other_yoga)
+
+        rows = {row["activityId"]: row for row in activity_ranking(ReportFilters(), limit=None)}
+        self.assertEqual(rows[self.yoga.pk]["participation_count"], 2)
+        self.assertEqual(rows[other_yoga.pk]["enrollment_count"], 1)
+        self.assertEqual(rows[other_yoga.pk]["participation_count"], 0)
+
+    def test_activity_ranking_size(self):
+        """Test: El tamaño del ranking no cambia la cantidad de consultas."""
+        with self.assertNumQueries(1):
+            self.assertEqual(len(activity_ranking(ReportFilters(), limit=1)), 1)
+        with self.assertNumQueries(1):
+            self.assertEqual(len(activity_ranking(ReportFilters(), limit=None)), 2)
@@ -0,0 +1,72 @@
+from datetime import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from activities.models import Activity, ActivityReview, Enrollment, Schedule, ActivityType, CategoryType
+from login.models import Faculty
+from login.roles import is_admin_user
+from reportsAndStats.aggregations import general_dashboard
+
+User = get_user_model()
+
+
+class GeneralDashboardTests(TestCase):
+    """Pruebas del panel general con cantidad fija de consultas."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client = Client()
+        self.url = reverse("reportsAndStats:general_reports")
+        self.medicina = Faculty.objects.create(name="Medicina")
+        self.ana = User.objects.create_user(username="ana", password="pass1234", gender="F", faculty=self.medicina)
+        self.luis = User.objects.create_user(username="luis", password="pass1234", gender="M")
+        self.yoga = Activity.objects.create(
+            name="Yoga", type=ActivityType.DEPORTIVA, category=CategoryType.GRUPAL,
+            is_published=True, requires_registration=True,
+        )
+        self.teatro = Activity.objects.create(name="Teatro", type=ActivityType.ARTISTICA, category=CategoryType.GRUPAL)
+        Enrollment.objects.create(user=self.ana, activity=self.yoga)
+        Enrollment.objects.create(user=self.luis, activity=self.yoga)
+        ActivityReview.objects.create(user=self.ana, activity=self.yoga, rating=4)
+        ActivityReview.objects.create(user=self.luis, activity=self.yoga, rating=5, is_read=True)
+
+    def test_dashboard_values(self):
+        """Test: Las métricas agregadas coinciden con los datos."""
+        data = general_dashboard()
+        self.assertEqual(data["total_users"], User.objects.exclude(is_admin_user("pk")).count())
+        self.assertEqual(data["total_activities"], 2)
+        self.assertEqual(data["published_activities"], 1)
+        self.assertEqual(data["requires_registration"], 1)
+        self.assertEqual(data["activities_with_participants"], 1)
+        self.assertEqual(data["total_reviews"], 2)
+        self.assertEqual(data["avg_rating"], 4.5)
+        self.assertEqual(data["unread_reviews"], 1)
+        self.assertEqual(data["faculty_distribution"]["Medicina"], 1)
+        self.assertEqual(data["total_faculties"], Faculty.objects.count())
+        self.assertEqual(data["top_activities"][0]["name"], "Yoga")
+        self.assertEqual(data["top_activities"][0]["num_participants"], 2)
+        self.assertEqual({user["username"] for user in data["top_users"][:2]}, {"ana", "luis"})
+
+    def test_query_count_does_not_grow_with_faculties(self):
+        """Test: El panel usa las mismas consultas sin importar cuántas facultades existan."""
+        with self.assertNumQueries(10):
+            general_dashboard()
+        for index in range(5):
+            faculty = Faculty.objects.create(name=f"Facultad {index}")
+            User.objects.create_user(username=f"user{index}", password="pass1234", faculty=faculty)
+        with self.assertNumQueries(10):
+            data = general_dashboard()
+        self.assertEqual(data["faculty_distribution"]["Facultad 4"], 1)
+
+    def test_view_is_cached_and_invalidated(self):
+        """Test: La vista se sirve desde caché hasta que cambian los datos."""
+        first = self.client.get(self.url).context["total_schedules"]
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+
+        Schedule.objects.create(activity=self.yoga, day="Lunes", start_time=time(8), end_time=time(10))
+        self.assertEqual(self.client.get(self.url).context["total_schedules"], first + 1)
@@ -0,0 +1,105 @@
+import io
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from openpyxl import load_workbook
+
+from activities.models import Activity, Enrollment, ActivityType, CategoryType
+from login.models import Faculty
+from reportsAndStats.jobs import artifact_path, claim_pending_jobs, cleanup_expired_exports, run_export_job
+from reportsAndStats.models import ExportJob, ExportKind, ExportStatus
+
+User = get_user_model()
+
+
+class ExportJobTests(TestCase):
+    """Pruebas de la cola de exportaciones en segundo plano."""
+
+    def setUp(self):
+        self.artifact_dir = tempfile.mkdtemp()
+        settings_override = override_settings(EXPORT_ARTIFACT_DIR=self.artifact_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(shutil.rmtree, self.artifact_dir, ignore_errors=True)
+
+        self.client = Client()
+        self.user = User.objects.create_user(username="analyst", password="pass1234")
+        self.client.login(username="analyst", password="pass1234")
+
+        faculty = Faculty.objects.create(name="Medicina")
+        student = User.objects.create_user(username="student", password="pass1234", gender="F", faculty=faculty)
+        activity = Activity.objects.create(name="Yoga", type=ActivityType.DEPORTIVA, category=CategoryType.GRUPAL)
+        Enrollment.objects.create(user=student, activity=activity)
+
+    def _enqueue(self, url, params):
+        response = self.client.get(url, {**params, "background": "1"})
+        self.assertEqual(response.status_code, 202)
+        return ExportJob.objects.get(pk=response.json()["job_id"])
+
+    def test_background_param_enqueues_job(self):
+        """Test: Con background=1 la descarga se encola en vez de generarse."""
+        job = self._enqueue(reverse("reportsAndStats:download_table_csv"), {"filter": "facultad"})
+        self.assertEqual(job.kind, ExportKind.TABLE_CSV)
+        self.assertEqual(job.status, ExportStatus.PENDING)
+        self.assertEqual(job.params, {"filter": ["facultad"]})
+        self.assertEqual(job.requested_by, self.user)
+
+    def test_job_artifact_matches_direct_download(self):
+        """Test: El archivo del trabajo es igual a la descarga directa."""
+        url = reverse("reportsAndStats:download_table_csv")
+        job = self._enqueue(url, {"filter": "facultad"})
+        claim_pending_jobs(limit=1)
+        self.assertEqual(run_export_job(job.pk), ExportStatus.DONE)
+
+        status = self.client.get(reverse("reportsAndStats:export_job_status", args=[job.pk])).json()
+        self.assertEqual(status["status"], ExportStatus.DONE)
+        download = self.client.get(status["download_url"])
+        self.assertEqual(download.getvalue(), self.client.get(url, {"filter": "facultad"}).content)
+
+    def test_worker_command_processes_queue(self):
+        """Test: El worker procesa los trabajos pendientes de ambas apps."""
+        self._enqueue(reverse("reportsAndStats:participation_report_export"), {})
+        self._enqueue(reverse("download_segmentation_excel"), {})
+        call_command("run_export_worker", workers=0, once=True, stdout=io.StringIO())
+
+        self.assertFalse(ExportJob.objects.exclude(status=ExportStatus.DONE).exists())
+        job = ExportJob.objects.get(kind=ExportKind.SEGMENTATION_XLSX)
+        ws = load_workbook(artifact_path(job)).active
+        self.assertEqual(ws["A1"].value, "Periodo")
+
+    def test_failed_job_records_error(self):
+        """Test: Un error al generar el archivo deja el trabajo como fallido."""
+        job = ExportJob.objects.create(kind=ExportKind.TABLE_XLSX, params={"filter": ["otro"]})
+        self.assertEqual(run_export_job(job.pk), ExportStatus.FAILED)
+        job.refresh_from_db()
+        self.assertIn("otro", job.error)
+        self.assertEqual(os.listdir(self.artifact_dir), [])
+
+    def test_cleanup_expires_artifacts(self):
+        """Test: Los archivos vencidos se eliminan y la descarga responde 410."""
+        job = ExportJob.objects.create(kind=ExportKind.TABLE_CSV, params={}, requested_by=self.user)
+        run_export_job(job.pk)
+        job.refresh_from_db()
+        path = artifact_path(job)
+        self.assertTrue(path.exists())
+
+        self.assertEqual(cleanup_expired_exports(now=timezone.now() + timedelta(days=2)), 1)
+        self.assertFalse(path.exists())
+        response = self.client.get(reverse("reportsAndStats:export_job_download", args=[job.pk]))
+        self.assertEqual(response.status_code, 410)
+
+    def test_other_users_cannot_see_job(self):
+        """Test: Un usuario no puede consultar la exportación de otro."""
+        job = ExportJob.objects.create(kind=ExportKind.TABLE_CSV, params={}, requested_by=self.user)
+        User.objects.create_user(username="intruder", password="pass1234")
+        intruder = Client()
+        intruder.login(username="intruder", password="pass1234")
+        response = intruder.get(reverse("reportsAndStats:export_job_status", args=[job.pk]))
+        self.assertEqual(response.status_code, 404)
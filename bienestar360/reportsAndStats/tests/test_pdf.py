@@ -0,0 +1,105 @@
+import io
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import QueryDict
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from activities.models import Activity, Enrollment, ActivityType, CategoryType
+from login.models import Faculty
+from reportsAndStats.exports import PARTICIPATION_EXPORT_HEADER
+from reportsAndStats.filters import ReportFilters
+from reportsAndStats.jobs import claim_pending_jobs, run_export_job
+from reportsAndStats.models import ExportJob, ExportKind, ExportStatus
+from reportsAndStats.pdf import export_participation_pdf, report_summary, write_participation_pdf
+
+User = get_user_model()
+
+
+class ParticipationPdfTests(TestCase):
+    """Pruebas del reporte formal en PDF."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.artifact_dir = tempfile.mkdtemp()
+        settings_override = override_settings(EXPORT_ARTIFACT_DIR=self.artifact_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(shutil.rmtree, self.artifact_dir, ignore_errors=True)
+
+        self.client = Client()
+        User.objects.create_user(username="analyst", password="pass1234")
+        self.client.login(username="analyst", password="pass1234")
+        self.url = reverse("reportsAndStats:participation_report_pdf")
+
+        faculty = Faculty.objects.create(name="Medicina")
+        self.student = User.objects.create_user(username="student", password="pass1234", gender="F", faculty=faculty)
+        self.activity = Activity.objects.create(name="Yoga", type=ActivityType.DEPORTIVA, category=CategoryType.GRUPAL)
+        Enrollment.objects.create(user=self.student, activity=self.activity)
+
+    def _run_pending(self):
+        for job_id in claim_pending_jobs(limit=10):
+            self.assertEqual(run_export_job(job_id), ExportStatus.DONE)
+
+    def test_pdf_is_generated_in_background(self):
+        """Test: La primera petición encola el PDF y luego se descarga."""
+        response = self.client.get(self.url, {"gender": "F"})
+        self.assertEqual(response.status_code, 202)
+        job = ExportJob.objects.get(pk=response.json()["job_id"])
+        self.assertEqual(job.kind, ExportKind.PARTICIPATION_PDF)
+        self.assertTrue(job.cache_key)
+
+        self._run_pending()
+        download = self.client.get(reverse("reportsAndStats:export_job_download", args=[job.pk]))
+        self.assertTrue(download.getvalue().startswith(b"%PDF"))
+
+    def test_pending_job_is_reused(self):
+        """Test: Pedir el mismo PDF mientras se genera no encola otro trabajo."""
+        first = self.client.get(self.url, {"gender": "F"}).json()
+        second = self.client.get(self.url, {"gender": "F", "background": "1"}).json()
+        self.assertEqual(first["job_id"], second["job_id"])
+        self.assertEqual(ExportJob.objects.count(), 1)
+
+    def test_repeated_download_is_served_from_file(self):
+        """Test: Con los mismos filtros y datos se sirve el archivo ya generado."""
+        self.client.get(self.url)
+        self._run_pending()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        self.assertTrue(response.getvalue().startswith(b"%PDF"))
+        self.assertEqual(ExportJob.objects.count(), 1)
+
+        # Otro filtro genera otro archivo
+        self.assertEqual(self.client.get(self.url, {"gender": "M"}).status_code, 202)
+
+    def test_data_change_invalidates_cached_file(self):
+        """Test: Una inscripción nueva obliga a generar el PDF de nuevo."""
+        self.client.get(self.url)
+        self._run_pending()
+        other = Activity.objects.create(name="Teatro", type=ActivityType.ARTISTICA, category=CategoryType.GRUPAL)
+        Enrollment.objects.create(user=self.student, activity=other)
+        self.assertEqual(self.client.get(self.url).status_code, 202)
+
+    def test_chart_data_not_cached_in_worker(self):
+        """Test: Los gráficos se calculan con los datos actuales aunque la versión de la caché no cambie."""
+        params = QueryDict("gender=F")
+        with mock.patch("reportsAndStats.pdf.report_summary", wraps=report_summary) as summary:
+            export_participation_pdf(params, io.BytesIO())
+            export_participation_pdf(params, io.BytesIO())
+        self.assertEqual(summary.call_count, 2)
+
+    def test_long_detail_spans_pages(self):
+        """Test: Miles de filas se reparten en varias páginas."""
+        filters = ReportFilters()
+        rows = ([str(i)] * len(PARTICIPATION_EXPORT_HEADER) for i in range(3000))
+        output = io.BytesIO()
+        write_participation_pdf(output, filters, report_summary(filters), rows)
+        pages = output.getvalue().count(b"/Type /Page\n")
+        self.assertGreater(pages, 50)
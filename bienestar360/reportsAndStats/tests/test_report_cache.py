@@ -0,0 +1,124 @@
+import io
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.http import QueryDict
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from activities.models import Activity, Enrollment, Participation, ActivityType, CategoryType
+from login.models import Faculty
+from reportsAndStats.report_cache import DATA_VERSION_KEY, get_data_version, report_cache_key, report_cache_stats
+
+User = get_user_model()
+
+
+@override_settings(REPORT_CACHE_STATS_SAMPLE=1)
+class ReportCacheTests(TestCase):
+    """Pruebas de la caché de resultados de FilteredReportsView."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client = Client()
+        self.url = reverse("reportsAndStats:filtered_reports")
+        faculty = Faculty.objects.create(name="Medicina")
+        self.student = User.objects.create_user(username="student", password="pass1234", gender="F", faculty=faculty)
+        self.activity = Activity.objects.create(
+            name="Yoga", type=ActivityType.DEPORTIVA, category=CategoryType.GRUPAL
+        )
+        Enrollment.objects.create(user=self.student, activity=self.activity)
+
+    def _yoga(self):
+        return self.client.get(self.url, {"filter": "actividad"}).context["data"]["Yoga"]
+
+    def test_key_ignores_param_order_and_empty_values(self):
+        """Test: Parámetros equivalentes generan la misma clave."""
+        first = report_cache_key("r", QueryDict("faculty=B&faculty=A&gender=&stream=0"))
+        second = report_cache_key("r", {"faculty": ["A", "B"]})
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, report_cache_key("r", {"faculty": ["A"]}))
+
+    def test_second_request_is_a_hit(self):
+        """Test: La segunda consulta con el mismo filtro sale de la caché."""
+        self._yoga()
+        with self.assertNumQueries(0):
+            self.client.get(self.url, {"filter": "actividad"})
+        stats = report_cache_stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+    def test_enrollment_invalidates_cache(self):
+        """Test: Una inscripción nueva invalida los resultados guardados."""
+        self.assertEqual(self._yoga()["actividades"], 1)
+        other = User.objects.create_user(username="other", password="pass1234", gender="M")
+        version = get_data_version()
+        Enrollment.objects.create(user=other, activity=self.activity)
+        self.assertGreater(get_data_version(), version)
+        self.assertEqual(self._yoga()["actividades"], 2)
+
+    def test_participation_invalidates_cache(self):
+        """Test: Registrar asistencia invalida los resultados guardados."""
+        self.assertEqual(self._yoga()["participaciones_reales"], 0)
+        Participation.objects.create(user=self.student, activity=self.activity, attendance_date="2025-03-01")
+        self.assertEqual(self._yoga()["participaciones_reales"], 1)
+        self.assertEqual(report_cache_stats()["hits"], 0)
+
+    def test_evicted_version_does_not_reuse_old_entries(self):
+        """Test: Si la caché desaloja el contador, la versión nueva no coincide con entradas anteriores."""
+        self.assertEqual(self._yoga()["actividades"], 1)
+        version = get_data_version()
+        cache.delete(DATA_VERSION_KEY)
+        self.assertGreater(get_data_version(), version)
+        cache.delete(DATA_VERSION_KEY)
+        Participation.objects.create(user=self.student, activity=self.activity, attendance_date="2025-03-01")
+        self.assertGreater(get_data_version(), version)
+        self.assertEqual(self._yoga()["participaciones_reales"], 1)
+
+    @override_settings(REPORT_CACHE_STATS_SAMPLE=0)
+    def test_stats_sampling_can_be_disabled(self):
+        """Test: Con muestreo 0 las consultas no escriben contadores en la caché."""
+        self._yoga()
+        self._yoga()
+        self.assertEqual((report_cache_stats()["hits"], report_cache_stats()["misses"]), (0, 0))
+
+    def test_stats_command(self):
+        """Test: El comando muestra y reinicia los contadores."""
+        self._yoga()
+        self._yoga()
+        out = io.StringIO()
+        call_command("report_cache_stats", reset=True, stdout=out)
+        self.assertIn("Aciertos: 1", out.getvalue())
+        self.assertIn("Tasa de aciertos: 50.0%", out.getvalue())
+        self.assertEqual(report_cache_stats()["hits"], 0)
+
+        self.assertNotIn("estimado", out.getvalue())
+
+    @override_settings(REPORT_CACHE_STATS_SAMPLE=0.5)
+    def test_sampled_stats_are_labelled_estimates(self):
+        """Test: Con muestreo los contadores se muestran como estimaciones."""
+        stats = report_cache_stats()
+        self.assertEqual((stats["sample"], stats["estimated"]), (0.5, True))
+        out = io.StringIO()
+        call_command("report_cache_stats", stdout=out)
+        self.assertIn("Muestreo: 50% de las consultas", out.getvalue())
+        self.assertIn("Aciertos (estimado): ", out.getvalue())
+
+
+class FileBasedReportCacheTests(ReportCacheTests):
+    """Las mismas pruebas con el backend de caché en archivos."""
+
+    def setUp(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir, ignore_errors=True)
+        settings_override = override_settings(CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                "LOCATION": cache_dir,
+            }
+        })
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        super().setUp()
@@ -0,0 +1,77 @@
+import io
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from activities.models import Activity, Enrollment, Participation, ActivityType, CategoryType
+from login.models import Faculty
+from reportsAndStats.report_views import REPORT_VIEWS, existing_report_views, report_views_available
+from reportsAndStats.timeline import timeline
+
+User = get_user_model()
+
+
+class ReportViewsTests(TestCase):
+    """Pruebas de las vistas de reportes (tablas comunes en SQLite)."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        faculty = Faculty.objects.create(name="Medicina")
+        self.student = User.objects.create_user(username="student", password="pass1234", gender="F", faculty=faculty)
+        self.activity = Activity.objects.create(name="Yoga", type=ActivityType.DEPORTIVA, category=CategoryType.GRUPAL)
+        Enrollment.objects.create(user=self.student, activity=self.activity)
+        Participation.objects.create(user=self.student, activity=self.activity, attendance_date=date(2025, 3, 1))
+
+    def _refresh(self, **options):
+        out = io.StringIO()
+        call_command("refresh_report_views", stdout=out, **options)
+        return out.getvalue()
+
+    def test_command_creates_views_with_same_results(self):
+        """Test: Las vistas creadas dan la misma línea de tiempo que las tablas originales."""
+        expected = timeline()
+        self.assertFalse(report_views_available())
+
+        output = self._refresh()
+        self.assertIn("Creada tabla: report_enrollment_semester", output)
+        self.assertEqual(sorted(existing_report_views()), sorted(REPORT_VIEWS))
+        self.assertTrue(report_views_available())
+        self.assertEqual(timeline(), expected)
+
+    def test_timeline_reads_views(self):
+        """Test: Con las vistas creadas la línea de tiempo no consulta las tablas originales."""
+        self._refresh()
+        report_views_available()
+        with self.assertNumQueries(2) as context:
+            timeline()
+        for query in context.captured_queries:
+            self.assertNotIn("activities_enrollment", query["sql"])
+            self.assertNotIn("activities_participation", query["sql"])
+
+    def test_refresh_picks_up_new_data(self):
+        """Test: Las vistas reflejan los datos nuevos solo después de refrescarlas."""
+        self._refresh()
+        other = Activity.objects.create(name="Teatro", type=ActivityType.ARTISTICA, category=CategoryType.GRUPAL)
+        Enrollment.objects.create(user=self.student, activity=other)
+        self.assertEqual(timeline()[0][1]["total_enrollments"], 1)
+
+        output = self._refresh(concurrently=True)
+        self.assertIn("sin CONCURRENTLY", output)
+        self.assertIn("Refrescada tabla: report_participation_semester", output)
+        self.assertEqual(timeline()[0][1]["total_enrollments"], 2)
+
+    def test_drop_falls_back_to_tables(self):
+        """Test: Con --drop los reportes vuelven a las tablas originales."""
+        self._refresh()
+        self._refresh(drop=True)
+        self.assertEqual(existing_report_views(), [])
+        self.assertFalse(report_views_available())
+        self.assertEqual(timeline()[0][1]["total_enrollments"], 1)
+        with connection.cursor() as cursor:
+            tables = connection.introspection.table_names(cursor)
+        self.assertNotIn("report_enrollment_semester", tables)
@@ -0,0 +1,94 @@
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from activities.models import Activity, Enrollment, Participation, ActivityType, CategoryType
+from login.models import Faculty
+from reportsAndStats.timeline import timeline
+
+User = get_user_model()
+
+
+class TimelineTests(TestCase):
+    """Pruebas de los modos semestre y año de FilteredReportsView."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client = Client()
+        self.url = reverse("reportsAndStats:filtered_reports")
+        self.faculty = Faculty.objects.create(name="Medicina")
+        self.ana = User.objects.create_user(username="ana", password="pass1234", gender="F", faculty=self.faculty)
+        self.luis = User.objects.create_user(username="luis", password="pass1234", gender="M")
+        self.yoga = Activity.objects.create(name="Yoga", type=ActivityType.DEPORTIVA, category=CategoryType.GRUPAL)
+        self.teatro = Activity.objects.create(name="Teatro", type=ActivityType.ARTISTICA, category=CategoryType.GRUPAL)
+
+    def _enroll(self, user, activity, registered_at):
+        enrollment = Enrollment.objects.create(user=user, activity=activity)
+        Enrollment.objects.filter(pk=enrollment.pk).update(registered_at=registered_at)
+
+    def test_semester_breakdowns(self):
+        """Test: Cada semestre reúne sus inscripciones, asistencias y desgloses."""
+        self._enroll(self.ana, self.yoga, datetime(2024, 3, 10, 15, tzinfo=dt_timezone.utc))
+        self._enroll(self.luis, self.yoga, datetime(2024, 4, 10, 15, tzinfo=dt_timezone.utc))
+        self._enroll(self.ana, self.teatro, datetime(2024, 9, 1, 15, tzinfo=dt_timezone.utc))
+        Participation.objects.create(user=self.ana, activity=self.yoga, attendance_date=date(2024, 3, 11))
+
+        data = self.client.get(self.url, {"filter": "semestre"}).context["data"]
+        self.assertEqual(list(data), ["2024 - Segundo Semestre (Jul-Dic)", "2024 - Primer Semestre (Ene-Jun)"])
+        first = data["2024 - Primer Semestre (Ene-Jun)"]
+        self.assertEqual(first["semestre"], "2024-01")
+        self.assertEqual(first["actividades"], 2)
+        self.assertEqual(first["participacion"], 2)
+        self.assertEqual(first["participaciones_reales"], 1)
+        self.assertEqual(first["tasa_participacion"], 50.0)
+        self.assertEqual(first["distribucion_genero"], {"Masculino": 1, "Femenino": 1})
+        self.assertEqual(first["distribucion_facultad"], {"Medicina": 1})
+        self.assertEqual(first["distribucion_tipo_actividad"], {ActivityType.DEPORTIVA: 2})
+        self.assertEqual(first["top_actividades"], ["Yoga"])
+
+    def test_semester_uses_local_date(self):
+        """Test: El semestre sale de la fecha local, igual que get_semester_dates."""
+        # 2024-07-01 03:00 UTC es 2024-06-30 en Bogotá
+        self._enroll(self.ana, self.yoga, datetime(2024, 7, 1, 3, tzinfo=dt_timezone.utc))
+        self.assertEqual([bucket for bucket, _ in timeline()], [(2024, 1)])
+
+    def test_year_breakdowns(self):
+        """Test: El modo año suma los semestres y conserva el desglose por semestre."""
+        self._enroll(self.ana, self.yoga, datetime(2024, 3, 10, 15, tzinfo=dt_timezone.utc))
+        self._enroll(self.ana, self.teatro, datetime(2024, 9, 1, 15, tzinfo=dt_timezone.utc))
+        Participation.objects.create(user=self.luis, activity=self.yoga, attendance_date=date(2023, 8, 1))
+
+        data = self.client.get(self.url, {"filter": "año"}).context["data"]
+        self.assertEqual(list(data), ["2024", "2023"])
+        self.assertEqual(data["2024"]["actividades"], 2)
+        self.assertEqual(data["2024"]["participacion"], 1)
+        self.assertEqual(data["2024"]["actividades_unicas"], 2)
+        self.assertEqual(data["2024"]["distribucion_semestre"], {
+            "Semestre 1": {"inscripciones": 1, "participaciones": 0},
+            "Semestre 2": {"inscripciones": 1, "participaciones": 0},
+        })
+        self.assertEqual(data["2023"]["participaciones_reales"], 1)
+        self.assertEqual(data["2023"]["tasa_participacion"], 0)
+
+    def test_admin_users_are_excluded(self):
+        """Test: Las inscripciones de usuarios admin no aparecen en la línea de tiempo."""
+        admin = User.objects.create_user(username="staff", password="pass1234", is_staff=True)
+        self._enroll(admin, self.yoga, datetime(2024, 3, 10, 15, tzinfo=dt_timezone.utc))
+        self.assertEqual(timeline(), [])
+
+    def test_query_count_is_flat(self):
+        """Test: La cantidad de consultas no crece con los años."""
+        self._enroll(self.ana, self.yoga, datetime(2024, 3, 10, 15, tzinfo=dt_timezone.utc))
+        # La primera llamada además comprueba si existen las vistas de report_views
+        timeline()
+        with self.assertNumQueries(2):
+            timeline(by_year=True)
+        for year in range(2015, 2024):
+            self._enroll(self.ana, self.yoga if year % 2 else self.teatro, datetime(year, 9, 1, 15, tzinfo=dt_timezone.utc))
+            Participation.objects.create(user=self.luis, activity=self.yoga, attendance_date=date(year, 2, 1))
+        with self.assertNumQueries(2):
+            self.assertEqual(len(timeline()), 19)
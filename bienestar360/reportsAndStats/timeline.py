@@ -0,0 +1,152 @@
+"""
+Línea de tiempo por semestre y por año para `FilteredReportsView`.
+
+Inscripciones y asistencias se agrupan una sola vez por semestre (año y
+mitad del año, la misma regla de `get_semester_dates`) junto con el usuario y
+la actividad. Todos los desgloses de cada periodo se arman en Python a partir
+de esas dos consultas, así la cantidad de consultas no crece con los años.
+Con las vistas materializadas de `report_views` las dos consultas leen de
+ellas en vez de las tablas de inscripciones y asistencias.
+"""
+from collections import defaultdict
+
+from django.db.models import Case, Count, F, IntegerField, Value, When
+from django.db.models.functions import ExtractYear
+
+from activities.models import Enrollment, Participation
+from login.roles import is_admin_user
+from .report_views import report_view_rows
+
+
+GENDER_CODES = ('M', 'F', 'O')
+TOP_ACTIVITIES = 5
+
+
+def semester_bucket(field):
+    """Anotaciones `bucket_year` y `bucket_half` (1: ene-jun, 2: jul-dic) de `field`."""
+    return {
+        'bucket_year': ExtractYear(field),
+        'bucket_half': Case(
+            When(**{f'{field}__month__lte': 6}, then=Value(1)),
+            default=Value(2),
+            output_field=IntegerField(),
+        ),
+    }
+
+
+class _Period:
+    def __init__(self):
+        self.enrollments = 0
+        self.participations = 0
+        self.enrolled_users = set()
+        self.participant_users = set()
+        self.activities = set()
+        self.gender_users = defaultdict(set)
+        self.faculty_users = defaultdict(set)
+        self.type_enrollments = defaultdict(int)
+        self.activity_users = defaultdict(set)
+        self.semesters = {1: {'inscripciones': 0, 'participaciones': 0},
+                          2: {'inscripciones': 0, 'participaciones': 0}}
+
+    def as_dict(self):
+        top_activities = sorted(self.activity_users.items(), key=lambda item: (-len(item[1]), item[0]))
+        return {
+            'total_enrollments': self.enrollments,
+            'unique_users_enrolled': len(self.enrolled_users),
+            'total_participations': self.participations,
+            'unique_users_participated': len(self.participant_users),
+            'activities': len(self.activities),
+            'gender_users': {
+                code: len(self.gender_users[code]) for code in GENDER_CODES if self.gender_users.get(code)
+            },
+            'faculty_users': {name: len(users) for name, users in self.faculty_users.items()},
+            'type_enrollments': dict(self.type_enrollments),
+            'top_activities': [name for name, _ in top_activities[:TOP_ACTIVITIES]],
+            'semesters': self.semesters,
+        }
+
+
+def enrollment_rows():
+    """
+    Inscripciones agrupadas por semestre, usuario y actividad. Es también la
+    definición de la vista materializada `report_enrollment_semester`.
+    """
+    return (
+        Enrollment.objects
+        .exclude(is_admin_user())
+        .filter(registered_at__isnull=False)
+        .annotate(
+            **semester_bucket('registered_at'),
+            gender=F('user__gender'),
+            faculty_name=F('user__faculty__name'),
+            activity_name=F('activity__name'),
+            activity_type=F('activity__type'),
+        )
+        .values(
+            'bucket_year', 'bucket_half', 'user_id',
+            'gender', 'faculty_name', 'activity_name', 'activity_type',
+        )
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+
+
+def participation_rows():
+    """
+    Asistencias agrupadas por semestre y usuario. Es también la definición de
+    la vista materializada `report_participation_semester`.
+    """
+    return (
+        Participation.objects
+        .exclude(is_admin_user())
+        .filter(attendance_date__isnull=False)
+        .annotate(**semester_bucket('attendance_date'))
+        .values('bucket_year', 'bucket_half', 'user_id')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+
+
+def timeline(by_year=False):
+    """
+    Desgloses por periodo, de más reciente a más antiguo.
+
+    Devuelve una lista de `(periodo, datos)` donde el periodo es el año (con
+    `by_year`) o la tupla `(año, semestre)`. Solo aparecen periodos con
+    inscripciones o asistencias; los usuarios admin se excluyen.
+    """
+    periods = defaultdict(_Period)
+
+    def key(row):
+        return row['bucket_year'] if by_year else (row['bucket_year'], row['bucket_half'])
+
+    # Si existen las vistas materializadas se leen de ahí (ver report_views)
+    enrollments = report_view_rows('report_enrollment_semester')
+    if enrollments is None:
+        enrollments = enrollment_rows()
+    participations = report_view_rows('report_participation_semester')
+    if participations is None:
+        participations = participation_rows()
+
+    for row in enrollments:
+        period = periods[key(row)]
+        user = row['user_id']
+        period.enrollments += row['total']
+        period.semesters[row['bucket_half']]['inscripciones'] += row['total']
+        period.enrolled_users.add(user)
+        period.activities.add(row['activity_name'])
+        period.activity_users[row['activity_name']].add(user)
+        if row['gender'] in GENDER_CODES:
+            period.gender_users[row['gender']].add(user)
+        if row['faculty_name']:
+            period.faculty_users[row['faculty_name']].add(user)
+        if row['activity_type']:
+            period.type_enrollments[row['activity_type']] += row['total']
+
+    for row in participations:
+        period = periods[key(row)]
+        period.participations += row['total']
+        period.semesters[row['bucket_half']]['participaciones'] += row['total']
+        period.participant_users.add(row['user_id'])
+
+    return [(bucket, periods[bucket].as_dict()) for bucket in sorted(periods, reverse=True)]
@@ -8,6 +8,11 @@ urlpatterns = [
     path('filtered/', views.FilteredReportsView.as_view(), name='filtered_reports'),
     path('participation-formal-report/', views.ParticipationFormalReportView.as_view(), name='participation_formal_report'),
     path('participation-formal-report/export/', views.ParticipationReportExportView.as_view(), name='participation_report_export'),
+    path('participation-formal-report/export/delta/', views.ParticipationDeltaExportView.as_view(), name='participation_delta_export'),
+    path('participation-formal-report/pdf/', views.ParticipationReportPdfView.as_view(), name='participation_report_pdf'),
+    path('bundle/', views.ReportBundleView.as_view(), name='report_bundle'),
     path('download-table-excel/', views.download_table_excel, name='download_table_excel'),
     path('download-table-csv/', views.download_table_csv, name='download_table_csv'),
+    path('exports/<uuid:job_id>/', views.ExportJobStatusView.as_view(), name='export_job_status'),
+    path('exports/<uuid:job_id>/download/', views.ExportJobDownloadView.as_view(), name='export_job_download'),
 ]
\ No newline at end of file
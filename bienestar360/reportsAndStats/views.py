@@ -1,16 +1,33 @@
 from django.views.generic import TemplateView, View
 from django.db.models import Count, Avg, Q, F, Max, Min
 from django.shortcuts import render
-from django.http import HttpResponse, JsonResponse
+from django.http import HttpResponse, JsonResponse, FileResponse, Http404, StreamingHttpResponse
+from django.urls import reverse
 from django.contrib import messages
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment
 from django.views.generic import TemplateView
 from django.utils import timezone
 from datetime import datetime, date, timedelta
 from login.models import CustomUser, Faculty
+from login import roles
+from login.roles import is_admin_user
 from activities.models import Activity, Enrollment, Schedule, ActivityReview, Participation
-from django.contrib.auth.models import Group
+from .facts import fact_totals, fact_grand_totals
+from .aggregations import (
+    TABLE_FILTERS, activity_ranking, frequency_histogram, general_dashboard, headline_metrics, participation_table_rows,
+)
+from .exports import (
+    PARTICIPATION_EXPORT_HEADER, csv_stream, participation_export_querysets, participation_export_rows,
+    participation_table_filename, participation_table_xlsx, streaming_csv_response,
+)
+from .analytics import analytics_snapshot
+from .bundle import BUNDLE_FILENAME, zip_stream
+from .delta import DELTA_EXPORT_HEADER, DELTA_MAX_PAGE_SIZE, DELTA_PAGE_SIZE, ExpiredCursor, InvalidCursor, delta_page
+from .filters import ReportFilters
+from .pdf import PDF_CONTENT_TYPE
+from .report_cache import cached_report, report_cache_key
+from .timeline import timeline
+from .jobs import artifact_path, cached_export, enqueue_export
+from .models import ExportJob, ExportKind, ExportStatus
 import csv
 import json
 
@@ -19,22 +36,11 @@ def get_admin_user_ids():
     """
     Helper function to get all admin/CADI user IDs that should be excluded from reports.
     Admin users are identified by: admin group, is_staff=True, is_superuser=True, or CADI faculty.
-    """
-    admin_user_ids = set()
-    
-    # Get users in admin group
-    admin_group = Group.objects.filter(name='admin').first()
-    if admin_group:
-        admin_user_ids.update(admin_group.user_set.values_list('id', flat=True))
     
-    # Get users with staff/superuser flags or CADI faculty
-    admin_user_ids.update(
-        CustomUser.objects.filter(
-            Q(is_staff=True) | Q(is_superuser=True) | Q(faculty__name='CADI')
-        ).values_list('id', flat=True)
-    )
-    
-    return admin_user_ids
+    Las consultas de reportes no deben usar esta lista: excluyen con
+    `.exclude(is_admin_user())` para no enviar ids a la base de datos.
+    """
+    return set(roles.get_admin_user_ids())
 
 
 def get_semester_dates(semester_str):
@@ -89,6 +95,10 @@ def get_semester_from_date(d):
     return None
 
 
+# El panel general se muestra casi en vivo: caché corta además de la invalidación por señales
+GENERAL_REPORTS_CACHE_TIMEOUT = 60
+
+
 class GeneralReportsView(TemplateView):
     """
     Diagnostic/general reports view — returns real counts and a few sample rows
@@ -99,73 +109,12 @@ class GeneralReportsView(TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        # Exclude admin users from general stats
-        admin_user_ids = get_admin_user_ids()
+        # Cantidad fija de consultas agregadas; el resultado se guarda poco
+        # tiempo y se invalida con las señales de report_cache
+        context.update(cached_report(
+            'general_reports', {}, general_dashboard, timeout=GENERAL_REPORTS_CACHE_TIMEOUT,
+        ))
         
-        # Basic counts (exclude admin users where applicable)
-        total_users = CustomUser.objects.exclude(id__in=admin_user_ids).count()
-        total_faculties = Faculty.objects.count()
-        total_activities = Activity.objects.count()
-        total_enrollments = Enrollment.objects.exclude(user__id__in=admin_user_ids).count()
-        total_schedules = Schedule.objects.count()
-        total_reviews = ActivityReview.objects.count()
-
-        published_activities = Activity.objects.filter(is_published=True).count() if hasattr(Activity, "is_published") else 0
-        requires_registration = Activity.objects.filter(requires_registration=True).count() if hasattr(Activity, "requires_registration") else 0
-
-        activities_with_participants = (
-            Activity.objects.annotate(num_participants=Count('enrollments')).filter(num_participants__gt=0).count()
-        )
-
-        avg_enrollments_per_activity = round(total_enrollments / total_activities, 2) if total_activities > 0 else 0
-        avg_rating = ActivityReview.objects.aggregate(avg=Avg('rating'))['avg'] or 0
-        unread_reviews = ActivityReview.objects.filter(is_read=False).count()
-
-        users_sample = list(CustomUser.objects.exclude(id__in=admin_user_ids).values('id', 'username', 'first_name', 'last_name')[:8])
-        faculties_sample = list(Faculty.objects.values('id', 'name')[:8])
-        activities_sample = list(Activity.objects.values('activityId', 'name', 'type', 'category')[:8])
-
-        top_activities = (
-            Activity.objects.annotate(num_participants=Count('enrollments'))
-            .order_by('-num_participants')[:10]
-        )
-
-        faculty_counts = []
-        for f in Faculty.objects.all():
-            user_count = f.users.count()
-            faculty_enrollments = Enrollment.objects.filter(user__faculty=f).exclude(user__id__in=admin_user_ids).count()
-            faculty_counts.append({'name': f.name, 'users': user_count, 'enrollments': faculty_enrollments})
-
-        faculty_distribution = {
-            f.name: f.users.count() for f in Faculty.objects.all()
-        }
-
-        top_users = (
-            CustomUser.objects.exclude(id__in=admin_user_ids).annotate(num_enrollments=Count('enrollments'))
-            .order_by('-num_enrollments')[:5]
-        )
-
-        context.update({
-            'total_users': total_users,
-            'total_faculties': total_faculties,
-            'total_activities': total_activities,
-            'total_enrollments': total_enrollments,
-            'total_schedules': total_schedules,
-            'total_reviews': total_reviews,
-            'published_activities': published_activities,
-            'requires_registration': requires_registration,
-            'activities_with_participants': activities_with_participants,
-            'avg_enrollments_per_activity': avg_enrollments_per_activity,
-            'avg_rating': round(avg_rating, 2),
-            'unread_reviews': unread_reviews,
-            'users_sample': users_sample,
-            'faculties_sample': faculties_sample,
-            'activities_sample': activities_sample,
-            'top_activities': top_activities,
-            'faculty_distribution': faculty_distribution,
-            'top_users': top_users,
-        })
-
         return context
 
 
@@ -181,79 +130,16 @@ def download_table_excel(request):
         selected_filter = request.GET.get('filter', 'actividad')
         
         # Validar que el filtro sea válido
-        valid_filters = ['actividad', 'facultad', 'genero']
-        if selected_filter not in valid_filters:
+        if selected_filter not in TABLE_FILTERS:
             return JsonResponse({'error': 'No fue posible generar el archivo, por favor intente nuevamente'}, status=400)
         
-        data = {}
-        
-        if selected_filter == 'actividad':
-            for act in Activity.objects.all():
-                enrolled_users = act.enrollments.all()
-                data[act.name] = {
-                    'participacion': enrolled_users.count(),
-                    'actividades': enrolled_users.count()
-                }
-        elif selected_filter == 'facultad':
-            faculties = Faculty.objects.all()
-            for fac in faculties:
-                users_in_faculty = CustomUser.objects.filter(faculty=fac)
-                total_activities = Enrollment.objects.filter(user__in=users_in_faculty).count()
-                data[fac.name] = {
-                    'participacion': users_in_faculty.count(),
-                    'actividades': total_activities
-                }
-        elif selected_filter == 'genero':
-            genders = CustomUser.objects.values_list('gender', flat=True).distinct()
-            for g in genders:
-                if g:  # Solo incluir géneros no nulos
-                    users_with_gender = CustomUser.objects.filter(gender=g)
-                    total_activities = Enrollment.objects.filter(user__in=users_with_gender).count()
-                    data[g] = {
-                        'participacion': users_with_gender.count(),
-                        'actividades': total_activities
-                    }
-        
-        # Crear workbook de Excel
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Reporte de Participación"
-        
-        # Estilos para encabezados
-        header_fill = PatternFill(start_color="2563eb", end_color="2563eb", fill_type="solid")
-        header_font = Font(bold=True, color="FFFFFF", size=12)
-        header_alignment = Alignment(horizontal="center", vertical="center")
-        
-        # Escribir encabezados
-        headers = [selected_filter.title(), 'Participación', 'Actividades']
-        for col_num, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col_num, value=header)
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = header_alignment
-        
-        for row_num, (key, info) in enumerate(data.items(), 2):
-            ws.cell(row=row_num, column=1, value=str(key) if key else 'N/A')
-            ws.cell(row=row_num, column=2, value=info['participacion'])
-            ws.cell(row=row_num, column=3, value=info['actividades'])
-        
-        if not data:
-            ws.cell(row=2, column=1, value='No hay datos disponibles')
-            ws.cell(row=2, column=2, value=0)
-            ws.cell(row=2, column=3, value=0)
+        # ?background=1 encola la exportación y responde con la URL de estado
+        if request.GET.get('background') == '1':
+            return enqueue_export(request, ExportKind.TABLE_XLSX)
         
-        ws.column_dimensions['A'].width = 30
-        ws.column_dimensions['B'].width = 15
-        ws.column_dimensions['C'].width = 15
-        
-        response = HttpResponse(
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
-        filename = f"reporte_participacion_{selected_filter}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        
-        wb.save(response)
-        return response
+        # Una sola consulta agrupada para toda la tabla
+        export = participation_table_xlsx(selected_filter)
+        return export.response(participation_table_filename(selected_filter, 'xlsx'))
         
     except Exception as e:
         import logging
@@ -270,55 +156,24 @@ def download_table_csv(request):
         selected_filter = request.GET.get('filter', 'actividad')
         
         # Validar que el filtro sea válido
-        valid_filters = ['actividad', 'facultad', 'genero']
-        if selected_filter not in valid_filters:
+        if selected_filter not in TABLE_FILTERS:
             return JsonResponse({'error': 'No fue posible generar el archivo, por favor intente nuevamente'}, status=400)
         
-        data = {}
+        if request.GET.get('background') == '1':
+            return enqueue_export(request, ExportKind.TABLE_CSV)
         
-        if selected_filter == 'actividad':
-            for act in Activity.objects.all():
-                enrolled_users = act.enrollments.all()
-                data[act.name] = {
-                    'participacion': enrolled_users.count(),
-                    'actividades': enrolled_users.count()
-                }
-        elif selected_filter == 'facultad':
-            faculties = Faculty.objects.all()
-            for fac in faculties:
-                users_in_faculty = CustomUser.objects.filter(faculty=fac)
-                total_activities = Enrollment.objects.filter(user__in=users_in_faculty).count()
-                data[fac.name] = {
-                    'participacion': users_in_faculty.count(),
-                    'actividades': total_activities
-                }
-        elif selected_filter == 'genero':
-            genders = CustomUser.objects.values_list('gender', flat=True).distinct()
-            for g in genders:
-                if g:  # Solo incluir géneros no nulos
-                    users_with_gender = CustomUser.objects.filter(gender=g)
-                    total_activities = Enrollment.objects.filter(user__in=users_with_gender).count()
-                    data[g] = {
-                        'participacion': users_with_gender.count(),
-                        'actividades': total_activities
-                    }
+        # Una sola consulta agrupada para toda la tabla
+        rows = participation_table_rows(selected_filter)
         
         # Crear respuesta CSV
         response = HttpResponse(content_type='text/csv; charset=utf-8')
-        filename = f"reporte_participacion_{selected_filter}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        filename = participation_table_filename(selected_filter, 'csv')
         response['Content-Disposition'] = f'attachment; filename="{filename}"'
         
         response.write('\ufeff')
         
         writer = csv.writer(response)
-        writer.writerow([selected_filter.title(), 'Participación', 'Actividades'])
-        
-        if data:
-            for key, info in data.items():
-                writer.writerow([str(key) if key else 'N/A', info['participacion'], info['actividades']])
-        else:
-            # Si no hay datos, agregar una fila indicando que no hay datos
-            writer.writerow(['No hay datos disponibles', 0, 0])
+        writer.writerows(rows)
         
         return response
         
@@ -343,6 +198,26 @@ class FilteredReportsView(TemplateView):
         # Obtener filtro seleccionado desde GET
         selected_filter = self.request.GET.get('filter', 'actividad')  # default: 'actividad'
         
+        # Los desgloses se guardan en caché hasta que cambian los datos
+        data = cached_report(
+            'filtered_reports',
+            {'filter': selected_filter},
+            lambda: self.build_data(selected_filter),
+        )
+        
+        # Lista de filtros disponibles para el select en la plantilla
+        filters = ['actividad', 'facultad', 'genero', 'semestre', 'año']
+
+        context.update({
+            'data': data,
+            'filters': filters,
+            'selected_filter': selected_filter,
+        })
+
+        return context
+
+    def build_data(self, selected_filter):
+        """Desgloses del reporte para el filtro seleccionado (sin caché)."""
         # Diccionario que contendrá los datos a mostrar
         data = {}
         
@@ -354,15 +229,18 @@ class FilteredReportsView(TemplateView):
         }
         
         # Exclude admin/CADI users from all reports
-        admin_user_ids = get_admin_user_ids()
+        is_admin = is_admin_user()
         
         # 🔹 Filtro por actividad
         if selected_filter == 'actividad':
+            # Conteos de inscripciones y asistencias por actividad desde el rollup
+            activity_totals = fact_totals('activity_id')
             for act in Activity.objects.all().prefetch_related('enrollments__user', 'enrollments__user__faculty', 
                                                                'reviews', 'schedules'):
-                enrollments = act.enrollments.exclude(user__id__in=admin_user_ids)
+                enrollments = act.enrollments.exclude(is_admin)
                 participants = enrollments.values('user').distinct().count()
-                participations = Participation.objects.filter(activity=act).exclude(user__id__in=admin_user_ids).count()
+                totals = activity_totals.get(act.activityId, {'enrollments': 0, 'participations': 0})
+                participations = totals['participations']
                 
                 # Gender breakdown
                 gender_breakdown = {}
@@ -386,14 +264,14 @@ class FilteredReportsView(TemplateView):
                 total_reviews = reviews.count()
                 
                 # Participation rate: users who actually participated vs enrolled
-                users_who_participated = Participation.objects.filter(activity=act).exclude(user__id__in=admin_user_ids).values('user').distinct().count()
+                users_who_participated = Participation.objects.filter(activity=act).exclude(is_admin).values('user').distinct().count()
                 participation_rate = 0
                 if participants > 0:
                     participation_rate = round((users_who_participated / participants) * 100, 1) if users_who_participated > 0 else 0
                 
                 data[act.name] = {
                     'participacion': participants,  # Unique users enrolled
-                    'actividades': enrollments.count(),  # Total enrollments
+                    'actividades': totals['enrollments'],  # Total enrollments
                     'participaciones_reales': participations,  # Actual participations/attendance
                     'tipo': act.type or 'N/A',
                     'categoria': act.category or 'N/A',
@@ -413,16 +291,20 @@ class FilteredReportsView(TemplateView):
         elif selected_filter == 'facultad':
             faculties = Faculty.objects.all().prefetch_related('users', 'users__enrollments', 
                                                                'users__enrollments__activity')
+            # Conteos por facultad y por (facultad, tipo) desde el rollup
+            faculty_totals = fact_totals('faculty_id')
+            faculty_type_totals = fact_totals('faculty_id', 'activity_type')
             for fac in faculties:
-                users_in_faculty = fac.users.exclude(id__in=admin_user_ids)
+                users_in_faculty = fac.users.exclude(is_admin_user('pk'))
                 total_users = users_in_faculty.count()
                 
                 # Enrollments (exclude admin users)
-                enrollments = Enrollment.objects.filter(user__faculty=fac).exclude(user__id__in=admin_user_ids)
-                total_enrollments = enrollments.count()
+                enrollments = Enrollment.objects.filter(user__faculty=fac).exclude(is_admin)
+                totals = faculty_totals.get(fac.id, {'enrollments': 0, 'participations': 0})
+                total_enrollments = totals['enrollments']
                 
                 # Participations (exclude admin users)
-                participations = Participation.objects.filter(user__faculty=fac).exclude(user__id__in=admin_user_ids).count()
+                participations = totals['participations']
                 
                 # Activities (distinct)
                 activities_enrolled = enrollments.values('activity__name').distinct().count()
@@ -435,13 +317,11 @@ class FilteredReportsView(TemplateView):
                         gender_breakdown[GENDER_NAMES.get(gender_code, gender_code)] = gender_count
                 
                 # Activity type breakdown
-                activity_type_breakdown = {}
-                type_enrollments = enrollments.values('activity__type').annotate(
-                    count=Count('id')
-                ).exclude(activity__type__isnull=True)
-                for type_item in type_enrollments:
-                    if type_item['activity__type']:
-                        activity_type_breakdown[type_item['activity__type']] = type_item['count']
+                activity_type_breakdown = {
+                    activity_type: type_totals['enrollments']
+                    for (faculty_id, activity_type), type_totals in faculty_type_totals.items()
+                    if faculty_id == fac.id and activity_type and type_totals['enrollments']
+                }
                 
                 # Top activities
                 top_activities = enrollments.values('activity__name').annotate(
@@ -449,7 +329,7 @@ class FilteredReportsView(TemplateView):
                 ).order_by('-count')[:5]
                 
                 # Reviews given by users in this faculty (exclude admin users)
-                reviews = ActivityReview.objects.filter(user__faculty=fac).exclude(user__id__in=admin_user_ids)
+                reviews = ActivityReview.objects.filter(user__faculty=fac).exclude(is_admin)
                 avg_rating_given = reviews.aggregate(avg=Avg('rating'))['avg'] or 0
                 total_reviews = reviews.count()
                 
@@ -469,19 +349,23 @@ class FilteredReportsView(TemplateView):
 
         # 🔹 Filtro por género
         elif selected_filter == 'genero':
+            # Conteos por género y por (género, tipo) desde el rollup
+            gender_totals = fact_totals('gender')
+            gender_type_totals = fact_totals('gender', 'activity_type')
             for gender_code in ['M', 'F', 'O']:
-                users_with_gender = CustomUser.objects.filter(gender=gender_code).exclude(id__in=admin_user_ids)
+                users_with_gender = CustomUser.objects.filter(gender=gender_code).exclude(is_admin_user('pk'))
                 total_users = users_with_gender.count()
                 
                 if total_users == 0:
                     continue
                 
                 # Enrollments (exclude admin users)
-                enrollments = Enrollment.objects.filter(user__gender=gender_code).exclude(user__id__in=admin_user_ids)
-                total_enrollments = enrollments.count()
+                enrollments = Enrollment.objects.filter(user__gender=gender_code).exclude(is_admin)
+                totals = gender_totals.get(gender_code, {'enrollments': 0, 'participations': 0})
+                total_enrollments = totals['enrollments']
                 
                 # Participations (exclude admin users)
-                participations = Participation.objects.filter(user__gender=gender_code).exclude(user__id__in=admin_user_ids).count()
+                participations = totals['participations']
                 
                 # Activities (distinct)
                 activities_enrolled = enrollments.values('activity__name').distinct().count()
@@ -496,13 +380,11 @@ class FilteredReportsView(TemplateView):
                         faculty_breakdown[fac_item['faculty__name']] = fac_item['count']
                 
                 # Activity type breakdown
-                activity_type_breakdown = {}
-                type_enrollments = enrollments.values('activity__type').annotate(
-                    count=Count('id')
-                ).exclude(activity__type__isnull=True)
-                for type_item in type_enrollments:
-                    if type_item['activity__type']:
-                        activity_type_breakdown[type_item['activity__type']] = type_item['count']
+                activity_type_breakdown = {
+                    activity_type: type_totals['enrollments']
+                    for (gender, activity_type), type_totals in gender_type_totals.items()
+                    if gender == gender_code and activity_type and type_totals['enrollments']
+                }
                 
                 # Top activities
                 top_activities = enrollments.values('activity__name').annotate(
@@ -510,7 +392,7 @@ class FilteredReportsView(TemplateView):
                 ).order_by('-count')[:5]
                 
                 # Reviews given (exclude admin users)
-                reviews = ActivityReview.objects.filter(user__gender=gender_code).exclude(user__id__in=admin_user_ids)
+                reviews = ActivityReview.objects.filter(user__gender=gender_code).exclude(is_admin)
                 avg_rating_given = reviews.aggregate(avg=Avg('rating'))['avg'] or 0
                 total_reviews = reviews.count()
                 
@@ -535,225 +417,67 @@ class FilteredReportsView(TemplateView):
 
         # 🔹 Filtro por semestre
         elif selected_filter == 'semestre':
-            # Obtener todos los años únicos de enrollments y participations
-            enrollment_years = Enrollment.objects.exclude(registered_at__isnull=True).values_list('registered_at__year', flat=True).distinct()
-            participation_years = Participation.objects.exclude(attendance_date__isnull=True).values_list('attendance_date__year', flat=True).distinct()
-            
-            # Combinar años únicos
-            all_years = set(enrollment_years) | set(participation_years)
-            
-            # Generar todos los semestres posibles para los años encontrados
-            semesters = set()
-            for year in all_years:
-                semesters.add(f"{year}-01")  # Primer semestre
-                semesters.add(f"{year}-02")  # Segundo semestre
-            
-            # Ordenar semestres
-            sorted_semesters = sorted(semesters, reverse=True)
-            
-            for semester_str in sorted_semesters:
+            # Una sola agrupación por semestre; solo aparecen semestres con datos
+            for (year, semester_num), period in timeline():
+                semester_str = f"{year}-0{semester_num}"
                 start_date, end_date = get_semester_dates(semester_str)
-                if not start_date or not end_date:
-                    continue
-                
-                # Enrollments en este semestre (basado en registered_at, exclude admin users)
-                enrollments = Enrollment.objects.filter(
-                    registered_at__date__gte=start_date,
-                    registered_at__date__lte=end_date
-                ).exclude(user__id__in=admin_user_ids)
-                total_enrollments = enrollments.count()
-                unique_users_enrolled = enrollments.values('user').distinct().count()
-                
-                # Participations en este semestre (basado en attendance_date, exclude admin users)
-                participations = Participation.objects.filter(
-                    attendance_date__gte=start_date,
-                    attendance_date__lte=end_date
-                ).exclude(user__id__in=admin_user_ids)
-                total_participations = participations.count()
-                unique_users_participated = participations.values('user').distinct().count()
-                
-                # Solo incluir semestres que tienen datos
-                if total_enrollments == 0 and total_participations == 0:
-                    continue
-                
-                # Activities con enrollments en este semestre
-                activities_with_enrollments = enrollments.values('activity__name').distinct().count()
-                
-                # Gender breakdown de usuarios inscritos
-                gender_breakdown = {}
-                for gender_code in ['M', 'F', 'O']:
-                    gender_count = enrollments.filter(user__gender=gender_code).values('user').distinct().count()
-                    if gender_count > 0:
-                        gender_breakdown[GENDER_NAMES.get(gender_code, gender_code)] = gender_count
-                
-                # Faculty breakdown
-                faculty_breakdown = {}
-                faculty_enrollments = enrollments.values('user__faculty__name').annotate(
-                    count=Count('user', distinct=True)
-                ).exclude(user__faculty__name__isnull=True)
-                for fac_item in faculty_enrollments:
-                    if fac_item['user__faculty__name']:
-                        faculty_breakdown[fac_item['user__faculty__name']] = fac_item['count']
-                
-                # Activity type breakdown
-                activity_type_breakdown = {}
-                type_enrollments = enrollments.values('activity__type').annotate(
-                    count=Count('id')
-                ).exclude(activity__type__isnull=True)
-                for type_item in type_enrollments:
-                    if type_item['activity__type']:
-                        activity_type_breakdown[type_item['activity__type']] = type_item['count']
-                
-                # Top activities
-                top_activities = enrollments.values('activity__name').annotate(
-                    count=Count('user', distinct=True)
-                ).order_by('-count')[:5]
-                
-                # Participation rate
-                participation_rate = round((unique_users_participated / unique_users_enrolled * 100), 1) if unique_users_enrolled > 0 else 0
                 
                 # Semester name for display
-                semester_display = f"{semester_str.split('-')[0]} - Semestre {semester_str.split('-')[1]}"
-                if semester_str.endswith('-01'):
-                    semester_display = f"{semester_str.split('-')[0]} - Primer Semestre (Ene-Jun)"
-                elif semester_str.endswith('-02'):
-                    semester_display = f"{semester_str.split('-')[0]} - Segundo Semestre (Jul-Dic)"
+                if semester_num == 1:
+                    semester_display = f"{year} - Primer Semestre (Ene-Jun)"
+                else:
+                    semester_display = f"{year} - Segundo Semestre (Jul-Dic)"
                 
                 data[semester_display] = {
                     'semestre': semester_str,
                     'fecha_inicio': start_date.strftime('%d/%m/%Y'),
                     'fecha_fin': end_date.strftime('%d/%m/%Y'),
-                    'participacion': unique_users_enrolled,  # Unique users enrolled
-                    'actividades': total_enrollments,  # Total enrollments
-                    'participaciones_reales': total_participations,  # Actual participations
-                    'usuarios_participaron': unique_users_participated,  # Unique users who participated
-                    'actividades_unicas': activities_with_enrollments,  # Distinct activities
-                    'distribucion_genero': gender_breakdown,
-                    'distribucion_facultad': faculty_breakdown,
-                    'distribucion_tipo_actividad': activity_type_breakdown,
-                    'top_actividades': [item['activity__name'] for item in top_activities],
-                    'tasa_participacion': participation_rate,
+                    **self._period_data(period, GENDER_NAMES),
                 }
 
         # 🔹 Filtro por año
         elif selected_filter == 'año':
-            # Obtener todos los años únicos de enrollments y participations
-            enrollment_years = Enrollment.objects.exclude(registered_at__isnull=True).values_list('registered_at__year', flat=True).distinct()
-            participation_years = Participation.objects.exclude(attendance_date__isnull=True).values_list('attendance_date__year', flat=True).distinct()
-            
-            # Combinar años únicos
-            years = set(enrollment_years) | set(participation_years)
-            
-            # Ordenar años
-            sorted_years = sorted(years, reverse=True)
-            
-            for year in sorted_years:
+            # La misma agrupación por semestre, sumada por año
+            for year, period in timeline(by_year=True):
                 start_date, end_date = get_year_dates(str(year))
-                if not start_date or not end_date:
-                    continue
-                
-                # Enrollments en este año (exclude admin users)
-                enrollments = Enrollment.objects.filter(
-                    registered_at__date__gte=start_date,
-                    registered_at__date__lte=end_date
-                ).exclude(user__id__in=admin_user_ids)
-                total_enrollments = enrollments.count()
-                unique_users_enrolled = enrollments.values('user').distinct().count()
-                
-                # Participations en este año (exclude admin users)
-                participations = Participation.objects.filter(
-                    attendance_date__gte=start_date,
-                    attendance_date__lte=end_date
-                ).exclude(user__id__in=admin_user_ids)
-                total_participations = participations.count()
-                unique_users_participated = participations.values('user').distinct().count()
-                
-                # Solo incluir años que tienen datos
-                if total_enrollments == 0 and total_participations == 0:
-                    continue
-                
-                # Activities con enrollments en este año
-                activities_with_enrollments = enrollments.values('activity__name').distinct().count()
-                
-                # Gender breakdown
-                gender_breakdown = {}
-                for gender_code in ['M', 'F', 'O']:
-                    gender_count = enrollments.filter(user__gender=gender_code).values('user').distinct().count()
-                    if gender_count > 0:
-                        gender_breakdown[GENDER_NAMES.get(gender_code, gender_code)] = gender_count
-                
-                # Faculty breakdown
-                faculty_breakdown = {}
-                faculty_enrollments = enrollments.values('user__faculty__name').annotate(
-                    count=Count('user', distinct=True)
-                ).exclude(user__faculty__name__isnull=True)
-                for fac_item in faculty_enrollments:
-                    if fac_item['user__faculty__name']:
-                        faculty_breakdown[fac_item['user__faculty__name']] = fac_item['count']
-                
-                # Activity type breakdown
-                activity_type_breakdown = {}
-                type_enrollments = enrollments.values('activity__type').annotate(
-                    count=Count('id')
-                ).exclude(activity__type__isnull=True)
-                for type_item in type_enrollments:
-                    if type_item['activity__type']:
-                        activity_type_breakdown[type_item['activity__type']] = type_item['count']
-                
-                # Top activities
-                top_activities = enrollments.values('activity__name').annotate(
-                    count=Count('user', distinct=True)
-                ).order_by('-count')[:5]
-                
-                # Breakdown por semestre dentro del año
-                semester_breakdown = {}
-                for semester_num in [1, 2]:
-                    sem_start, sem_end = get_semester_dates(f"{year}-0{semester_num}")
-                    if sem_start and sem_end:
-                        sem_enrollments = enrollments.filter(
-                            registered_at__date__gte=sem_start,
-                            registered_at__date__lte=sem_end
-                        ).count()
-                        sem_participations = participations.filter(
-                            attendance_date__gte=sem_start,
-                            attendance_date__lte=sem_end
-                        ).count()
-                        sem_name = f"Semestre {semester_num}"
-                        semester_breakdown[sem_name] = {
-                            'inscripciones': sem_enrollments,
-                            'participaciones': sem_participations,
-                        }
-                
-                # Participation rate
-                participation_rate = round((unique_users_participated / unique_users_enrolled * 100), 1) if unique_users_enrolled > 0 else 0
                 
                 data[str(year)] = {
                     'año': year,
                     'fecha_inicio': start_date.strftime('%d/%m/%Y'),
                     'fecha_fin': end_date.strftime('%d/%m/%Y'),
-                    'participacion': unique_users_enrolled,  # Unique users enrolled
-                    'actividades': total_enrollments,  # Total enrollments
-                    'participaciones_reales': total_participations,  # Actual participations
-                    'usuarios_participaron': unique_users_participated,  # Unique users who participated
-                    'actividades_unicas': activities_with_enrollments,  # Distinct activities
-                    'distribucion_genero': gender_breakdown,
-                    'distribucion_facultad': faculty_breakdown,
-                    'distribucion_tipo_actividad': activity_type_breakdown,
-                    'distribucion_semestre': semester_breakdown,
-                    'top_actividades': [item['activity__name'] for item in top_activities],
-                    'tasa_participacion': participation_rate,
+                    **self._period_data(period, GENDER_NAMES),
+                    # Breakdown por semestre dentro del año
+                    'distribucion_semestre': {
+                        f"Semestre {semester_num}": totals
+                        for semester_num, totals in period['semesters'].items()
+                    },
                 }
 
-        # Lista de filtros disponibles para el select en la plantilla
-        filters = ['actividad', 'facultad', 'genero', 'semestre', 'año']
-
-        context.update({
-            'data': data,
-            'filters': filters,
-            'selected_filter': selected_filter,
-        })
-
-        return context
+        return data
+
+    @staticmethod
+    def _period_data(period, gender_names):
+        """Campos comunes de un semestre o un año de la línea de tiempo."""
+        unique_users_enrolled = period['unique_users_enrolled']
+        unique_users_participated = period['unique_users_participated']
+        
+        # Participation rate
+        participation_rate = round((unique_users_participated / unique_users_enrolled * 100), 1) if unique_users_enrolled > 0 else 0
+        
+        return {
+            'participacion': unique_users_enrolled,  # Unique users enrolled
+            'actividades': period['total_enrollments'],  # Total enrollments
+            'participaciones_reales': period['total_participations'],  # Actual participations
+            'usuarios_participaron': unique_users_participated,  # Unique users who participated
+            'actividades_unicas': period['activities'],  # Distinct activities
+            'distribucion_genero': {
+                gender_names.get(code, code): count for code, count in period['gender_users'].items()
+            },
+            'distribucion_facultad': period['faculty_users'],
+            'distribucion_tipo_actividad': period['type_enrollments'],
+            'top_actividades': period['top_activities'],
+            'tasa_participacion': participation_rate,
+        }
 
 
 # =============================================================
@@ -773,133 +497,43 @@ class ParticipationFormalReportView(TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        # Get filter parameters from GET request
-        # Note: getlist() returns empty list if no values selected, which is correct
-        activity_types = [x for x in self.request.GET.getlist('activity_type') if x]  # Filter out empty strings
-        faculties = [x for x in self.request.GET.getlist('faculty') if x]  # Filter out empty strings
-        genders = [x for x in self.request.GET.getlist('gender') if x]  # Filter out empty strings
-        frequency_min = self.request.GET.get('frequency_min', '').strip()  # Empty means no filter
-        frequency_max = self.request.GET.get('frequency_max', '').strip()  # Empty means no filter
-        date_start = self.request.GET.get('date_start', '').strip()
-        date_end = self.request.GET.get('date_end', '').strip()
+        # Filtros compilados una sola vez (los mismos que usa la exportación CSV)
+        filters = ReportFilters.from_params(self.request.GET)
         
         # WORK LIKE FilteredReportsView: Use Enrollment as primary data source (since seed creates enrollments)
         # Also include Participation data if it exists
-        
-        # Exclude admin/CADI users from reports
-        admin_user_ids = get_admin_user_ids()
-        
-        # Get base enrollments (primary data source - exists in seed)
-        # Exclude admin users
-        enrollments = Enrollment.objects.exclude(user__id__in=admin_user_ids).select_related(
+        # Admin/CADI users are excluded by the compiled filters
+        enrollments = Enrollment.objects.filter(filters.enrollment_q()).select_related(
             'user', 'activity', 'schedule', 'user__faculty'
         )
         
-        # Get base participations (actual attendance - may not exist in seed)
-        # Exclude admin users
-        # NOTE: We filter for attendance_date__isnull=False to get only actual attendances
-        # But if no participations exist, the report should still work with enrollments
-        participations = Participation.objects.filter(
-            attendance_date__isnull=False
-        ).exclude(user__id__in=admin_user_ids).select_related('user', 'activity', 'schedule', 'user__faculty')
-        
-        # Store original unfiltered counts for debugging
-        original_enrollment_count = enrollments.count()
-        original_participation_count = participations.count()
-        
-        # Apply activity type filter
-        if activity_types and len(activity_types) > 0:
-            enrollments = enrollments.filter(activity__type__in=activity_types)
-            participations = participations.filter(activity__type__in=activity_types)
-        
-        # Apply faculty filter
-        if faculties and len(faculties) > 0:
-            enrollments = enrollments.filter(user__faculty__name__in=faculties)
-            participations = participations.filter(user__faculty__name__in=faculties)
-        
-        # Apply gender filter
-        if genders and len(genders) > 0:
-            enrollments = enrollments.filter(user__gender__in=genders)
-            participations = participations.filter(user__gender__in=genders)
-        
-        # Apply date filters (only if date strings are not empty)
-        if date_start and date_start.strip():
-            try:
-                start_date = datetime.strptime(date_start.strip(), '%Y-%m-%d').date()
-                enrollments = enrollments.filter(registered_at__date__gte=start_date)
-                participations = participations.filter(attendance_date__gte=start_date)
-            except (ValueError, TypeError) as e:
-                # If date parsing fails, ignore this filter
-                pass
-        
-        if date_end and date_end.strip():
-            try:
-                end_date = datetime.strptime(date_end.strip(), '%Y-%m-%d').date()
-                enrollments = enrollments.filter(registered_at__date__lte=end_date)
-                participations = participations.filter(attendance_date__lte=end_date)
-            except (ValueError, TypeError) as e:
-                # If date parsing fails, ignore this filter
-                pass
-        
-        # For frequency calculation: count enrollments per user (engagement frequency)
-        # Calculate frequency based on CURRENT filtered enrollments
-        # This ensures frequency is calculated relative to the filtered dataset
-        user_enrollment_counts = list(enrollments.values('user').annotate(
-            enrollment_count=Count('id')
-        ).order_by('-enrollment_count'))
-        
-        # Apply frequency filter based on ENROLLMENT count
-        # Frequency filter: show only users whose enrollment count (within current filters) matches the range
-        # Only apply if at least one frequency value is provided and not empty
-        freq_min_provided = frequency_min and frequency_min.strip()
-        freq_max_provided = frequency_max and frequency_max.strip()
+        # Only actual attendances (attendance_date not null); if no participations exist,
+        # the report still works with enrollments
+        participations = Participation.objects.filter(filters.participation_q()).select_related(
+            'user', 'activity', 'schedule', 'user__faculty'
+        )
         
-        if freq_min_provided or freq_max_provided:
-            try:
-                # Parse frequency values - use 0 and very large number as defaults if not provided
-                freq_min = int(frequency_min.strip()) if freq_min_provided else 0
-                freq_max = int(frequency_max.strip()) if freq_max_provided else 999999
-                
-                # Validate range
-                if freq_min < 0:
-                    freq_min = 0
-                if freq_max < freq_min:
-                    freq_max = freq_min
-                
-                if user_enrollment_counts:
-                    user_ids_with_frequency = [
-                        item['user'] for item in user_enrollment_counts
-                        if item['user'] is not None and freq_min <= item['enrollment_count'] <= freq_max
-                    ]
-                    if user_ids_with_frequency:
-                        # Apply frequency filter to both enrollments and participations
-                        enrollments = enrollments.filter(user__id__in=user_ids_with_frequency)
-                        participations = participations.filter(user__id__in=user_ids_with_frequency)
-                    else:
-                        # No users match the frequency range - return empty querysets
-                        enrollments = Enrollment.objects.none()
-                        participations = Participation.objects.none()
-            except (ValueError, TypeError) as e:
-                # If frequency filter is invalid, ignore it and continue with all data
-                pass
+        # Store original unfiltered counts for debugging (from the daily rollup)
+        db_totals = fact_grand_totals()
+        original_enrollment_count = db_totals['enrollments']
+        original_participation_count = db_totals['participations']
         
         # ========== CALCULATIONS ==========
         # Use enrollments as primary data source (like FilteredReportsView) since seed creates enrollments
         # Also include participations when they exist
         
         # Debug: Check data availability (excluding admin users, but before applying filters)
-        total_enrollments_in_db = Enrollment.objects.exclude(user__id__in=admin_user_ids).count()
-        total_participations_in_db = Participation.objects.filter(
-            attendance_date__isnull=False
-        ).exclude(user__id__in=admin_user_ids).count()
+        total_enrollments_in_db = original_enrollment_count
+        total_participations_in_db = original_participation_count
         
-        # Use enrollments for user count and engagement metrics (like FilteredReportsView)
-        # This ensures it works with seed data which has enrollments
-        total_users = enrollments.values('user').distinct().count()
-        total_enrollments = enrollments.count()
+        # Optional in-memory snapshot (NumPy); None means every metric comes from SQL
+        snapshot = analytics_snapshot()
         
-        # Use participations for actual attendance metrics
-        total_participations = participations.count()
+        # 1. Headline totals in a single query (conditional aggregation per user)
+        headline = snapshot.headline_metrics(filters) if snapshot else headline_metrics(filters)
+        total_users = headline['total_users']
+        total_enrollments = headline['total_enrollments']
+        total_participations = headline['total_participations']
         
         # Average frequency: average enrollments per user (engagement frequency)
         avg_frequency = round(total_enrollments / total_users, 2) if total_users > 0 else 0
@@ -907,23 +541,12 @@ class ParticipationFormalReportView(TemplateView):
         # Average participation frequency: average actual participations per user
         avg_participation_frequency = round(total_participations / total_users, 2) if total_users > 0 else 0
         
-        # 2. Most popular activity (by enrollment count - like FilteredReportsView)
-        # Use enrollments since that's what seed data has
-        most_popular_activity = None
+        # 2. Most popular activity and top activities (by enrollment count - like FilteredReportsView)
+        # One annotated query grouped by activityId, with the filtered participation count per activity
+        top_activities = []
         if total_enrollments > 0:
-            most_popular_activity_data = enrollments.values('activity__name', 'activity__type').annotate(
-                enrollment_count=Count('id')
-            ).order_by('-enrollment_count').first()
-            if most_popular_activity_data:
-                # Also get participation count for this activity
-                activity_name = most_popular_activity_data['activity__name']
-                participation_count = participations.filter(activity__name=activity_name).count()
-                most_popular_activity = {
-                    'activity__name': activity_name,
-                    'activity__type': most_popular_activity_data['activity__type'],
-                    'enrollment_count': most_popular_activity_data['enrollment_count'],
-                    'participation_count': participation_count,
-                }
+            top_activities = (snapshot.activity_ranking if snapshot else activity_ranking)(filters, limit=10)
+        most_popular_activity = top_activities[0] if top_activities else None
         
         # 3. Participation by schedule/group (grouped by activity and schedule)
         # Use enrollments with schedule info (like FilteredReportsView)
@@ -1061,40 +684,10 @@ class ParticipationFormalReportView(TemplateView):
         }
         
         # 7. Frequency distribution (based on enrollment count - like FilteredReportsView)
+        # Histogram computed in SQL with CASE buckets over each user's enrollment count
         frequency_distribution = {}
         if total_enrollments > 0:
-            user_enrollment_frequencies = enrollments.values('user').annotate(
-                enrollment_count=Count('id')
-            )
-            for item in user_enrollment_frequencies:
-                count = item['enrollment_count']
-                frequency_range = self._get_frequency_range(count)
-                if frequency_range not in frequency_distribution:
-                    frequency_distribution[frequency_range] = 0
-                frequency_distribution[frequency_range] += 1
-        
-        # 8. Top activities by enrollment (like FilteredReportsView)
-        top_activities = []
-        if total_enrollments > 0:
-            top_activities_enrollments = list(enrollments.values(
-                'activity__name',
-                'activity__type'
-            ).annotate(
-                enrollment_count=Count('id'),
-                unique_users=Count('user', distinct=True)
-            ).order_by('-enrollment_count')[:10])
-            
-            # Add participation counts to top activities
-            for item in top_activities_enrollments:
-                activity_name = item['activity__name']
-                participation_count = participations.filter(activity__name=activity_name).count()
-                top_activities.append({
-                    'activity__name': activity_name,
-                    'activity__type': item['activity__type'],
-                    'enrollment_count': item['enrollment_count'],
-                    'participation_count': participation_count,
-                    'unique_users': item['unique_users'],
-                })
+            frequency_distribution = (snapshot.frequency_histogram if snapshot else frequency_histogram)(filters)
         
         # Prepare data for charts (use enrollment data primarily, like FilteredReportsView)
         chart_data = {
@@ -1155,17 +748,12 @@ class ParticipationFormalReportView(TemplateView):
             'total_participations': total_participations,
             'total_enrollments': total_enrollments,
             'total_users': total_users,
-            'total_activities': enrollments.values('activity').distinct().count(),
+            # Each activity has a single type, so the per-type counts add up
+            'total_activities': sum(item['unique_activities'] for item in enrollment_by_type),
             'chart_data_json': json.dumps(chart_data),
             'available_activity_types': available_activity_types,
             'available_faculties': available_faculties,
-            'selected_activity_types': activity_types,
-            'selected_faculties': faculties,
-            'selected_genders': genders,
-            'frequency_min': frequency_min if frequency_min else '',
-            'frequency_max': frequency_max if frequency_max else '',
-            'date_start': date_start,
-            'date_end': date_end,
+            **filters.form_values(),
             'gender_names': GENDER_NAMES,
             'debug_total_in_db': total_enrollments_in_db,  # Show enrollments in DB
             'debug_participations_in_db': total_participations_in_db,  # Show participations in DB
@@ -1174,21 +762,6 @@ class ParticipationFormalReportView(TemplateView):
         })
         
         return context
-    
-    def _get_frequency_range(self, count):
-        """Categorize participation frequency into ranges"""
-        if count == 0:
-            return '0'
-        elif count <= 5:
-            return '1-5'
-        elif count <= 10:
-            return '6-10'
-        elif count <= 20:
-            return '11-20'
-        elif count <= 50:
-            return '21-50'
-        else:
-            return '50+'
 
 
 class ParticipationReportExportView(View):
@@ -1196,184 +769,136 @@ class ParticipationReportExportView(View):
     View to export participation report data to CSV
     """
     def get(self, request):
-        # Get same filters as the report view (use same logic)
-        activity_types = request.GET.getlist('activity_type')
-        faculties = request.GET.getlist('faculty')
-        genders = request.GET.getlist('gender')
-        frequency_min = request.GET.get('frequency_min', '').strip()  # Empty means no filter
-        frequency_max = request.GET.get('frequency_max', '').strip()  # Empty means no filter
-        date_start = request.GET.get('date_start', '').strip()
-        date_end = request.GET.get('date_end', '').strip()
-        
-        # Exclude admin/CADI users from export
-        admin_user_ids = get_admin_user_ids()
-        
-        # Use SAME logic as ParticipationFormalReportView
-        # Filter out empty strings from lists
-        activity_types = [x for x in activity_types if x]
-        faculties = [x for x in faculties if x]
-        genders = [x for x in genders if x]
-        frequency_min = frequency_min.strip() if frequency_min else ''
-        frequency_max = frequency_max.strip() if frequency_max else ''
-        date_start = date_start.strip() if date_start else ''
-        date_end = date_end.strip() if date_end else ''
-        
-        # Get enrollments (primary data source - like report view)
-        enrollments = Enrollment.objects.exclude(user__id__in=admin_user_ids).select_related(
-            'user', 'activity', 'schedule', 'user__faculty'
-        )
-        
-        # Get participations (actual attendance)
-        participations = Participation.objects.filter(
-            attendance_date__isnull=False
-        ).exclude(user__id__in=admin_user_ids).select_related('user', 'activity', 'schedule', 'user__faculty')
-        
-        # Apply filters to both (same as report view)
-        if activity_types and len(activity_types) > 0:
-            enrollments = enrollments.filter(activity__type__in=activity_types)
-            participations = participations.filter(activity__type__in=activity_types)
+        if request.GET.get('background') == '1':
+            return enqueue_export(request, ExportKind.PARTICIPATION_CSV)
         
-        if faculties and len(faculties) > 0:
-            enrollments = enrollments.filter(user__faculty__name__in=faculties)
-            participations = participations.filter(user__faculty__name__in=faculties)
-        
-        if genders and len(genders) > 0:
-            enrollments = enrollments.filter(user__gender__in=genders)
-            participations = participations.filter(user__gender__in=genders)
-        
-        if date_start:
-            try:
-                start_date = datetime.strptime(date_start, '%Y-%m-%d').date()
-                enrollments = enrollments.filter(registered_at__date__gte=start_date)
-                participations = participations.filter(attendance_date__gte=start_date)
-            except (ValueError, TypeError):
-                pass
-        
-        if date_end:
-            try:
-                end_date = datetime.strptime(date_end, '%Y-%m-%d').date()
-                enrollments = enrollments.filter(registered_at__date__lte=end_date)
-                participations = participations.filter(attendance_date__lte=end_date)
-            except (ValueError, TypeError):
-                pass
-        
-        # Apply frequency filter (based on enrollment count, like report view)
-        freq_min_provided = frequency_min and frequency_min.strip()
-        freq_max_provided = frequency_max and frequency_max.strip()
-        
-        if freq_min_provided or freq_max_provided:
-            try:
-                # Calculate frequency based on enrollments
-                user_enrollment_counts = list(enrollments.values('user').annotate(
-                    enrollment_count=Count('id')
-                ))
-                
-                freq_min = int(frequency_min.strip()) if freq_min_provided else 0
-                freq_max = int(frequency_max.strip()) if freq_max_provided else 999999
-                
-                if freq_min < 0:
-                    freq_min = 0
-                if freq_max < freq_min:
-                    freq_max = freq_min
-                
-                if user_enrollment_counts:
-                    user_ids_with_frequency = [
-                        item['user'] for item in user_enrollment_counts
-                        if item['user'] is not None and freq_min <= item['enrollment_count'] <= freq_max
-                    ]
-                    if user_ids_with_frequency:
-                        enrollments = enrollments.filter(user__id__in=user_ids_with_frequency)
-                        participations = participations.filter(user__id__in=user_ids_with_frequency)
-                    else:
-                        # No users match - return empty querysets
-                        enrollments = Enrollment.objects.none()
-                        participations = Participation.objects.none()
-            except (ValueError, TypeError):
-                pass
+        enrollments, participations = participation_export_querysets(request.GET)
         
         # For CSV export, we want to export BOTH enrollments and participations
         # But prioritize participations (actual attendance) if they exist
         # If no participations, export enrollment data
+        rows = participation_export_rows(enrollments, participations)
+        filename = 'reporte_participacion.csv'
         
-        # Create CSV response
-        response = HttpResponse(content_type='text/csv; charset=utf-8')
-        response['Content-Disposition'] = 'attachment; filename="reporte_participacion.csv"'
-        
-        # Write BOM for Excel compatibility with UTF-8
-        response.write('\ufeff')
-        
-        writer = csv.writer(response)
+        # Streaming por defecto: las filas se escriben a medida que se leen
+        # de la base de datos. Con ?stream=0 se arma la respuesta completa.
+        if request.GET.get('stream', '1') != '0':
+            return streaming_csv_response(filename, PARTICIPATION_EXPORT_HEADER, rows)
         
-        # Write header
-        writer.writerow([
-            'ID Estudiante',
-            'Nombre',
-            'Facultad',
-            'Género',
-            'Actividad',
-            'Tipo Actividad',
-            'Horario',
-            'Fecha Registro/Asistencia',
-            'Hora',
-            'Tipo',
-        ])
+        response = HttpResponse(content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        response.writelines(csv_stream(PARTICIPATION_EXPORT_HEADER, rows))
+        return response
+
+
+class ParticipationDeltaExportView(View):
+    """
+    Exportación incremental en CSV: solo las inscripciones y asistencias
+    creadas o modificadas, y los borrados, desde `?cursor=` (sin cursor se
+    exportan todas). El cursor siguiente va en el encabezado X-Next-Cursor y
+    X-Has-More indica si quedan páginas pendientes.
+    """
+    def get(self, request):
+        try:
+            limit = int(request.GET.get('limit', DELTA_PAGE_SIZE))
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= DELTA_MAX_PAGE_SIZE:
+            return JsonResponse({'error': f'limit debe estar entre 1 y {DELTA_MAX_PAGE_SIZE}'}, status=400)
+        
+        try:
+            page = delta_page(request.GET.get('cursor'), limit=limit)
+        except ExpiredCursor as exc:
+            return JsonResponse({'error': str(exc)}, status=410)
+        except InvalidCursor as exc:
+            return JsonResponse({'error': str(exc)}, status=400)
+        
+        response = streaming_csv_response('reporte_participacion_delta.csv', DELTA_EXPORT_HEADER, page.rows())
+        response['X-Next-Cursor'] = page.next_cursor
+        response['X-Has-More'] = '1' if page.has_more else '0'
+        return response
+
+
+class ReportBundleView(View):
+    """
+    ZIP con la tabla de reportes filtrados, la segmentación y el reporte de
+    participación, leídos de una misma foto de la base de datos. Se envía
+    comprimido a medida que se genera.
+    """
+    def get(self, request):
+        if request.GET.get('filter', 'actividad') not in TABLE_FILTERS:
+            return JsonResponse({'error': 'No fue posible generar el archivo, por favor intente nuevamente'}, status=400)
         
-        # GENDER_NAMES mapping
-        GENDER_NAMES = {
-            'M': 'Masculino',
-            'F': 'Femenino',
-            'O': 'Otro',
+        response = StreamingHttpResponse(zip_stream(request.GET), content_type='application/zip')
+        response['Content-Disposition'] = f'attachment; filename="{BUNDLE_FILENAME}"'
+        return response
+
+
+class ParticipationReportPdfView(View):
+    """
+    Reporte formal en PDF. Se genera en el worker de exportaciones; mientras
+    los filtros y los datos no cambien, se sirve el mismo archivo.
+    """
+    def get(self, request):
+        cache_key = report_cache_key(ExportKind.PARTICIPATION_PDF, request.GET)
+        job = cached_export(ExportKind.PARTICIPATION_PDF, cache_key)
+        if job is not None:
+            return FileResponse(
+                open(artifact_path(job), 'rb'), as_attachment=True, filename=job.filename,
+                content_type=PDF_CONTENT_TYPE,
+            )
+        return enqueue_export(request, ExportKind.PARTICIPATION_PDF, cache_key=cache_key)
+
+
+def get_export_job(request, job_id):
+    """
+    Devuelve el trabajo si el usuario puede verlo: quien lo pidió o staff.
+    Los trabajos anónimos solo se identifican por su UUID.
+    """
+    job = ExportJob.objects.filter(pk=job_id).first()
+    if job is None:
+        raise Http404("La exportación no existe")
+    if job.requested_by_id and not (
+        request.user.is_authenticated
+        and (request.user.pk == job.requested_by_id or request.user.is_staff)
+    ):
+        raise Http404("La exportación no existe")
+    return job
+
+
+class ExportJobStatusView(View):
+    """
+    Estado de una exportación en segundo plano, para consultar por polling.
+    """
+    def get(self, request, job_id):
+        job = get_export_job(request, job_id)
+        data = {
+            'job_id': str(job.pk),
+            'kind': job.kind,
+            'status': job.status,
+            'created_at': job.created_at.isoformat(),
+            'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+            'expires_at': job.expires_at.isoformat() if job.expires_at else None,
+            'filename': job.filename or None,
+            'error': job.error or None,
+            'download_url': None,
         }
+        if job.status == ExportStatus.DONE:
+            data['download_url'] = reverse('reportsAndStats:export_job_download', args=[job.pk])
+        return JsonResponse(data)
+
+
+class ExportJobDownloadView(View):
+    """
+    Descarga el archivo generado por una exportación en segundo plano.
+    """
+    def get(self, request, job_id):
+        job = get_export_job(request, job_id)
+        if job.status == ExportStatus.EXPIRED:
+            return JsonResponse({'error': 'El archivo ya expiró, por favor genere la exportación de nuevo'}, status=410)
         
-        rows_written = 0
-        
-        # Export participations (actual attendance) if they exist
-        for participation in participations.order_by('user__identification', 'attendance_date'):
-            schedule_str = 'N/A'
-            if participation.schedule:
-                schedule_str = f"{participation.schedule.day} {participation.schedule.start_time}-{participation.schedule.end_time}"
-            
-            # Get gender display
-            gender_display = GENDER_NAMES.get(participation.user.gender, participation.user.gender or 'N/A')
-            
-            writer.writerow([
-                participation.user.identification or 'N/A',
-                participation.user.get_full_name() or participation.user.username,
-                participation.user.faculty.name if participation.user.faculty else 'N/A',
-                gender_display,
-                participation.activity.name,
-                participation.activity.type or 'N/A',
-                schedule_str,
-                participation.attendance_date.strftime('%Y-%m-%d') if participation.attendance_date else 'N/A',
-                participation.attendance_time.strftime('%H:%M:%S') if participation.attendance_time else 'N/A',
-                'Participación',
-            ])
-            rows_written += 1
-        
-        # If no participations or very few, also export enrollments (inscriptions)
-        # This ensures CSV has data when seed only has enrollments
-        if rows_written == 0:
-            # Export enrollments when there are no participations
-            for enrollment in enrollments.order_by('user__identification', 'registered_at'):
-                schedule_str = 'N/A'
-                if enrollment.schedule:
-                    schedule_str = f"{enrollment.schedule.day} {enrollment.schedule.start_time}-{enrollment.schedule.end_time}"
-                
-                # Get gender display
-                gender_display = GENDER_NAMES.get(enrollment.user.gender, enrollment.user.gender or 'N/A')
-                
-                writer.writerow([
-                    enrollment.user.identification or 'N/A',
-                    enrollment.user.get_full_name() or enrollment.user.username,
-                    enrollment.user.faculty.name if enrollment.user.faculty else 'N/A',
-                    gender_display,
-                    enrollment.activity.name,
-                    enrollment.activity.type or 'N/A',
-                    schedule_str,
-                    enrollment.registered_at.strftime('%Y-%m-%d') if enrollment.registered_at else 'N/A',
-                    enrollment.registered_at.strftime('%H:%M:%S') if enrollment.registered_at else 'N/A',
-                    'Inscripción',
-                ])
-                rows_written += 1
+        path = artifact_path(job)
+        if job.status != ExportStatus.DONE or path is None or not path.exists():
+            raise Http404("La exportación no está disponible")
         
-        return response
\ No newline at end of file
+        return FileResponse(open(path, 'rb'), as_attachment=True, filename=job.filename)
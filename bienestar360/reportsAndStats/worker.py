@@ -0,0 +1,16 @@
+"""
+Punto de entrada de los procesos del pool de `run_export_worker`.
+
+Los procesos arrancan con spawn, así que este módulo no importa modelos al
+cargarse: Django se configura en `init_worker` antes de ejecutar trabajos.
+"""
+import django
+
+
+def init_worker():
+    django.setup()
+
+
+def run_job(job_id):
+    from .jobs import run_export_job
+    return run_export_job(job_id)